@@ -0,0 +1,38 @@
+"""
+Vergleicht die Auswertung einer Modellantwort: Regex-Pfad (extract_qna_pairs) gegen den
+validierenden JSON-Parser (parse_cards) bei gleichem Inhalt.
+
+Aufruf: python benchmarks/bench_card_parser.py [karten_pro_antwort]
+"""
+import json
+import logging
+import sys
+import time
+
+import synthetic_pdf  # nimmt src/ in den Suchpfad auf
+from nlp.card_parser import parse_cards
+from nlp.qna_generator import QnAGenerator
+
+RUNS = 2000
+
+
+def main():
+    logging.disable(logging.WARNING)
+    num_cards = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    cards = [{"question": f"**Frage {i}:** Was beschreibt Begriff {i}?", "answer": synthetic_pdf.BODY_TEXT}
+             for i in range(num_cards)]
+    text_response = "\n---\n".join(f"- **Frage {i}:** Was beschreibt Begriff {i}?\n**Antwort {i}:** {c['answer']}"
+                                   for i, c in enumerate(cards))
+    json_response = json.dumps({"cards": cards}, ensure_ascii=False)
+    extract = QnAGenerator(api_type="manual").extract_qna_pairs
+
+    for name, parse, response in (("Regex", extract, text_response), ("JSON", parse_cards, json_response)):
+        start = time.perf_counter()
+        for _ in range(RUNS):
+            result = parse(response)
+        duration = time.perf_counter() - start
+        print(f"  {name:5s}: {duration / RUNS * 1e6:8.1f} µs pro Antwort ({len(result)} Karten)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Zeigt das Skalierungsverhalten des Chunkings:
+- alte Schleife: verbindet den aktuellen Chunk bei jedem Absatz neu und tokenisiert ihn komplett
+- pack_paragraphs: jeder Absatz wird einmal tokenisiert, die Chunkgröße läuft als Summe mit
+
+Bei linearem Verhalten bleibt die Zeit pro Absatz konstant, wenn sich die Dokumentgröße verdoppelt.
+Benötigt das tiktoken-Encoding cl100k_base.
+
+Aufruf: python benchmarks/bench_chunk_packer.py
+"""
+import time
+
+import tiktoken
+
+from synthetic_pdf import BODY_TEXT
+from pdf_parser.pdf_parser import pack_paragraphs
+
+
+def legacy_chunking(paragraphs, enc, max_tokens):
+    """Nachbau der beabsichtigten alten Schleife (mit Anhängen des Absatzes)."""
+    chunks = []
+    current_chunk = []
+    for para in paragraphs:
+        current_chunk.append(para)
+        current_text = " ".join(current_chunk)
+        if len(enc.encode(current_text)) > max_tokens:
+            chunks.append(current_text)
+            current_chunk = []
+    if current_chunk:
+        chunks.append(" ".join(current_chunk))
+    return chunks
+
+
+def packer(paragraphs, enc, max_tokens):
+    token_counts = [len(tokens) for tokens in enc.encode_batch(paragraphs)]
+    return pack_paragraphs(paragraphs, token_counts, min_tokens=200, max_tokens=max_tokens)
+
+
+def main():
+    enc = tiktoken.get_encoding("cl100k_base")
+    max_tokens = 4000  # Große Chunks machen das quadratische Verhalten der alten Schleife sichtbar
+
+    print(f"{'Absätze':>8} | {'alt (ms)':>10} | {'neu (ms)':>10} | {'neu µs/Absatz':>14}")
+    for num_paragraphs in (1000, 2000, 4000, 8000):
+        paragraphs = [f"{i}. {BODY_TEXT}" for i in range(num_paragraphs)]
+
+        start = time.perf_counter()
+        legacy_chunking(paragraphs, enc, max_tokens)
+        legacy = time.perf_counter() - start
+
+        start = time.perf_counter()
+        packer(paragraphs, enc, max_tokens)
+        packed = time.perf_counter() - start
+
+        print(f"{num_paragraphs:>8} | {legacy * 1000:>10.1f} | {packed * 1000:>10.1f} | "
+              f"{packed / num_paragraphs * 1e6:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
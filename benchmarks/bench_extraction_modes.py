@@ -0,0 +1,52 @@
+"""
+Vergleicht die Extraktionsmodi des Parsers auf einem bildlastigen Foliensatz:
+"dict", "rawdict" und "blocks" mit den schlanken Flags sowie "dict" mit den
+PyMuPDF-Standardflags (inklusive Bilddaten) als Referenz für das alte Verhalten.
+
+Aufruf: python benchmarks/bench_extraction_modes.py [seiten]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+from synthetic_pdf import create_slide_pdf
+from pdf_parser import pdf_parser
+from pdf_parser.pdf_parser import PDFParser
+
+
+def run(file_path, mode):
+    parser = PDFParser(file_path, extraction_mode=mode)
+    parser.save_chunks_to_txt = lambda *args, **kwargs: None  # Nur Extraktion messen
+    start = time.perf_counter()
+    parser.extract_text(start_page=1, end_page=None)
+    return time.perf_counter() - start, parser.stats["skipped_pages"]
+
+
+def main():
+    num_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = create_slide_pdf(os.path.join(tmp_dir, "slides.pdf"), num_pages)
+        print(f"{num_pages} Folien")
+
+        lean_flags = pdf_parser.EXTRACTION_FLAGS["dict"]
+        pdf_parser.EXTRACTION_FLAGS["dict"] = fitz.TEXTFLAGS_DICT
+        try:
+            baseline, _ = run(file_path, "dict")
+        finally:
+            pdf_parser.EXTRACTION_FLAGS["dict"] = lean_flags
+        print(f"  dict (Standardflags): {num_pages / baseline:8.1f} Seiten/s")
+
+        for mode in ("dict", "rawdict", "blocks"):
+            duration, skipped = run(file_path, mode)
+            print(
+                f"  {mode:20s}: {num_pages / duration:8.1f} Seiten/s "
+                f"({baseline / duration:5.2f}x, {skipped} Seiten übersprungen)"
+            )
+
+
+if __name__ == "__main__":
+    main()
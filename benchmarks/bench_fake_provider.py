@@ -0,0 +1,82 @@
+"""
+Lasttest der Kartengenerierung gegen den simulierten Provider (ohne Netzwerk und ohne Kosten).
+Misst Durchsatz, Wiederholungen und Drosselungen für mehrere Parallelitätsstufen:
+- "fake": Provider im selben Prozess (api_type="fake")
+- "http": lokaler OpenAI-kompatibler Server, angesprochen über den openai-Client mit Streaming
+
+Aufruf: python benchmarks/bench_fake_provider.py [chunks] [latenz_s] [anteil_429] [anteil_500]
+"""
+import logging
+import sys
+import time
+
+from synthetic_pdf import BODY_TEXT
+from nlp import rate_limiter, retry
+from nlp.fake_provider import FakeBehavior, FakeLLMServer
+from nlp.generation_engine import GenerationEngine
+from nlp.qna_generator import QnAGenerator
+from nlp.retry import RetryPolicy
+
+CONCURRENCY_LEVELS = (1, 4, 8, 16)
+
+
+def make_generator(api_type, behavior, max_in_flight, base_url=None):
+    retry.reset()
+    rate_limiter.reset()
+    generator = QnAGenerator(api_type=api_type, api_key="bench", fake_behavior=behavior, base_url=base_url,
+                             max_connections=max_in_flight)
+    generator.load_dynamic_prompt = lambda: "{chunk}\n\nErstelle {num_questions} Fragen."
+    generator.estimate_tokens = lambda prompt: len(prompt) // 4 + 1000  # Ohne tiktoken-Download
+    generator.retry_policy = RetryPolicy(base_delay=0.05, max_delay=0.5)
+    return generator
+
+
+def run(generator, chunks, max_in_flight):
+    engine = GenerationEngine(
+        lambda chunk: generator.generate_qna_pairs_streaming(chunk, num_questions=3), max_in_flight=max_in_flight
+    )
+    start = time.perf_counter()
+    cards = failed = 0
+    for _, _, result, error in engine.run(chunks):
+        if error is not None:
+            failed += 1
+        else:
+            cards += len(result)
+    return time.perf_counter() - start, cards, failed
+
+
+def report(label, generator, chunks, elapsed, cards, failed, client_stats):
+    limiter = generator.rate_limiter.stats
+    print(f"  {label:12s} {elapsed:6.2f} s, {len(chunks) / elapsed:6.1f} Chunks/s, {cards:4d} Karten, "
+          f"{failed} fehlgeschlagen, {generator.stats['requests']:4d} Anfragen "
+          f"(429: {client_stats['rate_limited']}, 500: {client_stats['server_errors']}, "
+          f"gedrosselt: {limiter['throttled']})")
+
+
+def main():
+    logging.disable(logging.ERROR)
+    num_chunks = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    rate_429 = float(sys.argv[3]) if len(sys.argv) > 3 else 0.05
+    rate_500 = float(sys.argv[4]) if len(sys.argv) > 4 else 0.05
+    chunks = [f"{BODY_TEXT} (Abschnitt {i})" for i in range(num_chunks)]
+
+    print(f"{num_chunks} Chunks, Latenz lognormal mit Median {latency:.2f} s, "
+          f"429: {rate_429:.0%}, 500: {rate_500:.0%}")
+    for max_in_flight in CONCURRENCY_LEVELS:
+        print(f"max_in_flight={max_in_flight}")
+
+        behavior = FakeBehavior(latency=latency, latency_spread=0.5, distribution="lognormal",
+                                rate_429=rate_429, rate_500=rate_500, chunk_delay=0.002, seed=0)
+        generator = make_generator("fake", behavior, max_in_flight)
+        report("fake", generator, chunks, *run(generator, chunks, max_in_flight), generator.client.stats)
+
+        behavior = FakeBehavior(latency=latency, latency_spread=0.5, distribution="lognormal",
+                                rate_429=rate_429, rate_500=rate_500, chunk_delay=0.002, seed=0)
+        with FakeLLMServer(behavior) as server:
+            generator = make_generator("openai", None, max_in_flight, base_url=server.base_url)
+            report("http", generator, chunks, *run(generator, chunks, max_in_flight), server.stats)
+
+
+if __name__ == "__main__":
+    main()
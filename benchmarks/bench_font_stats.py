@@ -0,0 +1,66 @@
+"""
+Vergleicht die Ermittlung der Fließtextgröße auf einem 1000-seitigen Dokument:
+- alt: Liste aller Span-Größen + statistics.mean
+- neu: FontSizeHistogram (feste Größe, gewichtet nach Zeichen)
+
+Gemessen werden Laufzeit und Spitzen-Speicher (tracemalloc) der reinen Statistik
+über die bereits extrahierten Seiten, damit die PyMuPDF-Extraktion nicht überwiegt.
+
+Aufruf: python benchmarks/bench_font_stats.py [seiten]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from statistics import mean
+
+import fitz  # PyMuPDF
+
+from synthetic_pdf import create_lecture_pdf
+from pdf_parser.font_stats import FontSizeHistogram
+from pdf_parser.pdf_parser import _page_spans
+
+
+def legacy_mean(pages):
+    font_sizes = []
+    for spans in pages:
+        for font_size, _, _ in spans:
+            font_sizes.append(font_size)
+    return mean(font_sizes) if font_sizes else 0
+
+
+def histogram_mode(pages):
+    histogram = FontSizeHistogram()
+    for spans in pages:
+        histogram.add_spans(spans)
+    return histogram.body_size
+
+
+def measure(func, pages):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(pages)
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, duration, peak
+
+
+def main():
+    num_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = create_lecture_pdf(os.path.join(tmp_dir, "bench.pdf"), num_pages, paragraphs_per_page=20)
+        with fitz.open(file_path) as document:
+            pages = [_page_spans(page) for page in document]
+
+    span_count = sum(len(spans) for spans in pages)
+    print(f"{num_pages} Seiten, {span_count} Spans")
+    for name, func in (("Mittelwert (alt)", legacy_mean), ("Histogramm (neu)", histogram_mode)):
+        result, duration, peak = measure(func, pages)
+        print(f"  {name}: {result:6.2f} pt  {duration * 1000:8.1f} ms  Spitze {peak / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Misst die Kartengenerierung gegen einen Ersatz-Provider mit künstlicher Latenz:
+QnAGenerator.call_openai wird durch eine Funktion ersetzt, die wartet und feste Karten zurückgibt.
+Verglichen werden die alte sequentielle Schleife und die GenerationEngine mit verschiedenen
+Parallelitätsgraden.
+
+Aufruf: python benchmarks/bench_generation_engine.py [chunks] [latenz_in_s]
+"""
+import sys
+import time
+
+import synthetic_pdf  # nimmt src/ in den Suchpfad auf
+from nlp.generation_engine import GenerationEngine
+from nlp.qna_generator import QnAGenerator
+
+RESPONSE = "Frage: Was ist ein Chunk?\nAntwort: Ein Textabschnitt.\n" * 3
+
+
+def stub_generator(latency):
+    generator = QnAGenerator(api_type="openai", api_key="bench")
+
+    def call_openai(prompt):
+        time.sleep(latency)
+        return RESPONSE
+
+    generator.call_openai = call_openai
+    generator.load_dynamic_prompt = lambda: "{chunk} {num_questions}"
+    return generator
+
+
+def main():
+    num_chunks = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    chunks = [f"Chunk {i}" for i in range(num_chunks)]
+    generator = stub_generator(latency)
+
+    start = time.perf_counter()
+    sequential = [generator.generate_qna_pairs(chunk, num_questions=3) for chunk in chunks]
+    baseline = time.perf_counter() - start
+    print(f"{num_chunks} Chunks, {latency:.2f} s Latenz")
+    print(f"  sequentiell:          {baseline:7.2f} s")
+
+    for max_in_flight in (2, 4, 8, 16):
+        engine = GenerationEngine(lambda chunk: generator.generate_qna_pairs(chunk, num_questions=3),
+                                  max_in_flight=max_in_flight)
+        start = time.perf_counter()
+        results = [result for _, _, result, _ in engine.run(chunks)]
+        duration = time.perf_counter() - start
+        status = "identisch" if results == sequential else "ABWEICHUNG"
+        print(f"  {max_in_flight:2d} parallel:          {duration:7.2f} s  ({baseline / duration:5.2f}x, {status})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Vergleicht die Antwortzeiten je Chunk mit und ohne Hedging gegen den simulierten Provider.
+Die Latenz ist lognormal verteilt (langer Schwanz); gemessen werden p50/p95/p99, Gesamtdauer
+und die Zusatzkosten durch Duplikate.
+
+Aufruf: python benchmarks/bench_hedging.py [chunks] [median_s] [sigma]
+"""
+import logging
+import statistics
+import sys
+import time
+
+from synthetic_pdf import BODY_TEXT
+from nlp import hedging, rate_limiter, retry
+from nlp.fake_provider import FakeBehavior
+from nlp.generation_engine import GenerationEngine
+from nlp.hedging import HedgingPolicy
+from nlp.qna_generator import QnAGenerator
+
+MAX_IN_FLIGHT = 8
+
+
+def run(chunks, behavior, policy):
+    retry.reset()
+    rate_limiter.reset()
+    hedging.reset()
+    generator = QnAGenerator(api_type="fake", fake_behavior=behavior, hedging_policy=policy)
+    generator.load_dynamic_prompt = lambda: "{chunk}\n\nErstelle {num_questions} Fragen."
+    generator.estimate_tokens = lambda prompt: len(prompt) // 4 + 1000  # Ohne tiktoken-Download
+
+    durations = []
+
+    def generate(chunk):
+        start = time.perf_counter()
+        result = generator.generate_qna_pairs(chunk, num_questions=3)
+        durations.append(time.perf_counter() - start)
+        return result
+
+    start = time.perf_counter()
+    for _ in GenerationEngine(generate, max_in_flight=MAX_IN_FLIGHT).run(chunks):
+        pass
+    return time.perf_counter() - start, sorted(durations), generator.stats
+
+
+def report(label, elapsed, durations, stats):
+    quantiles = statistics.quantiles(durations, n=100)
+    print(f"  {label:15s} gesamt {elapsed:6.2f} s, p50 {quantiles[49]:.3f} s, p95 {quantiles[94]:.3f} s, "
+          f"p99 {quantiles[98]:.3f} s, Duplikate {stats['hedged_requests']} "
+          f"({stats['hedged_requests'] / max(1, stats['requests'] - stats['hedged_requests']):.0%}), "
+          f"davon schneller {stats['hedge_wins']}")
+
+
+def main():
+    logging.disable(logging.WARNING)
+    num_chunks = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    median = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    sigma = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+    chunks = [f"{BODY_TEXT} (Abschnitt {i})" for i in range(num_chunks)]
+
+    print(f"{num_chunks} Chunks, Latenz lognormal (Median {median:.3f} s, Sigma {sigma}), "
+          f"{MAX_IN_FLIGHT} parallele Anfragen")
+
+    def behavior():
+        return FakeBehavior(latency=median, latency_spread=sigma, distribution="lognormal", seed=0)
+
+    report("ohne Hedging", *run(chunks, behavior(), None))
+    # default_delay gilt nur, bis genug Messwerte für das p95 vorliegen
+    policy = HedgingPolicy(min_delay=0.01, default_delay=median * 4, budget=0.1)
+    report("mit Hedging", *run(chunks, behavior(), policy))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Misst die Extraktion mit unterschiedlich vielen Prozessen auf synthetischen PDFs
+mit 100 und 1000 Seiten und prüft, dass alle Varianten dieselben Chunks liefern.
+
+Aufruf: python benchmarks/bench_parallel_extraction.py [worker ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from synthetic_pdf import create_lecture_pdf
+from pdf_parser.pdf_parser import PDFParser
+
+
+def run(file_path, workers):
+    parser = PDFParser(file_path, workers=workers)
+    parser.save_chunks_to_txt = lambda *args, **kwargs: None  # Nur Extraktion messen
+    start = time.perf_counter()
+    chunks = parser.extract_text(start_page=1, end_page=None)
+    return time.perf_counter() - start, chunks
+
+
+def main():
+    worker_counts = [int(arg) for arg in sys.argv[1:]] or [1, 2, 4, os.cpu_count() or 1]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_pages in (100, 1000):
+            file_path = create_lecture_pdf(os.path.join(tmp_dir, f"bench_{num_pages}.pdf"), num_pages)
+            baseline, reference = run(file_path, 1)
+
+            print(f"{num_pages} Seiten")
+            for workers in worker_counts:
+                duration, chunks = run(file_path, workers)
+                status = "identisch" if chunks == reference else "ABWEICHUNG"
+                print(f"  {workers:2d} Prozesse: {duration * 1000:8.1f} ms  ({baseline / duration:5.2f}x, {status})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Vergleicht die Laufzeit der Textextraktion:
+- alter Zwei-Pass-Weg (Statistik über alle Seiten + zweite Extraktion des Bereichs)
+- neuer Ein-Pass-Weg von PDFParser.extract_text()
+
+Aufruf: python benchmarks/bench_pdf_parser.py [seiten] [startseite] [endseite]
+"""
+import os
+import sys
+import tempfile
+import time
+from statistics import mean
+
+import fitz  # PyMuPDF
+
+from synthetic_pdf import create_lecture_pdf
+from pdf_parser.pdf_parser import PDFParser
+
+
+def legacy_two_pass(file_path, start_page, end_page):
+    """Nachbau des bisherigen Ablaufs: Dokument zweimal öffnen, `dict` zweimal pro Seite."""
+    document = fitz.open(file_path)
+    font_sizes = []
+    for page_num in range(len(document)):
+        for block in document.load_page(page_num).get_text("dict")["blocks"]:
+            if "lines" in block:
+                for line in block["lines"]:
+                    for span in line["spans"]:
+                        font_sizes.append(span["size"])
+    avg_font_size = mean(font_sizes) if font_sizes else 0
+
+    pdf = fitz.open(file_path)
+    span_count = 0
+    for page_num in range(start_page - 1, end_page):
+        for block in pdf.load_page(page_num).get_text("dict")["blocks"]:
+            if "lines" in block:
+                for line in block["lines"]:
+                    span_count += len(line["spans"])
+    return avg_font_size, span_count
+
+
+def single_pass(file_path, start_page, end_page):
+    """Neuer Ablauf: ein geöffnetes Dokument, ein `dict`-Aufruf pro gewählter Seite."""
+    parser = PDFParser(file_path)
+    with fitz.open(file_path) as document:
+        spans, font_sizes = parser._collect_spans(document, start_page, end_page)
+    return font_sizes.body_size, len(spans)
+
+
+def measure(func, *args, repeat=3):
+    """Gibt die beste Laufzeit aus `repeat` Durchläufen zurück."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    num_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    start_page = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    end_page = int(sys.argv[3]) if len(sys.argv) > 3 else num_pages
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = create_lecture_pdf(os.path.join(tmp_dir, "bench.pdf"), num_pages)
+
+        legacy = measure(legacy_two_pass, file_path, start_page, end_page)
+        fused = measure(single_pass, file_path, start_page, end_page)
+
+    print(f"{num_pages} Seiten, Bereich {start_page}-{end_page}")
+    print(f"  Zwei-Pass (alt): {legacy * 1000:8.1f} ms")
+    print(f"  Ein-Pass (neu):  {fused * 1000:8.1f} ms")
+    print(f"  Beschleunigung:  {legacy / fused:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Vergleicht Anfragen und Prompt-Tokens pro Dokument mit und ohne Bündelung kleiner Chunks.
+Ein Ersatz-Provider beantwortet jeden '### Abschnitt <Nr>' mit einer Karte, es wird nichts gesendet.
+Die Chunks sind 50–200 Tokens groß, wie sie nach merge_small_chunks typischerweise übrig bleiben.
+
+Aufruf: python benchmarks/bench_request_packing.py [chunks]
+"""
+import logging
+import random
+import re
+import sys
+
+from synthetic_pdf import BODY_TEXT
+from nlp import tokenizer
+from nlp.qna_generator import QnAGenerator, iter_packs
+from nlp.rate_limiter import RateLimiter
+
+
+# Typische Länge einer Prompt-Vorlage mit Rollenbeschreibung, Regeln und Formatvorgabe
+PROMPT_TEMPLATE = (
+    "Du bist Tutor an einer Hochschule und erstellst Lernkarteikarten. "
+    "Jede Frage prüft genau einen Sachverhalt, die Antwort ist kurz und vollständig. "
+    "Vermeide Ja/Nein-Fragen, Wiederholungen und Fragen zu Seitenzahlen oder Abbildungen. " * 5
+    + "Antworte im Format 'Frage: ...' und 'Antwort: ...'.\n\nText:\n{chunk}\n\n"
+    "Erstelle {num_questions} Fragen."
+)
+
+
+def load_token_counter():
+    """tiktoken-Zählung, falls das Encoding verfügbar ist, sonst dieselbe Schätzung wie QnAGenerator."""
+    try:
+        tokenizer.get_encoding()
+        return tokenizer.count_tokens
+    except Exception:
+        print("tiktoken-Encoding nicht verfügbar, Tokens werden geschätzt (Zeichen / 4).")
+        return lambda text: len(text) // 4 + 1
+
+
+def answer(prompt):
+    sections = re.findall(r"### Abschnitt (\d+)", prompt) or ["1"]
+    return "\n".join(f"### Abschnitt {n}\nFrage: Frage {n}?\nAntwort: Antwort {n}." for n in sections)
+
+
+def run(generator, packs):
+    generator.stats.update(requests=0, prompt_tokens=0, packed_requests=0, pack_fallbacks=0)
+    cards = sum(len(pairs) for pack in packs for pairs in generator.generate_packed(pack))
+    return dict(generator.stats), cards
+
+
+def main():
+    logging.disable(logging.WARNING)
+    num_chunks = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    rng = random.Random(0)
+    chunks = [" ".join([BODY_TEXT] * rng.randint(2, 8)) for _ in range(num_chunks)]
+    items = [(chunk, 1) for chunk in chunks]
+
+    count_tokens = load_token_counter()
+    generator = QnAGenerator(api_type="openai", api_key="bench")
+    generator.call_openai = answer
+    generator.load_dynamic_prompt = lambda: PROMPT_TEMPLATE
+    generator.rate_limiter = RateLimiter(rpm=10**9, tpm=10**12)  # Es wird nichts gesendet, also nicht drosseln
+    generator.estimate_tokens = lambda prompt: count_tokens(prompt) + 1000
+
+    single, single_cards = run(generator, [[item] for item in items])
+    packed, packed_cards = run(generator, list(iter_packs(items, count_tokens)))
+
+    print(f"{num_chunks} Chunks")
+    print(f"  einzeln:   {single['requests']:5d} Anfragen, {single['prompt_tokens']:8d} Prompt-Tokens, "
+          f"{single_cards} Karten")
+    print(f"  gebündelt: {packed['requests']:5d} Anfragen, {packed['prompt_tokens']:8d} Prompt-Tokens, "
+          f"{packed_cards} Karten, {packed['pack_fallbacks']} Rückfälle")
+    print(f"  Ersparnis: {1 - packed['requests'] / single['requests']:.0%} Anfragen, "
+          f"{1 - packed['prompt_tokens'] / single['prompt_tokens']:.0%} Prompt-Tokens")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Erzeugt synthetische Vorlesungsskripte für die Benchmarks.
+Jede Seite enthält eine fette Überschrift und mehrere Absätze Fließtext.
+"""
+import os
+import sys
+
+import fitz  # PyMuPDF
+
+# src/ in den Suchpfad aufnehmen, damit die Benchmarks die Module wie die Tests importieren
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+BODY_TEXT = (
+    "Dies ist ein Absatz Fließtext aus einem Vorlesungsskript. "
+    "Er enthält mehrere Sätze, damit Parser und Chunking realistisch arbeiten."
+)
+
+
+def create_lecture_pdf(path, num_pages, paragraphs_per_page=6):
+    """Schreibt ein PDF mit `num_pages` Seiten nach `path` und gibt den Pfad zurück."""
+    doc = fitz.open()
+    for page_num in range(num_pages):
+        page = doc.new_page()
+        y = 72
+        page.insert_text((72, y), f"Kapitel {page_num + 1}", fontsize=18, fontname="hebo")
+        y += 36
+        for _ in range(paragraphs_per_page):
+            for line in (BODY_TEXT[:70], BODY_TEXT[70:]):
+                page.insert_text((72, y), line, fontsize=11, fontname="helv")
+                y += 16
+            y += 10
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def create_slide_pdf(path, num_pages, image_only_every=4, image_size=256):
+    """
+    Schreibt einen Foliensatz: jede Folie enthält eine Überschrift, Stichpunkte und ein Rasterbild,
+    jede `image_only_every`-te Folie besteht nur aus einem Bild (wie eine gescannte Seite).
+    """
+    pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, image_size, image_size), False)
+    pixmap.set_rect(pixmap.irect, (40, 90, 160))
+    image = pixmap.tobytes("png")
+
+    doc = fitz.open()
+    for page_num in range(num_pages):
+        page = doc.new_page()
+        if image_only_every and (page_num + 1) % image_only_every == 0:
+            page.insert_image(page.rect, stream=image)
+            continue
+        page.insert_text((72, 72), f"Folie {page_num + 1}", fontsize=24, fontname="hebo")
+        y = 120
+        for _ in range(4):
+            page.insert_text((90, y), "• " + BODY_TEXT[:60], fontsize=14, fontname="helv")
+            y += 24
+        page.insert_image(fitz.Rect(72, y + 20, 522, y + 320), stream=image)
+    doc.save(path)
+    doc.close()
+    return path
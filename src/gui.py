@@ -1,30 +1,117 @@
 import csv
-import json
 import logging
 import os
 import sys
+import threading
+import time
+from collections import deque
 
 import fitz
 import pyperclip
-import tiktoken
 from fpdf import FPDF
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, qDebug
+from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal, qDebug
 from PyQt6.QtGui import QDragEnterEvent, QDropEvent, QMovie
 from PyQt6.QtWidgets import (
-    QApplication, QButtonGroup, QCheckBox, QDoubleSpinBox, QFileDialog, QFrame,
+    QApplication, QButtonGroup, QCheckBox, QComboBox, QDoubleSpinBox, QFileDialog, QFrame,
     QGridLayout, QGroupBox, QHBoxLayout, QLabel, QLineEdit, QMainWindow,
     QMessageBox, QProgressBar, QProgressDialog, QPushButton, QRadioButton,
-    QScrollArea, QSpacerItem, QSizePolicy, QSpinBox, QStackedWidget, QTextEdit,
-    QVBoxLayout, QWidget
+    QScrollArea, QSpacerItem, QSizePolicy, QSpinBox, QStackedWidget, QTableWidget,
+    QTableWidgetItem, QTextEdit, QVBoxLayout, QWidget
 )
 from superqt import QRangeSlider
 
+from job_queue import FINAL_STATES, Job, JobQueue
+from nlp import metrics as usage_metrics
+from nlp import checkpoint, prompt_registry, rate_limiter, tokenizer
+from nlp.checkpoint import CheckpointJournal
+from nlp.generation_engine import GenerationCancelled, GenerationEngine, JobControl
+from nlp.hedging import HedgingPolicy
+from nlp.metrics import UsageMetrics
+from nlp.response_cache import ResponseCache
+from nlp.retry import ProviderError
 from nlp.qna_generator import QnAGenerator
-from pdf_parser.pdf_parser import PDFParser
+from pdf_parser.parse_cache import ParseCache, file_hash
+from pdf_parser.pdf_parser import PARSER_VERSION, PDFParser
 
 
 logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# Anzahl Prozesse für die PDF-Extraktion (1 = seriell)
+PDF_WORKERS = os.cpu_count() or 1
+
+# Extraktionsmodus des PDF-Parsers: "dict", "rawdict" oder "blocks" (ohne Überschriftenerkennung)
+PDF_EXTRACTION_MODE = "dict"
+
+# Maximale Anzahl gleichzeitig laufender API-Anfragen bei der Kartengenerierung
+API_MAX_IN_FLIGHT = 4
+
+# So lange wartet das Schließen des Fensters auf das Ende eines abgebrochenen Laufs (Millisekunden)
+CLOSE_TIMEOUT_MS = 5000
+
+# OpenAI-kompatibler Endpunkt und Modell (z. B. lokaler Inferenzserver); ohne Angabe die offizielle OpenAI-API
+API_BASE_URL = os.environ.get("KARTEIKARTEN_API_BASE_URL") or None
+API_MODEL = os.environ.get("KARTEIKARTEN_API_MODEL") or None
+
+# Ausweich-Provider für Hedging und Failover: der jeweils andere, sofern sein Schlüssel in der Umgebung steht
+FALLBACK_PROVIDERS = {"openai": ("gemini", "GEMINI_API_KEY"), "gemini": ("openai", "OPENAI_API_KEY")}
+
+# Antworten streamen: jede Karte erscheint, sobald sie fertig ist (nicht bei gebündelten Anfragen)
+API_STREAMING = True
+
+# Verzeichnis des persistenten Parse- und Antwort-Caches (über Umgebungsvariable anpassbar)
+PARSE_CACHE_DIR = os.environ.get("KARTEIKARTEN_CACHE_DIR", os.path.join("data", "cache"))
+
+# Platzhalter im Prompt-Feld, wenn die Vorlage nicht geladen werden konnte (wird nicht gesendet)
+PROMPT_LOAD_ERROR = "⚠ Fehler beim Laden des Prompts"
+
+# Seiten-Cache des geöffneten PDFs: ab dieser Seitenzahl werden ältere Seiten auf die Platte ausgelagert
+PAGE_CACHE_MAX_PAGES = 2000
+PAGE_CACHE_SPILL_DIR = os.path.join(PARSE_CACHE_DIR, "pages")
+
+# Checkpoint-Journale: fertige Chunks eines Laufs, damit ein abgebrochener Lauf fortgesetzt werden kann
+CHECKPOINT_DIR = os.path.join(PARSE_CACHE_DIR, "checkpoints")
+
+# Nutzungsdaten je Lauf (JSON) und Prometheus-Textdatei für den node_exporter
+METRICS_DIR = os.environ.get("KARTEIKARTEN_METRICS_DIR", os.path.join("data", "metrics"))
+
+# Warteschlange: Reihenfolge ("sjf" = wenigste offene Chunks zuerst, "fifo"), Aktualisierung der Ansicht
+# und Zielordner für die automatisch exportierten Karten fertiger Aufträge (Anki-CSV)
+QUEUE_POLICY = "sjf"
+QUEUE_REFRESH_MS = 500
+QUEUE_EXPORT_DIR = os.path.join("data", "output", "queue")
+
+# Statusanzeige der Aufträge in der Warteschlange
+JOB_STATE_LABELS = {
+    "queued": "⏳ Wartet", "parsing": "📄 Wird gelesen", "running": "⚙️ Läuft",
+    "done": "✅ Fertig", "failed": "❌ Fehlgeschlagen", "cancelled": "⏹ Abgebrochen",
+}
+
+
+def endpoint_options(api_type):
+    """Abweichender Endpunkt und abweichendes Modell gelten nur für den OpenAI-kompatiblen Provider."""
+    if api_type != "openai":
+        return {}
+    return {"base_url": API_BASE_URL, "model": API_MODEL}
+
+
+def write_csv(file_path, cards):
+    """Schreibt Karteikarten im Anki-kompatiblen CSV-Format (Frage und Antwort durch Tab getrennt)."""
+    with open(file_path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file, delimiter="\t")
+        for card in cards:
+            writer.writerow([card["question"], card["answer"]])
+
+
+def create_hedging_policy(api_type, **generator_options):
+    """HedgingPolicy mit dem anderen Provider als Ausweichziel, sonst Duplikate an denselben Provider."""
+    fallback_type, key_variable = FALLBACK_PROVIDERS.get(api_type, (None, None))
+    fallback = None
+    if fallback_type and os.environ.get(key_variable):
+        fallback = QnAGenerator(fallback_type, os.environ[key_variable], **generator_options,
+                                **endpoint_options(fallback_type))
+        logging.info(f"🔀 Hedging/Failover: {api_type} → {fallback_type}")
+    return HedgingPolicy(fallback=fallback)
+
 class Stepper(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -32,6 +119,7 @@ class Stepper(QMainWindow):
 
         # **QnAGenerator für alle Seiten initialisieren**
         self.qna_generator = None  # Wird später je nach API-Typ gesetzt
+        self.queue_window = None  # Warteschlange für mehrere Dokumente, beim ersten Einreihen erstellt
 
         # API-Seite laden (wo die API ausgewählt wird)
         self.api_page = ApiSelectionPage(self)
@@ -121,7 +209,13 @@ class Stepper(QMainWindow):
         self.update_stepper()
 
     def next_step(self):
-        if self.current_step == 1:  
+        if self.current_step == 0 and self.selection_page.pipeline_checkbox.isChecked():
+            # Pipeline-Modus: Chunk-Prüfung überspringen, Chunks entstehen erst während der Generierung
+            logging.debug("DEBUG: Pipeline-Modus gewählt → ChunkEditingPage wird übersprungen")
+            self.chunks = []
+            self.current_step = 1
+
+        if self.current_step == 1 and not self.selection_page.pipeline_checkbox.isChecked():
             self.chunk_page.save_chunk_changes()  
 
         if self.current_step == 2:  # API-Seite
@@ -133,7 +227,9 @@ class Stepper(QMainWindow):
                     "openai" if self.api_page.openai_radio.isChecked() else "gemini"
             api_key = self.api_page.api_key_input.text() if api_type != "manual" else None
             
-            self.qna_generator = QnAGenerator(api_type, api_key)
+            prompt, system_prompt = self.api_page.selected_prompts()
+            self.qna_generator = QnAGenerator(api_type, api_key, prompt=prompt, system_prompt=system_prompt,
+                                              **endpoint_options(api_type))
             logging.debug(f"✅ QnAGenerator für {api_type} initialisiert.")
 
         if self.current_step < len(self.steps) - 1:
@@ -142,6 +238,9 @@ class Stepper(QMainWindow):
             self.stacked_widget.setCurrentIndex(self.current_step)
             self.update_stepper()
 
+            if self.current_step == 2:  # API-Seite: Schätzung mit den aktuellen Chunks
+                self.api_page.update_cost_estimate()
+
             if self.current_step == 1:  # Zweite Seite (Chunks bearbeiten)
                 logging.debug("DEBUG: Wechsle zu ChunkEditingPage – initializePage() aufrufen")
                 self.chunk_page.initializePage()  
@@ -149,6 +248,10 @@ class Stepper(QMainWindow):
             if self.current_step == 3:  # Die richtige Seite für Karteikarten
                 if self.api_page.manual_radio.isChecked():
                     logging.debug("DEBUG: Manuell-Modus gewählt → Wechsel zu ManualProcessingPage")
+                    if self.selection_page.pipeline_checkbox.isChecked():
+                        # Die manuelle Bearbeitung braucht alle Chunks vorab
+                        self.chunks = list(self.selection_page.create_parser().iter_chunks(
+                            *self.selection_page.page_range()))
                     self.manual_page.initializePage()
                     self.stacked_widget.setCurrentWidget(self.manual_page)  # Manuell-Seite setzen
                 else:
@@ -165,6 +268,8 @@ class Stepper(QMainWindow):
     def prev_step(self):
         if self.current_step > 0:
             self.current_step -= 1
+            if self.current_step == 1 and self.selection_page.pipeline_checkbox.isChecked():
+                self.current_step = 0  # Im Pipeline-Modus gibt es keine Chunk-Seite
             logging.debug(f"Zurück zu Schritt {self.current_step}: {self.steps[self.current_step]}")
             self.stacked_widget.setCurrentIndex(self.current_step)
             self.update_stepper()
@@ -196,6 +301,177 @@ class Stepper(QMainWindow):
             border: 2px solid gray;
         """
 
+    def enqueue_document(self):
+        """Reiht die gewählte PDF mit Seitenbereich und den Einstellungen der API-Seite in die Warteschlange ein."""
+        if not self.selection_page.selected_file or self.api_page.manual_radio.isChecked():
+            QMessageBox.warning(self, "Warteschlange", "Bitte eine PDF-Datei und OpenAI oder Gemini auswählen.")
+            return
+        if not self.api_page.show_cost_warning():
+            return
+
+        api_type = "openai" if self.api_page.openai_radio.isChecked() else "gemini"
+        prompt, system_prompt = self.api_page.selected_prompts()
+        output_format = "json" if self.api_page.json_output_checkbox.isChecked() else "text"
+        settings = {
+            "api_type": api_type, "api_key": self.api_page.api_key_input.text(), "prompt": prompt,
+            "system_prompt": system_prompt, "output_format": output_format, **endpoint_options(api_type),
+        }
+        job = Job(self.selection_page.selected_file, *self.selection_page.page_range(), settings=settings,
+                  pinned=self.api_page.pin_job_checkbox.isChecked())
+
+        if self.queue_window is None:
+            self.queue_window = JobQueueWindow()
+        self.queue_window.queue.submit(job)
+        self.queue_window.show()
+        self.queue_window.raise_()
+
+    def closeEvent(self, event):
+        """Beim Schließen einen laufenden Lauf abbrechen, damit keine bezahlten Anfragen weiterlaufen."""
+        thread = self.card_page.processing_thread
+        if thread is not None and thread.isRunning():
+            thread.control.cancel()
+            thread.wait(CLOSE_TIMEOUT_MS)
+        if self.queue_window is not None:
+            self.queue_window.queue.close()
+            self.queue_window.close()
+        super().closeEvent(event)
+
+
+class JobQueueWindow(QWidget):
+    """Fortschritt aller eingereihten Dokumente; Aufträge lassen sich anheften, pausieren und abbrechen."""
+
+    COLUMNS = ["Dokument", "Status", "Chunks", "Karten", "Fehler"]
+
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Warteschlange")
+        self.resize(700, 350)
+
+        # Ein gemeinsamer Pool für alle Aufträge, gemeinsame Caches wie beim Einzel-Lauf
+        self.queue = JobQueue(
+            max_workers=API_MAX_IN_FLIGHT,
+            policy=QUEUE_POLICY,
+            parse_cache=ParseCache(PARSE_CACHE_DIR, PARSER_VERSION),
+            response_cache=ResponseCache(PARSE_CACHE_DIR),
+            checkpoint_dir=CHECKPOINT_DIR,
+            streaming=API_STREAMING,
+        )
+        self.exported = set()  # IDs der Aufträge, deren Karten schon gespeichert wurden
+
+        layout = QVBoxLayout()
+
+        header_layout = QHBoxLayout()
+        self.depth_label = QLabel("Offene Aufträge: 0")
+        header_layout.addWidget(self.depth_label)
+        header_layout.addStretch()
+        header_layout.addWidget(QLabel("Reihenfolge:"))
+        self.policy_box = QComboBox()
+        self.policy_box.addItem("Kürzeste zuerst", "sjf")
+        self.policy_box.addItem("Nach Eingang", "fifo")
+        self.policy_box.setCurrentIndex(self.policy_box.findData(QUEUE_POLICY))
+        self.policy_box.currentIndexChanged.connect(self.change_policy)
+        header_layout.addWidget(self.policy_box)
+        layout.addLayout(header_layout)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        self.pin_button = QPushButton("📌 Anheften / Lösen")
+        self.pin_button.clicked.connect(self.toggle_pin)
+        self.pause_button = QPushButton("⏸ Pausieren / Fortsetzen")
+        self.pause_button.clicked.connect(self.toggle_pause)
+        self.cancel_button = QPushButton("⏹ Abbrechen")
+        self.cancel_button.clicked.connect(self.cancel_job)
+        button_layout.addWidget(self.pin_button)
+        button_layout.addWidget(self.pause_button)
+        button_layout.addStretch()
+        button_layout.addWidget(self.cancel_button)
+        layout.addLayout(button_layout)
+
+        self.export_label = QLabel(f"Fertige Aufträge werden als CSV unter {QUEUE_EXPORT_DIR} gespeichert.")
+        layout.addWidget(self.export_label)
+
+        self.setLayout(layout)
+
+        # Die Worker melden sich nicht im GUI-Thread; die Ansicht liest den Stand regelmäßig über snapshot()
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(QUEUE_REFRESH_MS)
+
+    def selected_job(self):
+        """Gibt den markierten Auftrag zurück (Zeilen in Einreihungsreihenfolge wie queue.jobs)."""
+        row = self.table.currentRow()
+        return self.queue.jobs[row] if 0 <= row < len(self.queue.jobs) else None
+
+    def change_policy(self):
+        self.queue.policy = self.policy_box.currentData()
+        logging.info(f"📋 Reihenfolge der Warteschlange: {self.queue.policy}")
+
+    def toggle_pin(self):
+        job = self.selected_job()
+        if job is not None:
+            self.queue.pin(job, not job.pinned)
+            self.refresh()
+
+    def toggle_pause(self):
+        job = self.selected_job()
+        if job is None or job.state in FINAL_STATES:
+            return
+        if job.control.paused:
+            self.queue.resume(job)
+        else:
+            self.queue.pause(job)
+        self.refresh()
+
+    def cancel_job(self):
+        job = self.selected_job()
+        if job is not None and job.state not in FINAL_STATES:
+            self.queue.cancel(job)
+            self.refresh()
+
+    def refresh(self):
+        """Aktualisiert Tabelle und Warteschlangentiefe und speichert die Karten fertiger Aufträge."""
+        snapshot = self.queue.snapshot()
+        self.depth_label.setText(f"Offene Aufträge: {self.queue.depth()}")
+        self.table.setRowCount(len(snapshot))
+        for row, progress in enumerate(snapshot):
+            state = JOB_STATE_LABELS.get(progress["state"], progress["state"])
+            if progress["paused"] and progress["state"] not in FINAL_STATES:
+                state += " (pausiert)"
+            if progress["pinned"]:
+                state = "📌 " + state
+            total = progress["chunks_total"] if progress["chunks_total"] is not None else "?"
+            values = [
+                progress["name"], state, f"{progress['chunks_done']} / {total}", str(progress["cards"]),
+                progress["error"] or str(progress["failed"]),
+            ]
+            for column, value in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+        self.export_finished()
+
+    def export_finished(self):
+        """Speichert die Karten jedes abgeschlossenen Auftrags einmalig als Anki-CSV."""
+        for job in list(self.queue.jobs):
+            if job.state not in FINAL_STATES or job.id in self.exported:
+                continue
+            self.exported.add(job.id)
+            cards = job.cards()
+            if not cards:
+                continue
+            os.makedirs(QUEUE_EXPORT_DIR, exist_ok=True)
+            file_path = os.path.join(QUEUE_EXPORT_DIR, f"{os.path.splitext(job.name)[0]}_{job.id}.csv")
+            try:
+                write_csv(file_path, cards)
+                logging.info(f"💾 {len(cards)} Karten aus {job.name} gespeichert: {file_path}")
+            except OSError as e:
+                logging.error(f"❌ Fehler beim Speichern der Karten aus {job.name}: {e}")
+
 class PlainTextEdit(QTextEdit):
     def insertFromMimeData(self, source):
         """Verhindert das Einfügen von formatiertem Text."""
@@ -208,26 +484,36 @@ class PDFProcessingThread(QThread):
     progress_signal = pyqtSignal(int)  # Fortschrittsbalken-Update
     finished_signal = pyqtSignal(list)  # Gibt Chunks zurück
 
-    def __init__(self, file_path, start_page, end_page):
+    def __init__(self, file_path, start_page, end_page, workers=PDF_WORKERS, parser=None):
         super().__init__()
         self.file_path = file_path
         self.start_page = start_page
         self.end_page = end_page
+        self.workers = workers
+        self.parser = parser  # Wiederverwendeter Parser: bereits gelesene Seiten werden nicht neu extrahiert
+        self.skipped_pages = 0  # Seiten ohne Textebene (z. B. gescannte Folien)
 
     def run(self):
-        """Startet die PDF-Verarbeitung im Hintergrund."""
-        parser = PDFParser(self.file_path)
-        _ = parser.extract_text(start_page=self.start_page, end_page=self.end_page)
-        chunks = parser.chunk_text(min_tokens=200, max_tokens=1000)
+        """Startet die PDF-Verarbeitung im Hintergrund (bei Cache-Treffer ohne erneutes Parsing)."""
+        parser = self.parser or PDFParser(self.file_path, workers=self.workers)
+        cache = ParseCache(PARSE_CACHE_DIR, PARSER_VERSION)
+        chunks = parser.parse(
+            start_page=self.start_page, end_page=self.end_page, min_tokens=200, max_tokens=1000, cache=cache
+        )
+        logging.debug(f"Parse-Cache: {cache.stats}, Parser: {parser.stats}")
+        self.skipped_pages = parser.stats.get("skipped_pages", 0)
 
         # Chunks an Hauptthread zurückgeben
         self.finished_signal.emit(chunks)
 
 class QnAProcessingThread(QThread):
     progress_signal = pyqtSignal(int, int)  # Fortschritt (aktuelle Zahl, Gesamtzahl)
+    card_signal = pyqtSignal(dict)  # Einzelne Karte, sobald sie fertig ist (Reihenfolge beliebig)
     finished_signal = pyqtSignal(list)  # Ergebnis als Liste mit Karteikarten
 
-    def __init__(self, chunks, api_type, api_key, prompt, system_prompt=None, tokens_per_question=150):
+    def __init__(self, chunks, api_type, api_key, prompt, system_prompt=None, tokens_per_question=150,
+                 max_in_flight=API_MAX_IN_FLIGHT, bypass_cache=False, pack_chunks=False, streaming=API_STREAMING,
+                 output_format="json", hedging=False, document=None, price_per_1000=None, checkpoint=None):
         super().__init__()
         self.chunks = chunks
         self.api_type = api_type
@@ -235,48 +521,186 @@ class QnAProcessingThread(QThread):
         self.prompt = prompt
         self.system_prompt = system_prompt
         self.tokens_per_question = tokens_per_question
+        self.max_in_flight = max_in_flight
+        self.bypass_cache = bypass_cache  # Antwort-Cache für diesen Lauf nicht lesen (nur neu befüllen)
+        self.pack_chunks = pack_chunks  # Kleine Chunks gebündelt in einer Anfrage senden
+        self.streaming = streaming
+        self.output_format = output_format  # "json" (strukturiert, Regex als Rückfall) oder "text"
+        self.hedging = hedging  # Langsame Anfragen nach p95 doppelt senden, Failover auf den anderen Provider
+        self.failed_chunks = []  # Strukturierte Fehler je Chunk statt Platzhalter-Karten
+        self.document = document or ""  # Dateiname für die Nutzungsdaten je Dokument
+        self.metrics = UsageMetrics(price_per_1000=price_per_1000)  # Tatsächlicher Verbrauch dieses Laufs
+        self.checkpoint = checkpoint  # CheckpointJournal: erledigte Chunks überspringen, neue sofort sichern
+        self.control = JobControl()  # Abbrechen / Pausieren aus der GUI
+        self.cancelled_chunks = []  # Nummern der Chunks, die wegen eines Abbruchs nicht verarbeitet wurden
+        self.input_error = None  # Fehler beim Lesen der Chunks (Pipeline-Modus: Parsing während der Generierung)
 
     def run(self):
         """Startet die QnA-Generierung im Hintergrund."""
-        from nlp.qna_generator import QnAGenerator  # Import hier, um Thread-Probleme zu vermeiden
-        import tiktoken
+        # Import hier, um Thread-Probleme zu vermeiden
+        from nlp.qna_generator import QnAGenerator, iter_packs, questions_for
 
         logging.debug("QnAProcessingThread gestartet.")
-        logging.debug(f"API-Typ: {self.api_type}, Tokens pro Frage: {self.tokens_per_question}")
-
-        qna_generator = QnAGenerator(api_type=self.api_type, api_key=self.api_key)
-
-        enc = tiktoken.get_encoding("cl100k_base")
-        cards = []
-
-        logging.debug(f"Anzahl der Chunks: {len(self.chunks)}")
-
-        for i, chunk in enumerate(self.chunks):
-            token_count = len(enc.encode(chunk))
-            num_questions = max(1, min(token_count // 150, 5))  # Mindestens 1, maximal 5 Fragen
-
-            logging.debug(f"Chunk {i+1}/{len(self.chunks)} - Tokens: {token_count}, Fragen: {num_questions}")
-            self.progress_signal.emit(i + 1, len(self.chunks))  # Fortschritt aktualisieren
-
-            try:
-                qna_pairs = qna_generator.generate_qna_pairs(chunk, num_questions=num_questions)
+        logging.debug(f"API-Typ: {self.api_type}, Tokens pro Frage: {self.tokens_per_question}, "
+                      f"parallele Anfragen: {self.max_in_flight}")
+
+        response_cache = ResponseCache(PARSE_CACHE_DIR)
+        hedging_policy = None
+        if self.hedging:
+            hedging_policy = create_hedging_policy(
+                self.api_type, output_format=self.output_format, system_prompt=self.system_prompt,
+                max_connections=self.max_in_flight, metrics=self.metrics, control=self.control,
+            )
+        qna_generator = QnAGenerator(
+            api_type=self.api_type, api_key=self.api_key,
+            response_cache=response_cache, bypass_cache=self.bypass_cache, output_format=self.output_format,
+            prompt=self.prompt, system_prompt=self.system_prompt, max_connections=self.max_in_flight,
+            hedging_policy=hedging_policy, metrics=self.metrics, control=self.control,
+            **endpoint_options(self.api_type),
+        )
 
-                if not qna_pairs:
-                    logging.warning(f"⚠ Keine Fragen für Chunk {i+1} generiert.")
+        def with_questions(chunks):
+            for chunk in chunks:
+                token_count = tokenizer.count_tokens(chunk)
+                num_questions = questions_for(token_count)  # Mindestens 1, maximal 5 Fragen
+                logging.debug(f"Chunk - Tokens: {token_count}, Fragen: {num_questions}")
+                yield chunk, num_questions
+
+        journal = self.checkpoint
+        cards_by_chunk = {}  # Chunk-Nummer → QnA-Paare
+        resumed = []  # Aus dem Checkpoint-Journal übernommene Chunks
+        numbers = deque()  # Nummern der offenen Chunks in der Reihenfolge, in der sie gepackt werden
+
+        def pending(chunks):
+            """Überspringt Chunks, die laut Checkpoint-Journal bereits mit gleichem Text erledigt sind."""
+            for number, chunk in enumerate(chunks, start=1):
+                done = journal.completed(number, chunk) if journal else None
+                if done is not None:
+                    resumed.append(number)
+                    cards_by_chunk[number] = done
+                    for pair in done:
+                        self.card_signal.emit({"question": pair.get("question", ""), "answer": pair.get("answer", "")})
                     continue
+                numbers.append(number)
+                yield chunk
 
-                for qna in qna_pairs:
-                    question = qna.get("question", "⚠ Fehler: Keine Frage erkannt")
-                    answer = qna.get("answer", "⚠ Fehler: Keine Antwort erkannt")
+        # Jede Anfrage bearbeitet ein Paket aus (Chunk, Fragenanzahl); ohne Packing ist es genau ein Chunk
+        if self.pack_chunks:
+            packs = iter_packs(with_questions(pending(self.chunks)), tokenizer.count_tokens)
+        else:
+            packs = ([item] for item in with_questions(pending(self.chunks)))
 
-                    logging.debug(f"Frage {len(cards) + 1}: {question} | Antwort: {answer}")
-                    cards.append({"question": question, "answer": answer, "selected": True})
+        def numbered(packs):
+            """Versieht jedes Paket mit den Nummern seiner Chunks (Checkpoint und Nutzungsdaten je Chunk)."""
+            for pack in packs:
+                yield tuple(numbers.popleft() for _ in pack), pack
 
-            except Exception as e:
-                logging.error(f"❌ Fehler bei der Verarbeitung von Chunk {i + 1}: {e}")
-                cards.append({"question": "⚠ Fehler", "answer": str(e), "selected": False})
+        cards = []
 
-        logging.info(f"✅ Generierung abgeschlossen: {len(cards)} Karteikarten erstellt.")
+        # Im Pipeline-Modus sind die Chunks ein Generator → Gesamtzahl unbekannt (0)
+        total = len(self.chunks) if hasattr(self.chunks, "__len__") else 0
+        logging.debug(f"Anzahl der Chunks: {total or 'unbekannt (Pipeline)'}")
+        start_time = time.perf_counter()
+
+        def on_progress(completed):
+            self.progress_signal.emit(len(resumed) + completed, total)  # Fortschritt aktualisieren
+
+        first_card_lock = threading.Lock()
+        first_card = []
+
+        def on_card(pair):
+            with first_card_lock:
+                if not first_card:
+                    first_card.append(pair)
+                    logging.info(f"⏱ Erste Karteikarte nach {time.perf_counter() - start_time:.2f} s.")
+            self.card_signal.emit({"question": pair.get("question", ""), "answer": pair.get("answer", "")})
+
+        def generate(item):
+            chunk_numbers, pack = item
+            with usage_metrics.scope(chunks=chunk_numbers, document=self.document):
+                if self.streaming and len(pack) == 1:
+                    chunk, num_questions = pack[0]
+                    results = [qna_generator.generate_qna_pairs_streaming(chunk, num_questions, on_card=on_card)]
+                else:
+                    results = qna_generator.generate_packed(pack)
+                    for qna_pairs in results:
+                        for pair in qna_pairs:
+                            on_card(pair)
+            if journal:
+                # Sofort sichern, nicht erst in Chunk-Reihenfolge: bei einem Absturz geht nichts Fertiges verloren
+                for number, (chunk, _), qna_pairs in zip(chunk_numbers, pack, results):
+                    journal.record(number, chunk, qna_pairs)
+            return results
+
+        engine = GenerationEngine(generate, max_in_flight=self.max_in_flight, control=self.control)
+        for _, (chunk_numbers, pack), results, error in engine.run(numbered(packs), on_progress=on_progress,
+                                                                   weight=lambda item: len(item[1])):
+            if isinstance(error, GenerationCancelled):
+                self.cancelled_chunks.extend(chunk_numbers)
+                continue
+            if error is not None:
+                failure = error.to_dict() if isinstance(error, ProviderError) else {
+                    "type": type(error).__name__, "message": str(error)}
+                for number in chunk_numbers:
+                    self.failed_chunks.append({"chunk": number, **failure})
+                continue
+            cards_by_chunk.update(zip(chunk_numbers, results))
+        self.input_error = engine.input_error
+
+        for number in sorted(cards_by_chunk):
+            qna_pairs = cards_by_chunk[number]
+            if not qna_pairs:
+                logging.warning(f"⚠ Keine Fragen für Chunk {number} generiert.")
+                continue
+
+            for qna in qna_pairs:
+                question = qna.get("question", "⚠ Fehler: Keine Frage erkannt")
+                answer = qna.get("answer", "⚠ Fehler: Keine Antwort erkannt")
+
+                logging.debug(f"Frage {len(cards) + 1}: {question} | Antwort: {answer}")
+                cards.append({"question": question, "answer": answer, "selected": True})
+
+        logging.info(f"✅ Generierung abgeschlossen: {len(cards)} Karteikarten erstellt "
+                     f"in {time.perf_counter() - start_time:.2f} s.")
+        logging.info(f"📨 Anfragen: {qna_generator.stats}")
+        if qna_generator.stats["parse_failures"] or qna_generator.stats["empty_responses"]:
+            logging.warning(
+                f"⚠ Auswertung: {qna_generator.stats['parse_failures']} ungültige JSON-Antworten, "
+                f"{qna_generator.stats['empty_responses']} Antworten ohne Karten "
+                f"bei {qna_generator.stats['requests']} Anfragen."
+            )
+        if qna_generator.stats["hedged_requests"] or qna_generator.stats["failovers"]:
+            logging.info(
+                f"🏁 Hedging: {qna_generator.stats['hedged_requests']} Duplikate "
+                f"({qna_generator.stats['hedge_prompt_tokens']} zusätzliche Prompt-Tokens), "
+                f"{qna_generator.stats['hedge_wins']} davon schneller, {qna_generator.stats['failovers']} Failover."
+            )
+        logging.info(f"⏳ Rate-Limiter: {rate_limiter.all_stats()}")
+        logging.info(f"💾 Antwort-Cache: {response_cache.hit_rate():.0%} Treffer {response_cache.stats}")
+        if self.failed_chunks:
+            logging.warning(f"⚠ {len(self.failed_chunks)} Chunks fehlgeschlagen: {self.failed_chunks}")
+        if resumed:
+            logging.info(f"♻ {len(resumed)} Chunks aus dem Checkpoint übernommen, "
+                         f"{len(cards_by_chunk) - len(resumed)} neu erzeugt.")
+        if self.input_error is not None:
+            logging.error(f"❌ Chunks nach {len(cards_by_chunk)} fertigen nicht mehr lesbar: {self.input_error}")
+        if self.control.cancelled:
+            logging.warning(f"⏹ Lauf abgebrochen: {len(cards_by_chunk)} Chunks fertig, "
+                            f"{len(self.cancelled_chunks)} laufende Chunks verworfen.")
+        if journal:
+            if self.failed_chunks or self.control.cancelled or self.input_error is not None:
+                journal.close()
+                logging.info(f"💾 Checkpoint bleibt erhalten ({journal.path}); fehlende Chunks beim nächsten "
+                             f"Start erneut anfragen.")
+            else:
+                journal.remove()  # Lauf vollständig – nichts mehr fortzusetzen
+        summary = self.metrics.summary()
+        logging.info(f"📈 Verbrauch: {summary['prompt_tokens']} Prompt- + {summary['completion_tokens']} "
+                     f"Antwort-Tokens, {summary['retries']} Wiederholungen, Kosten {summary['cost_usd']} USD.")
+        try:
+            self.metrics.export(METRICS_DIR)
+        except OSError as e:
+            logging.warning(f"⚠ Nutzungsdaten konnten nicht exportiert werden: {e}")
         self.finished_signal.emit(cards)  # Ergebnis zurückgeben
 
 
@@ -353,6 +777,10 @@ class PdfSelectionPage(QWidget):
 
         content_layout.addWidget(self.page_section)
 
+        # Pipeline-Modus: Karteikarten schon während des Parsens erzeugen
+        self.pipeline_checkbox = QCheckBox("Pipeline: Karteikarten direkt während des Parsens erzeugen (ohne Chunk-Prüfung)")
+        content_layout.addWidget(self.pipeline_checkbox, alignment=Qt.AlignmentFlag.AlignCenter)
+
         # Fortschrittsbalken
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
@@ -381,11 +809,26 @@ class PdfSelectionPage(QWidget):
             self.start_page_input.setText("1")
             self.end_page_input.setText(str(total_pages))
 
+    def page_range(self):
+        """Gibt den eingegebenen Seitenbereich als (Startseite, Endseite) zurück."""
+        return int(self.start_page_input.text()), int(self.end_page_input.text())
+
+    def create_parser(self):
+        """Erstellt einen PDFParser für die ausgewählte Datei."""
+        return PDFParser(
+            self.selected_file,
+            workers=PDF_WORKERS,
+            extraction_mode=PDF_EXTRACTION_MODE,
+            spill_dir=PAGE_CACHE_SPILL_DIR,
+            max_pages_in_memory=PAGE_CACHE_MAX_PAGES,
+        )
+
 class ChunkEditingPage(QWidget):
     def __init__(self, wizard):
         super().__init__()
         self.wizard = wizard
         self.processing_thread = None
+        self.parser = None  # Bleibt für dieselbe Datei erhalten, damit Bereichsänderungen inkrementell sind
         self.selected_chunks_label = QLabel("0 von 0 Chunks ausgewählt")
 
         # Lade-Label
@@ -432,7 +875,10 @@ class ChunkEditingPage(QWidget):
             self.processing_thread.wait()
             self.processing_thread = None
 
-        self.processing_thread = PDFProcessingThread(selected_file, start_page, end_page)
+        if self.parser is None or self.parser.file_path != selected_file:
+            self.parser = self.wizard.selection_page.create_parser()
+
+        self.processing_thread = PDFProcessingThread(selected_file, start_page, end_page, parser=self.parser)
         self.processing_thread.finished_signal.connect(self.on_processing_finished)
         self.processing_thread.start()
 
@@ -445,7 +891,11 @@ class ChunkEditingPage(QWidget):
             return
 
         self.wizard.chunks = chunks
-        self.label.setText(f"✅ Es wurden {len(chunks)} Chunks erzeugt.")
+        message = f"✅ Es wurden {len(chunks)} Chunks erzeugt."
+        skipped = self.processing_thread.skipped_pages
+        if skipped:
+            message += f" ⚠ {skipped} Seiten ohne Text (z. B. Bilder) wurden übersprungen."
+        self.label.setText(message)
 
         # Scroll-Bereich
         scroll_area = QScrollArea()
@@ -574,6 +1024,27 @@ class ApiSelectionPage(QWidget):
         token_layout.addWidget(self.token_input)
         layout.addLayout(token_layout)
 
+        # Antwort-Cache: unveränderte Chunks werden sonst ohne API-Aufruf beantwortet
+        self.bypass_cache_checkbox = QCheckBox("Antwort-Cache ignorieren (offene Chunks neu anfragen)")
+        layout.addWidget(self.bypass_cache_checkbox)
+
+        # Checkpoint: ein unterbrochener Lauf wird sonst fortgesetzt (unabhängig vom Antwort-Cache)
+        self.restart_checkbox = QCheckBox("Von vorne beginnen (unterbrochenen Lauf verwerfen)")
+        layout.addWidget(self.restart_checkbox)
+
+        # Packing: mehrere kleine Chunks teilen sich eine Anfrage (weniger Anfragen und Prompt-Tokens)
+        self.pack_chunks_checkbox = QCheckBox("Kleine Chunks bündeln (weniger API-Anfragen)")
+        layout.addWidget(self.pack_chunks_checkbox)
+
+        # Strukturierte Ausgabe: JSON-Modus der Provider statt freiem "Frage:/Antwort:"-Text
+        self.json_output_checkbox = QCheckBox("Strukturierte Ausgabe (JSON)")
+        self.json_output_checkbox.setChecked(True)
+        layout.addWidget(self.json_output_checkbox)
+
+        # Hedging: Anfragen, die länger als das beobachtete p95 dauern, werden ein zweites Mal gesendet
+        self.hedging_checkbox = QCheckBox("Langsame Anfragen doppelt senden (schneller, etwas teurer, ohne Streaming)")
+        layout.addWidget(self.hedging_checkbox)
+
         # Kosten pro 1000 Tokens (manuell einstellbar)
         self.cost_label = QLabel("Kosten pro 1000 Tokens (USD):")
         self.cost_input = QDoubleSpinBox()
@@ -593,6 +1064,21 @@ class ApiSelectionPage(QWidget):
         self.estimated_cost_label.setStyleSheet("color: red; font-weight: bold;")
         layout.addWidget(self.estimated_cost_label)
 
+        # Tatsächliche Kosten des letzten Laufs (vom Provider gemeldete Tokens)
+        self.actual_cost_label = QLabel("Tatsächliche Kosten (letzter Lauf): –")
+        layout.addWidget(self.actual_cost_label)
+        self.estimated_cost = None
+
+        # Mehrere Dokumente: statt sofort zu starten die PDF mit diesen Einstellungen einreihen
+        queue_layout = QHBoxLayout()
+        self.enqueue_button = QPushButton("📋 In Warteschlange einreihen")
+        self.enqueue_button.clicked.connect(self.wizard.enqueue_document)
+        self.pin_job_checkbox = QCheckBox("Dringend (vor allen anderen)")
+        queue_layout.addWidget(self.enqueue_button)
+        queue_layout.addWidget(self.pin_job_checkbox)
+        queue_layout.addStretch()
+        layout.addLayout(queue_layout)
+
         # Signale verbinden
         self.openai_radio.toggled.connect(self.update_ui)
         self.gemini_radio.toggled.connect(self.update_ui)
@@ -613,11 +1099,13 @@ class ApiSelectionPage(QWidget):
             self.system_prompt_edit.setVisible(False)
             self.estimated_cost_label.setText("Geschätzte Kosten: Keine")
             self.cost_input.setEnabled(False)  # Kostenfeld ausgrauen
+            self.enqueue_button.setEnabled(False)  # Warteschlange nur mit API
         else:
             self.api_key_input.setEnabled(True)
             self.api_key_input.setPlaceholderText("API-Schlüssel hier eingeben")
             self.estimated_cost_label.setText("Geschätzte Kosten: 0.00 USD")
             self.cost_input.setEnabled(True)  # Kostenfeld aktivieren
+            self.enqueue_button.setEnabled(True)
 
         if self.openai_radio.isChecked():
             self.system_prompt_label.setVisible(True)
@@ -633,62 +1121,52 @@ class ApiSelectionPage(QWidget):
         """Berechnet die geschätzten Kosten basierend auf den Chunks, Token-Anzahl und API-Kosten."""
         if self.manual_radio.isChecked():
             self.estimated_cost_label.setText("Geschätzte Kosten: Keine")
+            self.estimated_cost = None
+            return
+        if self.wizard.selection_page.pipeline_checkbox.isChecked():
+            # Im Pipeline-Modus entstehen die Chunks erst während der Generierung
+            self.estimated_cost_label.setText("Geschätzte Kosten: im Pipeline-Modus nicht vorab bekannt "
+                                              "(laufende Kosten in der Fortschrittsanzeige)")
+            self.estimated_cost = None
             return
 
         cost_per_1000_tokens = self.cost_input.value()  # Nutzer kann Preis anpassen
         tokens_per_question = self.token_input.value()
 
-        enc = tiktoken.get_encoding("cl100k_base")  # Tokenizer für OpenAI
-
-        # Berechnung der Tokens aus den ausgewählten Chunks
-        total_chunk_tokens = sum(len(enc.encode(chunk)) for chunk in self.wizard.chunks)
+        # Berechnung der Tokens aus den ausgewählten Chunks (gemeinsamer Tokenizer mit Cache)
+        total_chunk_tokens = sum(tokenizer.count_many(self.wizard.chunks))
 
         # Berechnung der Tokens aus den Prompts
-        prompt_tokens = len(enc.encode(self.dynamic_prompt_edit.toPlainText()))
+        prompt_tokens = tokenizer.count_tokens(self.dynamic_prompt_edit.toPlainText())
         if self.openai_radio.isChecked():
-            prompt_tokens += len(enc.encode(self.system_prompt_edit.toPlainText()))  # OpenAI hat System Message
+            prompt_tokens += tokenizer.count_tokens(self.system_prompt_edit.toPlainText())  # OpenAI hat System Message
 
         # Gesamttokens berechnen (inkl. Fragen)
         total_tokens = total_chunk_tokens + (tokens_per_question * len(self.wizard.chunks)) + prompt_tokens
         estimated_cost = (total_tokens / 1000) * cost_per_1000_tokens
+        self.estimated_cost = estimated_cost
 
         self.estimated_cost_label.setText(f"Geschätzte Kosten: {estimated_cost:.4f} USD")
 
     def load_prompts(self):
-        """Lädt die Standard-Prompts aus den JSON-Dateien je nach API-Auswahl."""
-        prompt_path = "data/prompts"
+        """Lädt die Standard-Prompts je nach API-Auswahl (über die Prompt-Registry, nur bei Änderung neu gelesen)."""
+        registry = prompt_registry.get_registry()
+        api_type = "openai" if self.openai_radio.isChecked() else "gemini" if self.gemini_radio.isChecked() else "manual"
 
-        if self.openai_radio.isChecked():
-            system_prompt_file = os.path.join(prompt_path, "system_message.json")
-            dynamic_prompt_file = os.path.join(prompt_path, "dynamic_prompt_openai.json")
-
-            self.system_prompt_edit.setText(self.load_json(system_prompt_file))
-            self.dynamic_prompt_edit.setText(self.load_json(dynamic_prompt_file))
-
-        elif self.gemini_radio.isChecked():
-            dynamic_prompt_file = os.path.join(prompt_path, "dynamic_prompt_gemini.json")
-            self.system_prompt_edit.setText("")
-            self.dynamic_prompt_edit.setText(self.load_json(dynamic_prompt_file))
-
-        elif self.manual_radio.isChecked():
-            dynamic_prompt_file = os.path.join(prompt_path, "dynamic_prompt_manual.json")
-            self.system_prompt_edit.setText("")
-            self.dynamic_prompt_edit.setText(self.load_json(dynamic_prompt_file))
-
-    def load_json(self, file_path):
-        """Lädt JSON-Datei und gibt den richtigen Inhalt als String zurück."""
-        try:
-            with open(file_path, "r", encoding="utf-8") as file:
-                data = json.load(file)
+        system_prompt = registry.system_message() if api_type == "openai" else ""
+        dynamic_prompt = registry.text(f"dynamic_prompt_{api_type}")
+        self.system_prompt_edit.setText(PROMPT_LOAD_ERROR if system_prompt is None else system_prompt)
+        self.dynamic_prompt_edit.setText(PROMPT_LOAD_ERROR if dynamic_prompt is None else dynamic_prompt)
 
-                if "system_message" in file_path:
-                    return data.get("content", "")
+    def selected_prompts(self):
+        """Gibt (prompt, system_prompt) aus den Eingabefeldern zurück; leere oder fehlerhafte Felder als None."""
+        def text(edit):
+            value = edit.toPlainText().strip()
+            return None if not value or value == PROMPT_LOAD_ERROR else edit.toPlainText()
 
-                return data.get("template", "")
+        system_prompt = text(self.system_prompt_edit) if self.openai_radio.isChecked() else None
+        return text(self.dynamic_prompt_edit), system_prompt
 
-        except (FileNotFoundError, json.JSONDecodeError):
-            return "⚠ Fehler beim Laden des Prompts"
-        
     def show_cost_warning(self):
         """Zeigt eine Warnung an, wenn eine API mit Kosten genutzt wird."""
         if self.manual_radio.isChecked():
@@ -772,12 +1250,10 @@ class ManualProcessingPage(QWidget):
                 prompt = self.edited_prompts[index]
             else:
                 chunk = self.wizard.chunks[index]
-                prompt_template = self.wizard.qna_generator.load_dynamic_prompt()
-                enc = tiktoken.get_encoding("cl100k_base")
-                token_count = len(enc.encode(chunk))
+                token_count = tokenizer.count_tokens(chunk)
                 tokens_per_question = self.wizard.api_page.token_input.value()
                 num_questions = max(1, token_count // tokens_per_question)
-                prompt = prompt_template.format(chunk=chunk, num_questions=num_questions)
+                prompt = self.wizard.qna_generator.render_prompt(chunk, num_questions)
 
             self.prompt_edit.setText(prompt)
 
@@ -859,6 +1335,7 @@ class APIProcessingPage(QWidget):
         super().__init__()
         self.wizard = wizard
         self.processing_thread = None  # Hintergrundprozess für die QnA-Erstellung
+        self.card_count = 0  # Bereits gestreamte Karten des laufenden Durchgangs
 
         # Ladeanimation
         self.label = QLabel("Karteikarten werden generiert...")
@@ -874,12 +1351,25 @@ class APIProcessingPage(QWidget):
         self.progress_label = QLabel("")
         self.progress_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
+        # Pausieren / Abbrechen: keine neuen Anfragen mehr, bisherige Karten bleiben erhalten
+        self.pause_button = QPushButton("⏸ Pausieren")
+        self.pause_button.clicked.connect(self.toggle_pause)
+        self.stop_button = QPushButton("⏹ Abbrechen und Ergebnisse übernehmen")
+        self.stop_button.clicked.connect(self.stop_processing)
+        control_layout = QHBoxLayout()
+        control_layout.addStretch()
+        control_layout.addWidget(self.pause_button)
+        control_layout.addWidget(self.stop_button)
+        control_layout.addStretch()
+
         # Layout
         layout = QVBoxLayout()
         layout.addWidget(self.label)
         layout.addWidget(self.spinner_label)
         layout.addWidget(self.progress_label)
+        layout.addLayout(control_layout)
         self.setLayout(layout)
+        self.set_controls_enabled(False)
 
     def initializePage(self):
         """Startet die Verarbeitung der Chunks über API."""
@@ -892,27 +1382,115 @@ class APIProcessingPage(QWidget):
 
         # API-Daten abrufen
         chunks = self.wizard.chunks
+        if self.wizard.selection_page.pipeline_checkbox.isChecked():
+            # Pipeline-Modus: Chunks werden seitenweise geparst und sofort verarbeitet
+            chunks = self.wizard.selection_page.create_parser().iter_chunks(*self.wizard.selection_page.page_range())
         api_type = "openai" if self.wizard.api_page.openai_radio.isChecked() else "gemini"
         api_key = self.wizard.api_page.api_key_input.text()
-        prompt = self.wizard.api_page.dynamic_prompt_edit.toPlainText()
-        system_prompt = self.wizard.api_page.system_prompt_edit.toPlainText() if api_type == "openai" else None
+        prompt, system_prompt = self.wizard.api_page.selected_prompts()
         tokens_per_question = self.wizard.api_page.token_input.value()
+        bypass_cache = self.wizard.api_page.bypass_cache_checkbox.isChecked()
+        restart = self.wizard.api_page.restart_checkbox.isChecked()
+        pack_chunks = self.wizard.api_page.pack_chunks_checkbox.isChecked()
+        output_format = "json" if self.wizard.api_page.json_output_checkbox.isChecked() else "text"
+        hedging = self.wizard.api_page.hedging_checkbox.isChecked()
+        selected_file = self.wizard.selection_page.selected_file
+        document = os.path.basename(selected_file) if selected_file else None
+        price_per_1000 = self.wizard.api_page.cost_input.value()
+        settings = {
+            "api_type": api_type, "model": endpoint_options(api_type).get("model"), "prompt": prompt,
+            "system_prompt": system_prompt, "output_format": output_format,
+        }
+        journal = self.open_checkpoint(settings, restart=restart)
 
         logging.debug(f"API: {api_type}, Tokens/Frage: {tokens_per_question}, API-Key: {'Ja' if api_key else 'Nein'}")
-        logging.debug(f"Chunks zum Verarbeiten: {len(chunks)}")
+        logging.debug(f"Chunks zum Verarbeiten: {len(chunks) if isinstance(chunks, list) else 'Pipeline'}")
 
         # Thread starten
         self.processing_thread = QnAProcessingThread(
-            chunks, api_type, api_key, prompt, system_prompt, tokens_per_question
+            chunks, api_type, api_key, prompt, system_prompt, tokens_per_question,
+            bypass_cache=bypass_cache, pack_chunks=pack_chunks, output_format=output_format, hedging=hedging,
+            document=document, price_per_1000=price_per_1000, checkpoint=journal,
         )
         self.processing_thread.progress_signal.connect(self.update_progress)
+        self.processing_thread.card_signal.connect(self.on_card)
+        self.card_count = 0
         self.processing_thread.finished_signal.connect(self.on_processing_finished)
+        self.pause_button.setText("⏸ Pausieren")
+        self.set_controls_enabled(True)
         self.processing_thread.start()
 
+    def set_controls_enabled(self, enabled):
+        self.pause_button.setEnabled(enabled)
+        self.stop_button.setEnabled(enabled)
+
+    def toggle_pause(self):
+        """Pausiert den Lauf (laufende Anfragen werden noch beendet) bzw. setzt ihn fort."""
+        control = self.processing_thread.control
+        if control.paused:
+            control.resume()
+            self.pause_button.setText("⏸ Pausieren")
+            self.label.setText("⏳ Karteikarten werden generiert...")
+        else:
+            control.pause()
+            self.pause_button.setText("▶ Fortsetzen")
+            self.label.setText("⏸ Pausiert – laufende Anfragen werden noch beendet.")
+
+    def stop_processing(self):
+        """Bricht den Lauf ab: keine neuen Anfragen, laufende Streams werden geschlossen."""
+        if self.processing_thread and self.processing_thread.isRunning():
+            self.processing_thread.control.cancel()
+            self.set_controls_enabled(False)
+            self.label.setText("⏹ Wird abgebrochen – bisherige Karteikarten werden übernommen...")
+
+    def open_checkpoint(self, settings, restart=False):
+        """
+        Öffnet das Checkpoint-Journal für Dokument, Seitenbereich und Prompt-Einstellungen.
+        restart: bereits erledigte Chunks verwerfen („Von vorne beginnen“); der Antwort-Cache ist davon unabhängig.
+        """
+        selection = self.wizard.selection_page
+        if not selection.selected_file:
+            return None
+        try:
+            checkpoint.prune(CHECKPOINT_DIR)
+            document = {"file": file_hash(selection.selected_file), "pages": list(selection.page_range())}
+            journal = CheckpointJournal.for_job(CHECKPOINT_DIR, document, settings)
+        except OSError as e:
+            logging.warning(f"⚠ Checkpoint-Journal nicht verfügbar, Lauf ohne Fortsetzungsmöglichkeit: {e}")
+            return None
+        if restart:
+            journal.reset()
+        elif journal.entries:
+            logging.info(f"♻ Unterbrochener Lauf gefunden: {len(journal.entries)} Chunks bereits erledigt.")
+        return journal
+
     def update_progress(self, current, total):
         """Aktualisiert die Fortschrittsanzeige."""
         logging.debug(f"Fortschritt: {current}/{total} verarbeitet.")
-        self.progress_label.setText(f"{current} von {total} Chunks verarbeitet...")
+        if total:
+            text = f"{current} von {total} Chunks verarbeitet"
+        else:
+            text = f"{current} Chunks verarbeitet (PDF wird parallel gelesen)"
+        cost = self.processing_thread.metrics.summary()["cost_usd"] if self.processing_thread else None
+        if cost is not None:
+            text += f" – bisher {cost:.4f} USD"  # Bei einem unpassenden Prompt früh abbrechen
+        self.progress_label.setText(text + "...")
+
+    def on_card(self, card):
+        """Zeigt jede fertige Karte sofort an, noch bevor der zugehörige Chunk abgeschlossen ist."""
+        self.card_count += 1
+        self.label.setText(f"⏳ {self.card_count} Karteikarten – zuletzt: {card['question'][:80]}")
+
+    def show_actual_cost(self, summary):
+        """Zeigt die Kosten laut gemeldeten Tokens neben der Schätzung an (hier und auf der API-Seite)."""
+        text = (f"Tatsächliche Kosten (letzter Lauf): {summary['cost_usd'] or 0:.4f} USD "
+                f"({summary['prompt_tokens'] + summary['completion_tokens']} Tokens, "
+                f"{summary['cache_hits']} aus dem Cache)")
+        estimated = self.wizard.api_page.estimated_cost
+        if estimated is not None:
+            text += f" – geschätzt: {estimated:.4f} USD"
+        self.progress_label.setText(text)
+        self.wizard.api_page.actual_cost_label.setText(text)
 
     def on_processing_finished(self, cards):
         """Verarbeitung abgeschlossen – Weiterleitung zur SummaryPage."""
@@ -920,7 +1498,28 @@ class APIProcessingPage(QWidget):
 
         self.spinner_movie.stop()
         self.spinner_label.setVisible(False)
+        self.set_controls_enabled(False)
         self.label.setText("✅ Karteikarten wurden generiert.")
+        if self.processing_thread and self.processing_thread.control.cancelled:
+            self.label.setText(f"⏹ Abgebrochen – {len(cards)} Karteikarten bis dahin übernommen.")
+        if self.processing_thread:
+            self.show_actual_cost(self.processing_thread.metrics.summary())
+
+        input_error = self.processing_thread.input_error if self.processing_thread else None
+        if input_error is not None:
+            QMessageBox.warning(
+                self, "Fehler",
+                f"Das PDF konnte nicht vollständig gelesen werden:\n{input_error}\n"
+                f"Die bis dahin erzeugten Karten werden übernommen.",
+            )
+
+        failed = self.processing_thread.failed_chunks if self.processing_thread else []
+        if failed:
+            details = "\n".join(f"Chunk {f['chunk']}: {f['message']}" for f in failed[:5])
+            QMessageBox.warning(
+                self, "Fehler",
+                f"{len(failed)} Chunks konnten nicht verarbeitet werden:\n{details}",
+            )
 
         if not cards:
             logging.warning("⚠ Keine Karteikarten generiert!")
@@ -1084,10 +1683,7 @@ class SummaryPage(QWidget):
         if not file_path:
             return
 
-        with open(file_path, "w", newline="", encoding="utf-8") as file:
-            writer = csv.writer(file, delimiter="\t")
-            for card in self.wizard.cards:
-                writer.writerow([card["question"], card["answer"]])
+        write_csv(file_path, self.wizard.cards)
 
         QMessageBox.information(self, "Speichern erfolgreich", "Die Karteikarten wurden als CSV gespeichert.")
 
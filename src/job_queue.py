@@ -0,0 +1,318 @@
+"""
+Warteschlange für mehrere Dokumente (z. B. alle Skripte eines Semesters)
+- Jeder Auftrag (Job): PDF, Seitenbereich und eigene Prompt-Einstellungen
+- Alle Aufträge teilen sich einen Worker-Pool für Parsing und API-Anfragen; die Rate-Limits je Provider
+  und Modell sind ohnehin prozessweit gemeinsam (nlp.rate_limiter)
+- Reihenfolge: angeheftete Aufträge zuerst, dann der Auftrag mit den wenigsten offenen Chunks ("sjf",
+  schnelle Rückmeldung) oder in Einreihungsreihenfolge ("fifo"); vergeben wird jeder freie Platz einzeln
+- Fertige Chunks landen im Checkpoint-Journal des Auftrags, Abbruch und Pause je Auftrag über JobControl
+- Warteschlangentiefe und Fortschritt je Auftrag über depth() und snapshot()
+"""
+
+import itertools
+import logging
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from nlp import metrics as usage_metrics
+from nlp import tokenizer
+from nlp.checkpoint import CheckpointJournal
+from nlp.generation_engine import GenerationCancelled, JobControl
+from nlp.metrics import UsageMetrics
+from nlp.qna_generator import QnAGenerator, questions_for
+from nlp.retry import ProviderError
+from pdf_parser.parse_cache import file_hash
+from pdf_parser.pdf_parser import PDFParser
+
+DEFAULT_MAX_WORKERS = 4
+POLICIES = ("sjf", "fifo")
+
+QUEUED = "queued"
+PARSING = "parsing"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"  # PDF nicht lesbar bzw. Generator nicht erzeugbar; einzelne Chunk-Fehler stehen in failed_chunks
+CANCELLED = "cancelled"
+FINAL_STATES = (DONE, FAILED, CANCELLED)
+
+_job_ids = itertools.count(1)
+
+
+class Job:
+    def __init__(self, file_path, start_page=1, end_page=None, settings=None, pinned=False, name=None):
+        """
+        file_path / start_page / end_page: PDF und Seitenbereich (end_page=None: bis zum Ende).
+        settings: Optionen für QnAGenerator (api_type, api_key, prompt, system_prompt, output_format, ...).
+        pinned: dringender Auftrag, der vor allen anderen bearbeitet wird.
+        """
+        self.id = next(_job_ids)
+        self.file_path = file_path
+        self.start_page = start_page
+        self.end_page = end_page
+        self.settings = dict(settings or {})
+        self.pinned = pinned
+        self.name = name or os.path.basename(file_path)
+        self.state = QUEUED
+        self.control = JobControl()
+        self.chunks = None  # Nach dem Parsen: Liste der Chunks
+        self.pending = deque()  # Nummern der noch nicht gestarteten Chunks
+        self.running = 0  # Arbeitseinheiten dieses Auftrags im Pool
+        self.results = {}  # Chunk-Nummer → QnA-Paare
+        self.failed_chunks = []
+        self.resumed = 0  # Aus dem Checkpoint-Journal übernommene Chunks
+        self.error = None
+        self.generator = None
+        self.journal = None
+
+    def remaining(self):
+        """Offene Arbeit in Chunks; vor dem Parsen über die Seitenzahl geschätzt (ohne Endseite: unbekannt)."""
+        if self.chunks is None:
+            if self.end_page is None:
+                return float("inf")
+            return self.end_page - self.start_page + 1
+        return len(self.pending) + self.running
+
+    def cards(self):
+        """Alle bisher erzeugten Karten in Chunk-Reihenfolge."""
+        return [
+            {"question": qna.get("question", ""), "answer": qna.get("answer", ""), "selected": True}
+            for number in sorted(self.results) for qna in self.results[number]
+        ]
+
+    def progress(self):
+        return {
+            "id": self.id, "name": self.name, "state": self.state, "pinned": self.pinned,
+            "paused": self.control.paused,
+            "chunks_total": len(self.chunks) if self.chunks is not None else None,
+            "chunks_done": len(self.results) + len(self.failed_chunks),
+            "cards": sum(len(qna_pairs) for qna_pairs in self.results.values()),
+            "failed": len(self.failed_chunks), "resumed": self.resumed,
+            "error": str(self.error) if self.error is not None else None,
+        }
+
+
+class JobQueue:
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, policy="sjf", parse_cache=None, response_cache=None,
+                 checkpoint_dir=None, metrics=None, parse=None, count_tokens=None, on_update=None, streaming=False):
+        """
+        max_workers: Größe des gemeinsamen Pools (gleichzeitiges Parsen und gleichzeitige API-Anfragen).
+        policy: "sjf" (wenigste offene Chunks zuerst) oder "fifo".
+        parse_cache / response_cache / checkpoint_dir: gemeinsame Caches und Verzeichnis der Checkpoint-Journale.
+        metrics: gemeinsames UsageMetrics; die Auswertung je Auftrag liefert by_document().
+        parse(job): liefert die Chunks eines Auftrags (Standard: PDFParser.parse mit parse_cache).
+        on_update(job): wird nach jeder fertigen Arbeitseinheit aufgerufen (aus einem Worker-Thread).
+        streaming: Antworten wie im Einzel-Lauf streamen; der Stream endet, sobald alle Karten eines Chunks da sind.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unbekannte Reihenfolge: {policy}")
+        self.max_workers = max(1, int(max_workers))
+        self.policy = policy
+        self.parse_cache = parse_cache
+        self.response_cache = response_cache
+        self.checkpoint_dir = checkpoint_dir
+        self.metrics = metrics if metrics is not None else UsageMetrics()
+        self.parse = parse or self.parse_pdf
+        self.count_tokens = count_tokens or tokenizer.count_tokens
+        self.on_update = on_update
+        self.streaming = streaming
+        self.jobs = []
+        self._in_flight = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        self._dispatcher = threading.Thread(target=self._dispatch, name="job-queue", daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, job):
+        """Reiht einen Auftrag ein und gibt ihn zurück."""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Die Warteschlange ist geschlossen.")
+            self.jobs.append(job)
+            self._condition.notify_all()
+        logging.info(f"📋 Auftrag {job.id} eingereiht: {job.name} (Seiten {job.start_page}–{job.end_page or 'Ende'})")
+        return job
+
+    def pin(self, job, pinned=True):
+        """Angeheftete Aufträge bekommen jeden freien Platz vor allen anderen."""
+        with self._condition:
+            job.pinned = pinned
+            self._condition.notify_all()
+
+    def pause(self, job):
+        job.control.pause()
+
+    def resume(self, job):
+        with self._condition:
+            job.control.resume()
+            self._condition.notify_all()
+
+    def cancel(self, job):
+        """Bricht einen Auftrag ab; bereits erzeugte Karten bleiben am Auftrag erhalten."""
+        job.control.cancel()
+        with self._condition:
+            if job.state not in FINAL_STATES and job.running == 0:
+                self._finish(job)
+            self._condition.notify_all()
+
+    def depth(self):
+        """Anzahl der Aufträge, die noch nicht abgeschlossen sind."""
+        with self._condition:
+            return sum(1 for job in self.jobs if job.state not in FINAL_STATES)
+
+    def snapshot(self):
+        """Fortschritt aller Aufträge (Liste von Dicts, in Einreihungsreihenfolge)."""
+        with self._condition:
+            return [job.progress() for job in self.jobs]
+
+    def wait(self, timeout=None):
+        """Wartet, bis alle eingereihten Aufträge abgeschlossen sind; False bei Zeitüberschreitung."""
+        with self._condition:
+            return self._condition.wait_for(lambda: all(job.state in FINAL_STATES for job in self.jobs), timeout)
+
+    def close(self):
+        """Bricht alle offenen Aufträge ab und beendet den Pool (laufende Anfragen werden nicht abgewartet)."""
+        with self._condition:
+            self._closed = True
+            jobs = [job for job in self.jobs if job.state not in FINAL_STATES]
+            self._condition.notify_all()
+        for job in jobs:
+            job.control.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def parse_pdf(self, job):
+        # Ohne chunks.txt: parallel parsende Aufträge würden sich die Datei gegenseitig überschreiben
+        parser = PDFParser(job.file_path, output_file=None)
+        return parser.parse(start_page=job.start_page, end_page=job.end_page, cache=self.parse_cache)
+
+    def create_generator(self, job):
+        options = {"output_format": "json", **job.settings}
+        return QnAGenerator(response_cache=self.response_cache, max_connections=self.max_workers,
+                            metrics=self.metrics, control=job.control, **options)
+
+    def _priority(self, job):
+        return (not job.pinned, job.remaining() if self.policy == "sjf" else 0, job.id)
+
+    def _next_unit(self):
+        """Wählt die nächste Arbeitseinheit (Parsen bzw. ein Chunk) des dringendsten Auftrags."""
+        candidates = [
+            job for job in self.jobs
+            if job.state not in FINAL_STATES and not job.control.paused and not job.control.cancelled
+            and (job.pending if job.chunks is not None else job.state == QUEUED)
+        ]
+        if not candidates:
+            return None
+        job = min(candidates, key=self._priority)
+        job.running += 1
+        if job.chunks is None:
+            job.state = PARSING
+            return self._parse_job, job
+        return self._generate_chunk, job, job.pending.popleft()
+
+    def _dispatch(self):
+        with self._condition:
+            while not self._closed:
+                while self._in_flight < self.max_workers:
+                    unit = self._next_unit()
+                    if unit is None:
+                        break
+                    self._in_flight += 1
+                    self._executor.submit(self._run, *unit)
+                self._condition.wait()
+
+    def _run(self, function, job, *args):
+        try:
+            function(job, *args)
+        except Exception as e:
+            logging.exception(f"❌ Auftrag {job.id} ({job.name}): unerwarteter Fehler: {e}")
+            with self._condition:
+                job.error = job.error or e
+                job.pending.clear()
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                job.running -= 1
+                finished = job.control.cancelled or (job.chunks is not None and not job.pending)
+                if job.state not in FINAL_STATES and job.running == 0 and finished:
+                    self._finish(job)
+                self._condition.notify_all()
+        if self.on_update:
+            self.on_update(job)
+
+    def _parse_job(self, job):
+        try:
+            chunks = self.parse(job)
+            generator = self.create_generator(job)
+        except Exception as e:
+            logging.error(f"❌ Auftrag {job.id} ({job.name}) kann nicht bearbeitet werden: {e}")
+            with self._condition:
+                job.error = e
+                job.chunks = []
+            return
+        journal = self._open_journal(job)
+
+        with self._condition:
+            job.chunks = chunks
+            job.generator = generator
+            job.journal = journal
+            for number, chunk in enumerate(chunks, start=1):
+                done = journal.completed(number, chunk) if journal else None
+                if done is None:
+                    job.pending.append(number)
+                else:
+                    job.results[number] = done
+                    job.resumed += 1
+            job.state = RUNNING
+        logging.info(f"📋 Auftrag {job.id} ({job.name}): {len(chunks)} Chunks, davon {job.resumed} aus dem Checkpoint.")
+
+    def _open_journal(self, job):
+        if self.checkpoint_dir is None:
+            return None
+        settings = {name: value for name, value in job.settings.items() if name != "api_key"}
+        try:
+            document = {"file": file_hash(job.file_path), "pages": [job.start_page, job.end_page]}
+            return CheckpointJournal.for_job(self.checkpoint_dir, document, settings)
+        except OSError as e:
+            logging.warning(f"⚠ Auftrag {job.id}: Checkpoint-Journal nicht verfügbar: {e}")
+            return None
+
+    def _generate_chunk(self, job, number):
+        chunk = job.chunks[number - 1]
+        try:
+            generator = job.generator
+            generate = generator.generate_qna_pairs_streaming if self.streaming else generator.generate_qna_pairs
+            with usage_metrics.scope(chunks=(number,), document=job.name):
+                qna_pairs = generate(chunk, questions_for(self.count_tokens(chunk)))
+        except GenerationCancelled:
+            return
+        except Exception as e:
+            failure = e.to_dict() if isinstance(e, ProviderError) else {"type": type(e).__name__, "message": str(e)}
+            logging.error(f"❌ Auftrag {job.id} ({job.name}), Chunk {number}: {e}")
+            with self._condition:
+                job.failed_chunks.append({"chunk": number, **failure})
+            return
+
+        if job.journal:
+            job.journal.record(number, chunk, qna_pairs)
+        with self._condition:
+            job.results[number] = qna_pairs
+
+    def _finish(self, job):
+        """Schließt einen Auftrag ab (unter self._condition aufrufen)."""
+        if job.error is not None:
+            job.state = FAILED
+        elif job.control.cancelled:
+            job.state = CANCELLED
+        else:
+            job.state = DONE
+        if job.journal:
+            if job.state == DONE and not job.failed_chunks:
+                job.journal.remove()  # Vollständig – nichts mehr fortzusetzen
+            else:
+                job.journal.close()
+        progress = job.progress()
+        logging.info(f"📋 Auftrag {job.id} ({job.name}): {job.state}, {progress['cards']} Karten, "
+                     f"{progress['failed']} Chunks fehlgeschlagen.")
+        self._condition.notify_all()
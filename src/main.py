@@ -1,12 +1,18 @@
+import multiprocessing
 import sys
 from PyQt6.QtWidgets import QApplication
 from gui import Stepper
+from nlp import hedging, providers, tokenizer
 
 def main():
+    tokenizer.preload()  # Tokenizer im Hintergrund laden, während die GUI startet
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(providers.close_clients)  # Offene Keep-Alive-Verbindungen sauber schließen
+    app.aboutToQuit.connect(hedging.shutdown)  # Gemeinsamer Thread-Pool des Hedgings
     window = Stepper()
     window.show()
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Prozess-Pool der PDF-Extraktion in gebündelten Builds
     main()
@@ -0,0 +1,82 @@
+"""
+Validierender Parser für strukturierte Modellantworten (JSON-Modus)
+- Akzeptiert das Schema aus docs/api.md: [{"question": ..., "answer": ...}]
+  sowie dasselbe Array unter "cards" (OpenAI verlangt im JSON-Modus ein Objekt auf oberster Ebene)
+- Ein Durchlauf: json.loads plus Prüfung jedes Eintrags, keine Regex über den Text
+- Ungültige Antworten lösen CardFormatError aus; der Aufrufer entscheidet über den Rückfall
+"""
+
+import json
+
+JSON_INSTRUCTIONS = (
+    "\n\nAntworte ausschließlich mit JSON in diesem Format, ohne weiteren Text: "
+    '{"cards": [{"question": "...", "answer": "..."}]}'
+)
+
+# Schema für Gemini (response_schema); OpenAI erhält nur response_format json_object
+CARDS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "cards": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "section": {"type": "INTEGER"},
+                    "question": {"type": "STRING"},
+                    "answer": {"type": "STRING"},
+                },
+                "required": ["question", "answer"],
+            },
+        }
+    },
+    "required": ["cards"],
+}
+
+
+class CardFormatError(ValueError):
+    """Die Antwort entspricht nicht dem Karten-Schema."""
+
+
+def _strip_code_fence(text):
+    """Entfernt einen umschließenden ```json ... ```-Block, den manche Modelle trotz JSON-Modus senden."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text[text.find("\n") + 1:] if "\n" in text else ""
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+    return text
+
+
+def parse_cards(response_text):
+    """
+    Gibt die Karten als Liste von {"question", "answer"} zurück (plus "section", falls angegeben).
+    Leere Fragen oder Antworten werden übersprungen; alles andere Ungültige löst CardFormatError aus.
+    """
+    try:
+        data = json.loads(_strip_code_fence(response_text))
+    except (json.JSONDecodeError, TypeError) as e:
+        raise CardFormatError(f"Kein gültiges JSON: {e}") from e
+
+    if isinstance(data, dict):
+        data = data.get("cards")
+    if not isinstance(data, list):
+        raise CardFormatError("Erwartet wird eine Liste von Karten bzw. ein Objekt mit 'cards'.")
+
+    return [card for card in map(parse_card, data) if card is not None]
+
+
+def parse_card(item):
+    """Prüft einen Eintrag des Karten-Arrays; None bei leerer Frage oder Antwort, sonst CardFormatError."""
+    if not isinstance(item, dict):
+        raise CardFormatError(f"Karte ist kein Objekt: {item!r}")
+    question, answer = item.get("question"), item.get("answer")
+    if not isinstance(question, str) or not isinstance(answer, str):
+        raise CardFormatError(f"Karte ohne Text für 'question' und 'answer': {item!r}")
+    if not question.strip() or not answer.strip():
+        return None
+
+    card = {"question": question.strip(), "answer": answer.strip()}
+    if isinstance(item.get("section"), int):
+        card["section"] = item["section"]
+    return card
@@ -0,0 +1,107 @@
+"""
+Checkpoint-Journal für lange Generierungsläufe (JSONL, nur Anhängen)
+- Eine Datei je Auftrag: Schlüssel aus Dokument (Inhalts-Hash + Seitenbereich) und Prompt-Einstellungen
+- Jeder fertige Chunk wird sofort als eine Zeile mit Nummer, Text-Hash und Karten geschrieben (flush + fsync)
+- Beim erneuten Start desselben Auftrags gelten nur Chunks mit gleichem Text als erledigt;
+  bearbeitete, fehlgeschlagene und fehlende Chunks werden neu angefragt
+- Eine beim Absturz halb geschriebene letzte Zeile wird beim Öffnen abgeschnitten
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+DEFAULT_MAX_AGE = 7 * 24 * 3600  # Journale unvollständiger Läufe werden nach 7 Tagen gelöscht
+
+
+def job_key(document, settings):
+    """Schlüssel eines Auftrags aus Dokument-Kennung und allem, was die Karten beeinflusst (Prompt, Modell, ...)."""
+    key_data = {"document": document, "settings": settings}
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def chunk_hash(chunk):
+    return hashlib.sha256(chunk.encode("utf-8")).hexdigest()[:16]
+
+
+def prune(directory, max_age=DEFAULT_MAX_AGE):
+    """Löscht Journale, die länger als max_age nicht mehr geschrieben wurden."""
+    if not os.path.isdir(directory):
+        return
+    cutoff = time.time() - max_age
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.endswith(".jsonl") and os.path.getmtime(path) < cutoff:
+            os.remove(path)
+            logging.debug(f"🗑 Altes Checkpoint-Journal gelöscht: {name}")
+
+
+class CheckpointJournal:
+    def __init__(self, path):
+        """Öffnet (bzw. erstellt) das Journal unter path und liest die bereits erledigten Chunks ein."""
+        self.path = path
+        self.entries = {}  # Chunk-Nummer → (Text-Hash, Karten)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._load()
+        self._file = open(path, "a", encoding="utf-8")
+
+    @classmethod
+    def for_job(cls, directory, document, settings):
+        """Journal des Auftrags (document, settings) im Verzeichnis directory."""
+        return cls(os.path.join(directory, f"{job_key(document, settings)}.jsonl"))
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as file:
+            data = file.read()
+        complete = data[:data.rfind(b"\n") + 1]
+        if len(complete) < len(data):
+            logging.warning(f"⚠ Unvollständige letzte Zeile im Checkpoint-Journal {self.path} wird verworfen.")
+            with open(self.path, "r+b") as file:
+                file.truncate(len(complete))
+
+        for line in complete.decode("utf-8").splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                logging.warning(f"⚠ Ungültige Zeile im Checkpoint-Journal {self.path} übersprungen.")
+                continue
+            self.entries[entry["chunk"]] = (entry["hash"], entry["cards"])
+
+    def completed(self, number, chunk):
+        """Karten des Chunks, falls er mit genau diesem Text bereits erledigt ist, sonst None."""
+        entry = self.entries.get(number)
+        if entry is None or entry[0] != chunk_hash(chunk):
+            return None
+        return entry[1]
+
+    def record(self, number, chunk, cards):
+        """Schreibt einen fertigen Chunk sofort auf die Platte (thread-sicher)."""
+        entry = {"chunk": number, "hash": chunk_hash(chunk), "cards": cards, "time": time.time()}
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.entries[number] = (entry["hash"], cards)
+
+    def reset(self):
+        """Verwirft alle erledigten Chunks (z. B. wenn der Lauf bewusst neu erzeugt werden soll)."""
+        with self._lock:
+            self._file.truncate(0)
+            self.entries.clear()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def remove(self):
+        """Schließt und löscht das Journal (nach einem vollständig erfolgreichen Lauf)."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
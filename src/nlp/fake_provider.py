@@ -0,0 +1,289 @@
+"""
+Simulierter LLM-Provider für Last- und Offline-Tests (api_type="fake")
+- fake_answer() erzeugt deterministische "Frage:/Antwort:"-Paare (bzw. JSON-Karten) aus dem Prompt,
+  auch für gebündelte Anfragen mit '### Abschnitt <Nr>'
+- FakeBehavior beschreibt Latenzverteilung, Stream-Geschwindigkeit und den Anteil an 429/500-Antworten
+- FakeClient beantwortet Anfragen im selben Prozess, FakeLLMServer als lokaler HTTP-Server
+  im Format der OpenAI Chat Completions API (mit Streaming als Server-Sent Events)
+- Beide zählen Anfragen und eingestreute Fehler in `stats`
+"""
+
+import json
+import logging
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from nlp import retry
+from nlp.rate_limiter import RateLimitExceeded
+from nlp.retry import ProviderError
+
+FAKE_MODEL = "fake-model"
+DEFAULT_QUESTIONS = 3  # Fragen je Abschnitt, wenn der Prompt keinen Plan enthält
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "lognormal")
+
+PLAN_PATTERN = re.compile(r"Abschnitt (\d+): (\d+)")
+SECTION_MARKER = re.compile(r"^### Abschnitt (\d+)\s*$", re.MULTILINE)
+WORD_PATTERN = re.compile(r"[^\W\d_]{5,}")
+
+
+def _keywords(text):
+    """Wörter ab fünf Buchstaben in der Reihenfolge ihres ersten Auftretens."""
+    return list(dict.fromkeys(WORD_PATTERN.findall(text))) or ["Text"]
+
+
+def fake_usage(prompt, text):
+    """Tokenverbrauch wie ihn ein Provider melden würde (Faustregel: 4 Zeichen je Token)."""
+    prompt_tokens = len(prompt) // 4 + 1
+    completion_tokens = len(text) // 4 + 1
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens}
+
+
+def fake_answer(prompt, json_mode=False, num_questions=DEFAULT_QUESTIONS):
+    """Deterministische Antwort auf einen Prompt: gleiche Eingabe, gleiche Karten."""
+    plan = {int(n): int(k) for n, k in PLAN_PATTERN.findall(prompt)}
+    markers = list(SECTION_MARKER.finditer(prompt))
+    if plan and markers:
+        sections = []
+        for i, match in enumerate(markers):
+            end = markers[i + 1].start() if i + 1 < len(markers) else len(prompt)
+            n = int(match.group(1))
+            sections.append((n, plan.get(n, num_questions), prompt[match.end():end]))
+    else:
+        sections = [(None, num_questions, prompt)]
+
+    cards = []
+    for n, count, text in sections:
+        words = _keywords(text)
+        for i in range(count):
+            word = words[i % len(words)]
+            card = {"question": f"Was bedeutet „{word}“?", "answer": f"„{word}“ ist ein Begriff aus dem Text."}
+            if n is not None:
+                card["section"] = n
+            cards.append(card)
+
+    if json_mode:
+        return json.dumps({"cards": cards}, ensure_ascii=False)
+
+    lines = []
+    section = None
+    for card in cards:
+        if card.get("section", section) != section:
+            section = card["section"]
+            lines.append(f"### Abschnitt {section}")
+        lines.append(f"Frage: {card['question']}\nAntwort: {card['answer']}")
+    return "\n".join(lines)
+
+
+class FakeBehavior:
+    def __init__(self, latency=0.0, latency_spread=0.0, distribution="constant", rate_429=0.0, rate_500=0.0,
+                 retry_after=0.05, chunk_size=16, chunk_delay=0.0, seed=None):
+        """
+        latency: Zeit bis zum ersten Antwortstück in Sekunden (Median bei "lognormal").
+        latency_spread: Breite der Verteilung ("uniform": ± Sekunden, "lognormal": Sigma).
+        rate_429 / rate_500: Anteil der Anfragen, die mit 429 (mit retry_after) bzw. 500 beantwortet werden.
+        chunk_size / chunk_delay: Zeichen je Stream-Stück und Pause zwischen zwei Stücken (Ausgabegeschwindigkeit).
+        seed: Startwert für reproduzierbare Latenzen und Fehler.
+        """
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unbekannte Latenzverteilung: {distribution}")
+        self.latency = latency
+        self.latency_spread = latency_spread
+        self.distribution = distribution
+        self.rate_429 = rate_429
+        self.rate_500 = rate_500
+        self.retry_after = retry_after
+        self.chunk_size = max(1, int(chunk_size))
+        self.chunk_delay = chunk_delay
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample_latency(self):
+        with self._lock:
+            if self.distribution == "uniform":
+                value = self._rng.uniform(self.latency - self.latency_spread, self.latency + self.latency_spread)
+            elif self.distribution == "lognormal":
+                value = self._rng.lognormvariate(0.0, self.latency_spread) * self.latency
+            else:
+                value = self.latency
+        return max(0.0, value)
+
+    def sample_error(self):
+        """Gibt 429, 500 oder None (kein Fehler) zurück."""
+        with self._lock:
+            roll = self._rng.random()
+        if roll < self.rate_429:
+            return 429
+        if roll < self.rate_429 + self.rate_500:
+            return 500
+        return None
+
+    def pieces(self, text):
+        return [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+
+
+class _FakeStats:
+    def __init__(self):
+        self.stats = {"requests": 0, "rate_limited": 0, "server_errors": 0, "streams": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+
+class FakeClient(_FakeStats):
+    def __init__(self, behavior=None):
+        """Provider im selben Prozess; Fehler werden wie bei den echten Providern als Exceptions gemeldet."""
+        super().__init__()
+        self.behavior = behavior or FakeBehavior()
+
+    def _begin(self):
+        self._count("requests")
+        time.sleep(self.behavior.sample_latency())
+        status = self.behavior.sample_error()
+        if status == 429:
+            self._count("rate_limited")
+            raise RateLimitExceeded("Fake Rate-Limit", self.behavior.retry_after)
+        if status is not None:
+            self._count("server_errors")
+            raise ProviderError(f"Fake API-Fehler {status}", provider="fake", status=status,
+                                retryable=retry.is_retryable_status(status))
+
+    def complete(self, prompt, json_mode=False, usage=None):
+        self._begin()
+        text = fake_answer(prompt, json_mode=json_mode)
+        time.sleep(self.behavior.chunk_delay * len(self.behavior.pieces(text)))
+        if usage is not None:
+            usage.update(fake_usage(prompt, text))
+        return text
+
+    def stream(self, prompt, json_mode=False, usage=None):
+        self._begin()
+        self._count("streams")
+        text = fake_answer(prompt, json_mode=json_mode)
+        if usage is not None:
+            usage.update(fake_usage(prompt, text))
+        for i, piece in enumerate(self.behavior.pieces(text)):
+            if i and self.behavior.chunk_delay:
+                time.sleep(self.behavior.chunk_delay)
+            yield piece
+
+
+class _FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-Alive wie bei den echten APIs
+
+    def do_POST(self):
+        server = self.server.fake
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._send_json(404, {"error": {"message": f"Unbekannter Pfad: {self.path}"}})
+
+        server._count("requests")
+        time.sleep(server.behavior.sample_latency())
+        status = server.behavior.sample_error()
+        if status == 429:
+            server._count("rate_limited")
+            headers = {"retry-after-ms": str(int(server.behavior.retry_after * 1000))}
+            return self._send_json(429, {"error": {"message": "Rate limit", "type": "rate_limit_exceeded"}},
+                                   headers)
+        if status is not None:
+            server._count("server_errors")
+            return self._send_json(status, {"error": {"message": "Fake server error", "type": "server_error"}})
+
+        messages = body.get("messages") or [{}]
+        prompt = messages[-1].get("content", "")
+        json_mode = (body.get("response_format") or {}).get("type") == "json_object"
+        text = fake_answer(prompt, json_mode=json_mode)
+        model = body.get("model", FAKE_MODEL)
+
+        if body.get("stream"):
+            server._count("streams")
+            usage = fake_usage(prompt, text) if (body.get("stream_options") or {}).get("include_usage") else None
+            return self._send_stream(model, server.behavior, text, usage)
+
+        time.sleep(server.behavior.chunk_delay * len(server.behavior.pieces(text)))
+        self._send_json(200, {
+            "id": "fake", "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": fake_usage(prompt, text),
+        })
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, model, behavior, text, usage=None):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")  # Ende des Streams = Ende der Verbindung
+        self.end_headers()
+        self.close_connection = True
+        try:
+            for i, piece in enumerate(behavior.pieces(text)):
+                if i and behavior.chunk_delay:
+                    time.sleep(behavior.chunk_delay)
+                event = {
+                    "id": "fake", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                    "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                }
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            if usage is not None:
+                event = {"id": "fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                         "model": model, "choices": [], "usage": usage}
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client hat den Stream vorzeitig beendet
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeLLMServer(_FakeStats):
+    def __init__(self, behavior=None, host="127.0.0.1", port=0):
+        """Lokaler OpenAI-kompatibler Endpunkt; port=0 wählt einen freien Port."""
+        super().__init__()
+        self.behavior = behavior or FakeBehavior()
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """Basis-URL für openai.OpenAI(base_url=...)."""
+        return f"http://{self.host}:{self.port}/v1"
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), _FakeHandler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-llm", daemon=True)
+        self._thread.start()
+        logging.info(f"🧪 Fake-LLM-Server läuft unter {self.base_url}")
+        return self.base_url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
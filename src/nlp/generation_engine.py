@@ -0,0 +1,160 @@
+"""
+Nebenläufige Ausführung der Kartengenerierung
+- Mehrere API-Anfragen laufen gleichzeitig in einem Thread-Pool (max_in_flight)
+- Ergebnisse werden trotzdem in der Reihenfolge der Chunks geliefert
+- Fortschritt wird gemeldet, sobald ein Chunk fertig ist (egal an welcher Position)
+- Ein Fehler in einem Chunk wird als Ergebnis dieses Chunks zurückgegeben und bricht die anderen nicht ab
+- Die Eingabe darf ein Generator sein (Pipeline-Modus): Chunks werden erst bei freier Kapazität angefordert;
+  ein Fehler der Eingabe (z. B. beim Parsen) beendet nur den Nachschub, siehe input_error
+- JobControl: Pause (keine neuen Chunks) und Abbruch (keine neuen Chunks, laufende werden nicht abgewartet,
+  bereits fertige Ergebnisse werden trotzdem geliefert)
+"""
+
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+DEFAULT_MAX_IN_FLIGHT = 4
+POLL_INTERVAL = 0.1  # Sekunden; so oft prüft der Lauf Abbruch und Pause, während Anfragen laufen
+
+
+class GenerationCancelled(Exception):
+    """Der Lauf wurde abgebrochen, bevor dieser Chunk fertig war."""
+
+    def __init__(self, message="Lauf abgebrochen."):
+        super().__init__(message)
+
+
+class JobControl:
+    def __init__(self):
+        """Abbruch und Pause eines Laufs; wird von GUI, GenerationEngine und QnAGenerator geteilt."""
+        self._cancelled = threading.Event()
+        self._resumed = threading.Event()
+        self._resumed.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self):
+        return not self._resumed.is_set()
+
+    def cancel(self):
+        """Keine neuen Chunks und Versuche mehr; laufende Streams werden geschlossen."""
+        self._cancelled.set()
+        self._resumed.set()  # Ein pausierter Lauf soll den Abbruch sofort bemerken
+        logging.info("⏹ Lauf wird abgebrochen.")
+
+    def pause(self):
+        """Keine neuen Chunks mehr starten; laufende Anfragen werden noch fertig bearbeitet."""
+        if not self.cancelled:
+            self._resumed.clear()
+            logging.info("⏸ Lauf pausiert.")
+
+    def resume(self):
+        if self.paused:
+            self._resumed.set()
+            logging.info("▶ Lauf wird fortgesetzt.")
+
+    def check(self):
+        """Wirft GenerationCancelled, wenn der Lauf abgebrochen wurde."""
+        if self.cancelled:
+            raise GenerationCancelled()
+
+    def wait_resumed(self, timeout=None):
+        """Wartet höchstens timeout Sekunden, solange der Lauf pausiert ist; True, wenn er weiterlaufen darf."""
+        return self._resumed.wait(timeout)
+
+
+class GenerationEngine:
+    def __init__(self, generate, max_in_flight=DEFAULT_MAX_IN_FLIGHT, control=None):
+        """
+        generate: Funktion, die für einen Chunk das Ergebnis berechnet (z. B. die API-Anfrage).
+        max_in_flight: maximale Anzahl gleichzeitig laufender Anfragen.
+        control: JobControl für Abbruch und Pause (optional).
+        """
+        self.generate = generate
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.control = control
+        self.input_error = None  # Fehler der Eingabe im letzten run() (z. B. beschädigte Seite im Pipeline-Modus)
+
+    def run(self, items, on_progress=None, weight=None):
+        """
+        Generator: liefert (index, item, result, error) in Eingabereihenfolge.
+        Bei einem Fehler ist result None und error die Exception, sonst ist error None.
+        on_progress(completed) wird nach jedem abgeschlossenen Eintrag aufgerufen;
+        weight(item) gibt an, wie viele Chunks ein Eintrag zählt (z. B. bei gebündelten Anfragen).
+        Pausiert: es werden keine neuen Einträge gestartet. Abgebrochen: noch laufende Einträge werden
+        mit GenerationCancelled als Fehler geliefert, ohne auf sie zu warten; fertige Ergebnisse bleiben erhalten.
+        Wirft die Eingabe eine Exception, werden keine neuen Einträge mehr angefordert, die laufenden noch
+        geliefert und die Exception in self.input_error abgelegt.
+        """
+        self.input_error = None
+        control = self.control
+        iterator = iter(items)
+        exhausted = False
+        next_index = 0  # Index des nächsten einzureichenden Chunks
+        next_yield = 0  # Index des nächsten auszuliefernden Ergebnisses
+        running = {}  # Future -> (index, item)
+        finished = {}  # index -> (item, result, error), wartet auf Vorgänger
+        completed = 0
+
+        executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="qna")
+        try:
+            while True:
+                if control is not None and control.cancelled:
+                    # Laufende Anfragen nicht abwarten; ihre Ergebnisse werden verworfen
+                    for future, (index, item) in running.items():
+                        future.cancel()
+                        finished[index] = (item, None, GenerationCancelled())
+                    running.clear()
+                    exhausted = True
+
+                # Freie Plätze mit neuen Chunks auffüllen (nicht während einer Pause)
+                while not exhausted and len(running) < self.max_in_flight and not (control and control.paused):
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    except Exception as e:
+                        logging.error(f"❌ Eingabe nach {next_index} Chunks abgebrochen: {e}")
+                        self.input_error = e
+                        exhausted = True
+                        break
+                    running[executor.submit(self.generate, item)] = (next_index, item)
+                    next_index += 1
+
+                if running:
+                    done, _ = wait(running, timeout=POLL_INTERVAL if control else None,
+                                   return_when=FIRST_COMPLETED)
+                    for future in done:
+                        index, item = running.pop(future)
+                        try:
+                            finished[index] = (item, future.result(), None)
+                        except GenerationCancelled as e:
+                            finished[index] = (item, None, e)
+                        except Exception as e:
+                            logging.error(f"❌ Fehler bei der Verarbeitung von Chunk {index + 1}: {e}")
+                            finished[index] = (item, None, e)
+                        completed += weight(item) if weight else 1
+                        if on_progress:
+                            on_progress(completed)
+                elif not exhausted:
+                    control.wait_resumed(POLL_INTERVAL)  # Pausiert und nichts mehr in Arbeit
+                    continue
+
+                # Alle Ergebnisse ausliefern, deren Vorgänger bereits fertig sind
+                while next_yield in finished:
+                    item, result, error = finished.pop(next_yield)
+                    yield next_yield, item, result, error
+                    next_yield += 1
+
+                if not running and exhausted:
+                    break
+        finally:
+            # Bei Abbruch oder vorzeitigem Ende des Verbrauchers keine weiteren Anfragen starten
+            for future in running:
+                future.cancel()
+            executor.shutdown(wait=not (control and control.cancelled), cancel_futures=True)
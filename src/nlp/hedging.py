@@ -0,0 +1,192 @@
+"""
+Hedging und Failover für Provider-Anfragen
+- LatencyTracker: gleitendes Fenster der Antwortzeiten je Provider und Modell (für das p95)
+- HedgingPolicy: dauert eine Anfrage länger als das beobachtete p95, geht ein Duplikat raus –
+  an denselben Provider oder an den Ausweich-Provider; die erste gültige Antwort gewinnt
+- Ist der Circuit-Breaker des Providers offen oder scheitert er endgültig, übernimmt der Ausweich-Provider
+- Beide Anfragen laufen gestreamt; die verlorene wird zwischen zwei Stücken beendet und ihr Stream geschlossen,
+  statt die vollständige (bezahlte) Antwort abzuwarten; bricht der Nutzer ab, werden beide so beendet
+- Die Zusatzkosten (Duplikate und deren Prompt-Tokens) werden getrennt in den Generator-Stats gezählt
+- Alle Policies teilen sich einen Thread-Pool (MAX_WORKERS), damit je Lauf keine neuen Threads entstehen
+"""
+
+import logging
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from nlp import metrics
+from nlp.generation_engine import POLL_INTERVAL, GenerationCancelled
+from nlp.providers import MAX_OUTPUT_TOKENS
+from nlp.retry import ProviderError
+
+HEDGE_QUANTILE = 0.95
+LATENCY_WINDOW = 200  # Letzte Antwortzeiten je Provider, aus denen das Quantil berechnet wird
+MIN_SAMPLES = 20  # Darunter ist das p95 nicht aussagekräftig → DEFAULT_DELAY
+MIN_DELAY = 0.5  # Sekunden; verhindert Duplikate bei sehr schnellen Providern
+DEFAULT_DELAY = 10.0  # Sekunden bis zum Duplikat, solange noch zu wenige Messwerte vorliegen
+HEDGE_BUDGET = 0.1  # Höchstens so viele Duplikate je Anfrage (Anteil)
+MAX_WORKERS = 32  # Gemeinsamer Pool aller HedgingPolicies
+
+_trackers = {}
+_trackers_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class HedgeCancelled(ProviderError):
+    """Die Anfrage hat das Rennen verloren; weitere Versuche werden nicht mehr gestartet."""
+
+    def __init__(self, provider=None):
+        super().__init__("Anfrage abgebrochen (andere Antwort war schneller).", provider=provider)
+
+
+class LatencyTracker:
+    def __init__(self, window=LATENCY_WINDOW, min_samples=MIN_SAMPLES):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def quantile(self, q):
+        """Quantil der letzten Antwortzeiten oder None, solange weniger als min_samples vorliegen."""
+        with self._lock:
+            if len(self.samples) < self.min_samples:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def get_tracker(provider, model):
+    """Gibt den gemeinsamen LatencyTracker für Provider und Modell zurück."""
+    key = (provider, model)
+    with _trackers_lock:
+        if key not in _trackers:
+            _trackers[key] = LatencyTracker()
+        return _trackers[key]
+
+
+def reset():
+    """Verwirft alle Messwerte (für Tests)."""
+    with _trackers_lock:
+        _trackers.clear()
+
+
+def get_executor():
+    """Gibt den gemeinsamen Thread-Pool für Anfragen mit Hedging zurück (beim ersten Zugriff erzeugt)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="hedge")
+        return _executor
+
+
+def shutdown():
+    """Beendet den gemeinsamen Thread-Pool (z. B. beim Beenden der Anwendung); laufende Anfragen enden noch."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+class HedgingPolicy:
+    def __init__(self, fallback=None, quantile=HEDGE_QUANTILE, min_delay=MIN_DELAY, default_delay=DEFAULT_DELAY,
+                 budget=HEDGE_BUDGET, hedge=True):
+        """
+        fallback: zweiter QnAGenerator (z. B. Gemini zu OpenAI) für Duplikate und Failover;
+                  ohne fallback gehen Duplikate an denselben Provider.
+        budget: maximaler Anteil an Duplikaten bezogen auf alle Anfragen dieses Generators.
+        hedge=False: nur Failover, keine Duplikate.
+        """
+        self.fallback = fallback
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.default_delay = default_delay
+        self.budget = budget
+        self.hedge = hedge
+
+    def delay(self, generator):
+        """Wartezeit bis zum Duplikat: beobachtetes p95 des Providers, mindestens min_delay."""
+        observed = get_tracker(generator.api_type, generator.model).quantile(self.quantile)
+        return max(self.min_delay, self.default_delay if observed is None else observed)
+
+    def _within_budget(self, generator):
+        with generator._stats_lock:
+            return generator.stats["hedged_requests"] < self.budget * max(1, generator.stats["requests"])
+
+    def _failover(self, generator, prompt, error):
+        if self.fallback is None:
+            raise error
+        logging.warning(f"🔀 {generator.api_type} nicht verfügbar ({error}), Anfrage geht an "
+                        f"{self.fallback.api_type}.")
+        with generator._stats_lock:
+            generator.stats["failovers"] += 1
+        return self.fallback.send_with_retry(self.fallback.provider_call(), prompt)
+
+    def send(self, generator, call, prompt):
+        """Sendet den Prompt über generator.send_with_retry, mit Duplikat nach p95 und Failover."""
+        if self.fallback is not None and generator.circuit_breaker.state == "open":
+            return self._failover(generator, prompt, ProviderError("Circuit-Breaker offen",
+                                                                   provider=generator.api_type))
+
+        executor = get_executor()
+        primary_cancel = threading.Event()
+        primary = executor.submit(metrics.bind(generator.send_with_retry),
+                                  generator.cancellable_call(call, primary_cancel), prompt, primary_cancel)
+        done, _ = wait([primary], timeout=self.delay(generator))
+        if done or not self.hedge or not self._within_budget(generator):
+            try:
+                return primary.result()
+            except ProviderError as e:
+                return self._failover(generator, prompt, e)
+
+        backup_generator = self.fallback or generator
+        backup_call = backup_generator.provider_call() if self.fallback else call
+        backup_cancel = threading.Event()
+        with generator._stats_lock:
+            generator.stats["hedged_requests"] += 1
+            generator.stats["hedge_prompt_tokens"] += backup_generator.estimate_tokens(prompt) - MAX_OUTPUT_TOKENS
+        logging.debug(f"🏁 Anfrage an {generator.api_type} langsamer als p95, Duplikat an "
+                      f"{backup_generator.api_type}.")
+        backup = executor.submit(metrics.bind(backup_generator.send_with_retry),
+                                 backup_generator.cancellable_call(backup_call, backup_cancel), prompt,
+                                 backup_cancel, hedge=True)
+
+        cancels = {primary: primary_cancel, backup: backup_cancel}
+        pending = {primary, backup}
+        errors = []
+        empty_text = None
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                generator.check_cancelled()
+                for future in done:
+                    try:
+                        response_text = future.result()
+                    except ProviderError as e:
+                        errors.append(e)
+                        continue
+                    if not response_text or not response_text.strip():
+                        empty_text = response_text  # Nur verwenden, wenn die andere Anfrage nichts Besseres liefert
+                        continue
+                    # Verlierer: noch nicht gestartet → verwerfen, sonst Stream schließen und keine weiteren Versuche
+                    for loser in pending:
+                        cancels[loser].set()
+                        loser.cancel()
+                    if future is backup:
+                        with generator._stats_lock:
+                            generator.stats["hedge_wins"] += 1
+                    return response_text
+        except GenerationCancelled:
+            # Abbruch durch den Nutzer: beide Anfragen beenden (Streams schließen), nicht auf sie warten
+            for future, cancel in cancels.items():
+                cancel.set()
+                future.cancel()
+            raise
+        if empty_text is not None:
+            return empty_text
+        raise errors[0]
@@ -0,0 +1,242 @@
+"""
+Nutzungs- und Latenzmessung der API-Anfragen
+- Je Anfrage ein Eintrag: vom Provider gemeldete Prompt-/Antwort-Tokens (sonst geschätzt), Latenz,
+  Anzahl der Versuche, Cache-Status, Ergebnis (ok, error, cancelled) und ob es ein Hedging-Duplikat war
+- scope(chunks=..., document=...) ordnet die Anfragen im aktuellen Thread Chunks und Dokument zu;
+  bind() nimmt diese Zuordnung in einen anderen Thread mit
+- Auswertung je Lauf (summary), je Chunk (by_chunk) und je Dokument (by_document)
+- Export als JSON und im Prometheus-Textformat (z. B. für den textfile-Collector des node_exporter)
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Listenpreise in USD je 1000 Tokens (Prompt, Antwort); ohne Eintrag werden keine Kosten berechnet
+PRICES = {
+    ("openai", "gpt-3.5-turbo"): (0.0005, 0.0015),
+    ("gemini", "gemini-2.0-flash"): (0.0001, 0.0004),
+    ("fake", "fake-model"): (0.0, 0.0),
+}
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)  # Sekunden (Prometheus-Histogramm)
+PROMETHEUS_PREFIX = "karteikarten_api"
+
+_scope = threading.local()
+
+
+@contextmanager
+def scope(**labels):
+    """Ordnet alle Anfragen dieses Threads innerhalb des Blocks den Labels zu (z. B. chunks, document)."""
+    previous = getattr(_scope, "labels", {})
+    _scope.labels = {**previous, **labels}
+    try:
+        yield
+    finally:
+        _scope.labels = previous
+
+
+def current_scope():
+    return dict(getattr(_scope, "labels", {}))
+
+
+def bind(function):
+    """Gibt function so zurück, dass sie in einem anderen Thread mit der aktuellen Zuordnung läuft."""
+    labels = current_scope()
+
+    def bound(*args, **kwargs):
+        with scope(**labels):
+            return function(*args, **kwargs)
+
+    return bound
+
+
+def _quantile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else None
+
+
+class UsageMetrics:
+    def __init__(self, run_id=None, price_per_1000=None, clock=time.time):
+        """
+        run_id: Kennung des Laufs (Standard: Startzeitpunkt).
+        price_per_1000: einheitlicher Preis je 1000 Tokens wie in der Kostenschätzung der GUI;
+                        ohne Angabe gelten die Listenpreise aus PRICES.
+        """
+        self.clock = clock
+        self.started = clock()
+        self.run_id = run_id or time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+        self.price_per_1000 = price_per_1000
+        self.records = []
+        self._lock = threading.Lock()
+
+    def record_call(self, provider, model, status="ok", cache="off", attempts=1, latency=None,
+                    total_seconds=None, prompt_tokens=0, completion_tokens=0, estimated=False, hedge=False):
+        """Speichert eine Anfrage (bzw. einen Cache-Treffer) mit den Labels des aktuellen scope()."""
+        record = {
+            "provider": provider, "model": model, "status": status, "cache": cache,
+            "attempts": attempts, "latency": latency, "total_seconds": total_seconds,
+            "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "estimated": estimated, "hedge": hedge, "time": self.clock(), **current_scope(),
+        }
+        record["cost_usd"] = self.cost(record)
+        with self._lock:
+            self.records.append(record)
+        return record
+
+    def cost(self, record):
+        """Kosten einer Anfrage in USD (None, wenn für das Modell kein Preis bekannt ist)."""
+        tokens = record["prompt_tokens"] + record["completion_tokens"]
+        if self.price_per_1000 is not None:
+            return tokens / 1000 * self.price_per_1000
+        prices = PRICES.get((record["provider"], record["model"]))
+        if prices is None:
+            return None
+        return (record["prompt_tokens"] * prices[0] + record["completion_tokens"] * prices[1]) / 1000
+
+    @staticmethod
+    def _aggregate(records, share=None):
+        """Fasst Einträge zusammen; share(record) gibt den Anteil an Tokens und Kosten an (gebündelte Chunks)."""
+        totals = {
+            "requests": 0, "cache_hits": 0, "attempts": 0, "retries": 0, "errors": 0, "cancelled": 0,
+            "hedges": 0, "estimated": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0,
+        }
+        latencies = []
+        cost_known = True
+        for record in records:
+            part = share(record) if share else 1.0
+            if record["cache"] == "hit":
+                totals["cache_hits"] += 1
+                continue
+            totals["requests"] += 1
+            totals["attempts"] += record["attempts"]
+            totals["retries"] += max(0, record["attempts"] - 1)
+            totals["errors"] += record["status"] == "error"
+            totals["cancelled"] += record["status"] == "cancelled"
+            totals["hedges"] += bool(record["hedge"])
+            totals["estimated"] += bool(record["estimated"])
+            totals["prompt_tokens"] += record["prompt_tokens"] * part
+            totals["completion_tokens"] += record["completion_tokens"] * part
+            if record["cost_usd"] is None:
+                cost_known = False
+            else:
+                totals["cost_usd"] += record["cost_usd"] * part
+            if record["status"] == "ok" and record["latency"] is not None:
+                latencies.append(record["latency"])
+
+        totals["prompt_tokens"] = round(totals["prompt_tokens"])
+        totals["completion_tokens"] = round(totals["completion_tokens"])
+        totals["cost_usd"] = round(totals["cost_usd"], 6) if cost_known else None
+        lookups = totals["requests"] + totals["cache_hits"]
+        totals["cache_hit_rate"] = totals["cache_hits"] / lookups if lookups else 0.0
+        latencies.sort()
+        totals["latency"] = {
+            "p50": _quantile(latencies, 0.5), "p95": _quantile(latencies, 0.95),
+            "max": latencies[-1] if latencies else None,
+            "mean": sum(latencies) / len(latencies) if latencies else None,
+        }
+        return totals
+
+    def _snapshot(self):
+        with self._lock:
+            return list(self.records)
+
+    def summary(self):
+        """Kennzahlen des gesamten Laufs."""
+        return {"run_id": self.run_id, "started": self.started, **self._aggregate(self._snapshot())}
+
+    def by_chunk(self):
+        """Kennzahlen je Chunk-Nummer; bei gebündelten Anfragen zählt jeder Chunk anteilig."""
+        chunks = {}
+        for record in self._snapshot():
+            for chunk in record.get("chunks") or ():
+                chunks.setdefault(chunk, []).append(record)
+        return {
+            chunk: self._aggregate(records, share=lambda record: 1 / len(record["chunks"]))
+            for chunk, records in sorted(chunks.items())
+        }
+
+    def by_document(self):
+        """Kennzahlen je Dokument (Einträge ohne Dokument unter "")."""
+        documents = {}
+        for record in self._snapshot():
+            documents.setdefault(record.get("document", ""), []).append(record)
+        return {document: self._aggregate(records) for document, records in documents.items()}
+
+    def to_dict(self):
+        return {
+            "summary": self.summary(),
+            "documents": self.by_document(),
+            "chunks": {str(chunk): totals for chunk, totals in self.by_chunk().items()},
+            "calls": self._snapshot(),
+        }
+
+    def to_prometheus(self):
+        """Kumulierte Zähler und Latenz-Histogramm je Provider und Modell im Prometheus-Textformat."""
+        groups = {}
+        for record in self._snapshot():
+            groups.setdefault((record["provider"], record["model"]), []).append(record)
+
+        p = PROMETHEUS_PREFIX
+        lines = [
+            f"# HELP {p}_requests_total API-Anfragen nach Ergebnis und Cache-Status.",
+            f"# TYPE {p}_requests_total counter",
+        ]
+        for (provider, model), records in sorted(groups.items()):
+            counts = {}
+            for record in records:
+                key = (record["status"], record["cache"])
+                counts[key] = counts.get(key, 0) + 1
+            for (status, cache), count in sorted(counts.items()):
+                lines.append(f'{p}_requests_total{{provider="{provider}",model="{model}",status="{status}",'
+                             f'cache="{cache}"}} {count}')
+
+        metrics = (
+            ("tokens_total", "counter", "Vom Provider gemeldete (sonst geschätzte) Tokens."),
+            ("retries_total", "counter", "Wiederholte Versuche nach 429 bzw. vorübergehenden Fehlern."),
+            ("cost_usd_total", "counter", "Kosten in USD."),
+        )
+        for name, kind, description in metrics:
+            lines += [f"# HELP {p}_{name} {description}", f"# TYPE {p}_{name} {kind}"]
+            for (provider, model), records in sorted(groups.items()):
+                totals = self._aggregate(records)
+                labels = f'provider="{provider}",model="{model}"'
+                if name == "tokens_total":
+                    lines.append(f'{p}_{name}{{{labels},type="prompt"}} {totals["prompt_tokens"]}')
+                    lines.append(f'{p}_{name}{{{labels},type="completion"}} {totals["completion_tokens"]}')
+                elif name == "retries_total":
+                    lines.append(f"{p}_{name}{{{labels}}} {totals['retries']}")
+                elif totals["cost_usd"] is not None:
+                    lines.append(f"{p}_{name}{{{labels}}} {totals['cost_usd']}")
+
+        lines += [f"# HELP {p}_latency_seconds Dauer erfolgreicher Anfragen (letzter Versuch).",
+                  f"# TYPE {p}_latency_seconds histogram"]
+        for (provider, model), records in sorted(groups.items()):
+            latencies = [r["latency"] for r in records
+                         if r["status"] == "ok" and r["cache"] != "hit" and r["latency"] is not None]
+            labels = f'provider="{provider}",model="{model}"'
+            for bucket in LATENCY_BUCKETS:
+                count = sum(1 for latency in latencies if latency <= bucket)
+                lines.append(f'{p}_latency_seconds_bucket{{{labels},le="{bucket}"}} {count}')
+            lines.append(f'{p}_latency_seconds_bucket{{{labels},le="+Inf"}} {len(latencies)}')
+            lines.append(f"{p}_latency_seconds_sum{{{labels}}} {sum(latencies)}")
+            lines.append(f"{p}_latency_seconds_count{{{labels}}} {len(latencies)}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, directory):
+        """
+        Schreibt run_<run_id>.json und karteikarten.prom nach `directory` und gibt beide Pfade zurück.
+        Die .prom-Datei wird atomar ersetzt, damit ein Collector nie eine halb geschriebene Datei liest.
+        """
+        os.makedirs(directory, exist_ok=True)
+        json_path = os.path.join(directory, f"run_{self.run_id}.json")
+        with open(json_path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, ensure_ascii=False, indent=2)
+
+        prom_path = os.path.join(directory, "karteikarten.prom")
+        with open(prom_path + ".tmp", "w", encoding="utf-8") as file:
+            file.write(self.to_prometheus())
+        os.replace(prom_path + ".tmp", prom_path)
+        logging.info(f"📈 Nutzungsdaten exportiert: {json_path}, {prom_path}")
+        return json_path, prom_path
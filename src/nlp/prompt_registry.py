@@ -0,0 +1,124 @@
+"""
+Prozessweite Registry für die Prompt-Vorlagen unter data/prompts
+- Jede Datei wird einmal gelesen und die Vorlage einmal vorkompiliert
+- Neu geladen wird nur, wenn sich die mtime der Datei ändert (geprüft höchstens alle RELOAD_CHECK_INTERVAL s)
+- compile_template() zerlegt eine Vorlage in Text- und Platzhalterteile, render() setzt nur noch zusammen
+"""
+
+import json
+import logging
+import os
+import string
+import threading
+import time
+from functools import lru_cache
+
+PROMPT_DIR = os.path.join("data", "prompts")
+RELOAD_CHECK_INTERVAL = 1.0  # Sekunden zwischen zwei mtime-Prüfungen derselben Datei
+DEFAULT_TEMPLATE = "Hier ist ein Textabschnitt: \"{chunk}\". Erstelle Fragen und Antworten."
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+class PromptTemplate:
+    def __init__(self, text):
+        """Zerlegt `text` einmal in Literale und Platzhalter ({chunk}, {num_questions})."""
+        self.text = text
+        self.parts = []  # Liste von (literal, feldname oder None)
+        try:
+            for literal, field, spec, conversion in string.Formatter().parse(text):
+                if field is not None and (spec or conversion or not field.isidentifier()):
+                    raise ValueError(f"Nicht unterstützter Platzhalter: {{{field}}}")
+                self.parts.append((literal, field))
+        except ValueError as e:
+            # z. B. JSON-Beispiele mit einzelnen Klammern: nur die bekannten Platzhalter ersetzen
+            logging.warning(f"⚠ Prompt-Vorlage ist kein gültiges Format ({e}), ersetze nur bekannte Platzhalter.")
+            self.parts = self._split_known(text)
+
+        self.fields = {field for _, field in self.parts if field}
+        if "chunk" not in self.fields:
+            logging.warning("⚠ Prompt-Vorlage enthält kein {chunk}, der Textabschnitt wird angehängt.")
+            self.parts.append(("\n\n", "chunk"))
+            self.fields.add("chunk")
+
+    @staticmethod
+    def _split_known(text):
+        parts = []
+        rest = text
+        while True:
+            positions = [(rest.find("{" + name + "}"), name) for name in ("chunk", "num_questions")]
+            positions = [(pos, name) for pos, name in positions if pos >= 0]
+            if not positions:
+                parts.append((rest, None))
+                return parts
+            pos, name = min(positions)
+            parts.append((rest[:pos], name))
+            rest = rest[pos + len(name) + 2:]
+
+    def render(self, **values):
+        """Setzt die Vorlage mit den übergebenen Werten zusammen (fehlende Platzhalter bleiben leer)."""
+        return "".join(literal + (str(values.get(field, "")) if field else "") for literal, field in self.parts)
+
+
+@lru_cache(maxsize=64)
+def compile_template(text):
+    """Vorkompilierte Vorlage je Text, damit auch GUI-Prompts nur einmal zerlegt werden."""
+    return PromptTemplate(text)
+
+
+class PromptRegistry:
+    def __init__(self, prompt_dir=PROMPT_DIR, clock=time.monotonic):
+        self.prompt_dir = prompt_dir
+        self.clock = clock
+        self._entries = {}  # Name → (mtime, Inhalt, Zeitpunkt der letzten Prüfung)
+        self._lock = threading.Lock()
+        self.stats = {"loads": 0, "reloads": 0}
+
+    def _load(self, name, key):
+        """Gibt den Wert `key` aus data/prompts/<name>.json zurück (None, falls nicht vorhanden)."""
+        path = os.path.join(self.prompt_dir, f"{name}.json")
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry and now - entry[2] < RELOAD_CHECK_INTERVAL:
+                return entry[1]
+
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                if entry is None or entry[0] is not None:
+                    logging.error(f"⚠ Prompt-Datei nicht gefunden: {path}")
+                self._entries[name] = (None, None, now)
+                return None
+
+            if entry and entry[0] == mtime:
+                self._entries[name] = (mtime, entry[1], now)
+                return entry[1]
+
+            try:
+                with open(path, "r", encoding="utf-8") as file:
+                    content = json.load(file).get(key, "")
+            except json.JSONDecodeError as e:
+                logging.error(f"⚠ Prompt-Datei ungültig: {path} ({e})")
+                content = entry[1] if entry else None
+
+            self.stats["reloads" if entry and entry[0] is not None else "loads"] += 1
+            self._entries[name] = (mtime, content, now)
+            return content
+
+    def text(self, name):
+        """Roher Vorlagentext bzw. System-Message einer Datei (None, falls nicht vorhanden)."""
+        return self._load(name, "content" if name == "system_message" else "template")
+
+    def system_message(self):
+        return self.text("system_message")
+
+
+def get_registry():
+    """Gibt die gemeinsame Registry für PROMPT_DIR zurück."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = PromptRegistry()
+        return _registry
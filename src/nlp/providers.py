@@ -0,0 +1,273 @@
+"""
+Provider-Schnittstelle für die Kartengenerierung
+- Je Provider eine Klasse mit Modell, Sampling-Parametern, Client-Erzeugung, Anfrage, Streaming und Fehlerübersetzung
+- Registry: register_provider() / create_provider(name, ...); QnAGenerator wählt den Provider über seinen api_type
+- Die SDK-Clients werden prozessweit wiederverwendet (je API-Schlüssel, Basis-URL und Poolgröße):
+  Keep-Alive-Verbindungen bleiben zwischen den Läufen offen, kein erneuter TLS-Handshake je Lauf
+- base_url erlaubt OpenAI-kompatible Endpunkte, z. B. einen lokalen Inferenzserver oder FakeLLMServer
+"""
+
+import logging
+import threading
+
+import httpx
+import openai
+from google import genai
+from google.genai import errors as genai_errors
+from google.genai import types as genai_types
+
+from nlp import rate_limiter, retry
+from nlp.card_parser import CARDS_SCHEMA
+from nlp.fake_provider import FAKE_MODEL, FakeClient
+from nlp.rate_limiter import RateLimitExceeded
+from nlp.retry import ProviderError
+
+MAX_OUTPUT_TOKENS = 1000  # Antwortlimit je Anfrage, zählt für das TPM-Limit mit
+REQUEST_TIMEOUT = 60  # Sekunden je API-Anfrage
+DEFAULT_MAX_CONNECTIONS = 8  # Poolgröße, wenn der Aufrufer keine Parallelität angibt
+# HttpOptions.client_args (Argumente für den httpx-Client) gibt es erst in neueren google-genai-Versionen;
+# die in requirements.txt fixierte 1.3.0 lehnt unbekannte Felder ab
+GEMINI_CLIENT_ARGS = "client_args" in genai_types.HttpOptions.model_fields
+
+PROVIDERS = {}
+_clients = {}  # (Provider, API-Schlüssel, Basis-URL, Poolgröße) → SDK-Client
+_clients_lock = threading.Lock()
+
+
+def register_provider(provider_class):
+    """Macht eine Provider-Klasse unter ihrem `name` verfügbar (auch als Dekorator nutzbar)."""
+    PROVIDERS[provider_class.name] = provider_class
+    return provider_class
+
+
+def create_provider(name, **options):
+    """Erzeugt den Provider `name`; options wie in Provider.__init__."""
+    try:
+        provider_class = PROVIDERS[name]
+    except KeyError:
+        raise ValueError(f"Unbekannter API-Typ: {name}") from None
+    return provider_class(**options)
+
+
+def shared_client(key, factory):
+    """Gibt den gemeinsamen Client für `key` zurück und erzeugt ihn beim ersten Zugriff mit factory()."""
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = factory()
+            logging.debug(f"🔌 Neuer HTTP-Client für {key[0]} (Pool: {key[-1]} Verbindungen).")
+        return client
+
+
+def close_clients():
+    """Schließt alle gemeinsamen Clients (z. B. beim Beenden der Anwendung oder in Tests)."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        close = getattr(client, "close", None)
+        if close:
+            try:
+                close()
+            except Exception as e:
+                logging.debug(f"Client konnte nicht geschlossen werden: {e}")
+
+
+def openai_error(e):
+    """Übersetzt eine OpenAI-Exception in RateLimitExceeded bzw. einen ProviderError."""
+    if isinstance(e, openai.RateLimitError):
+        return RateLimitExceeded(f"OpenAI Rate-Limit: {e}", rate_limiter.retry_after_from_response(e.response))
+    if isinstance(e, openai.APIConnectionError):  # inklusive APITimeoutError
+        return ProviderError(f"OpenAI nicht erreichbar: {e}", provider="openai", retryable=True)
+    if isinstance(e, openai.APIStatusError):
+        return ProviderError(f"OpenAI API-Fehler {e.status_code}: {e.message}", provider="openai",
+                             status=e.status_code, retryable=retry.is_retryable_status(e.status_code))
+    return ProviderError(f"OpenAI-Fehler: {e}", provider="openai")
+
+
+def gemini_error(e):
+    """Übersetzt eine Gemini- bzw. Transport-Exception in RateLimitExceeded bzw. einen ProviderError."""
+    if isinstance(e, httpx.TransportError):  # inklusive Zeitüberschreitungen
+        return ProviderError(f"Gemini nicht erreichbar: {e}", provider="gemini", retryable=True)
+    if e.code == 429:
+        return RateLimitExceeded(f"Gemini Rate-Limit: {e}", rate_limiter.retry_after_from_response(e.response))
+    return ProviderError(f"Gemini API-Fehler {e.code}: {e.message}", provider="gemini",
+                         status=e.code, retryable=retry.is_retryable_status(e.code))
+
+
+class Provider:
+    name = None
+    default_model = None
+    sampling_params = {}  # gehen auch in den Schlüssel des Antwort-Caches ein
+    json_params = {}  # zusätzliche Parameter im JSON-Modus (output_format="json")
+
+    def __init__(self, api_key=None, base_url=None, model=None, max_connections=DEFAULT_MAX_CONNECTIONS, **options):
+        """
+        api_key / base_url: Zugangsdaten und (optional) abweichender Endpunkt.
+        model: Modellname, sonst default_model.
+        max_connections: Größe des Verbindungspools, sinnvollerweise die Anzahl paralleler Anfragen.
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model or self.default_model
+        self.max_connections = max(1, int(max_connections))
+        self.client = self.create_client(**options)
+
+    def create_client(self, **options):
+        raise NotImplementedError
+
+    def complete(self, prompt, system_prompt=None, params=None, usage=None):
+        """
+        Sendet den Prompt und gibt den vollständigen Antworttext zurück.
+        usage: dict, in das die vom Provider gemeldeten prompt_tokens und completion_tokens eingetragen werden.
+        """
+        raise NotImplementedError
+
+    def stream(self, prompt, system_prompt=None, params=None, usage=None):
+        """Wie complete, liefert die Antwort aber stückweise (Generator)."""
+        yield self.complete(prompt, system_prompt=system_prompt, params=params, usage=usage)
+
+
+@register_provider
+class OpenAIProvider(Provider):
+    name = "openai"
+    default_model = "gpt-3.5-turbo"  # Kostengünstigere Alternative
+    sampling_params = {"max_tokens": MAX_OUTPUT_TOKENS, "temperature": 0.7}
+    json_params = {"response_format": {"type": "json_object"}}
+
+    def create_client(self):
+        # Wiederholungen übernimmt QnAGenerator.send_with_retry, daher keine eingebauten Retries des SDKs
+        def factory():
+            limits = httpx.Limits(max_connections=self.max_connections,
+                                  max_keepalive_connections=self.max_connections)
+            return openai.OpenAI(
+                api_key=self.api_key, base_url=self.base_url, timeout=REQUEST_TIMEOUT, max_retries=0,
+                http_client=openai.DefaultHttpxClient(limits=limits, timeout=REQUEST_TIMEOUT),
+            )
+
+        return shared_client((self.name, self.api_key, self.base_url, self.max_connections), factory)
+
+    @staticmethod
+    def messages(prompt, system_prompt=None):
+        """Nachrichtenliste, mit System Message, sofern eine gesetzt ist."""
+        messages = [{"role": "user", "content": prompt}]
+        if system_prompt:
+            messages.insert(0, {"role": "system", "content": system_prompt})
+        return messages
+
+    @staticmethod
+    def record_usage(usage, reported):
+        if usage is not None and isinstance(getattr(reported, "prompt_tokens", None), int):
+            usage["prompt_tokens"] = reported.prompt_tokens
+            usage["completion_tokens"] = reported.completion_tokens
+
+    def complete(self, prompt, system_prompt=None, params=None, usage=None):
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=self.messages(prompt, system_prompt),
+                **(params or {})
+            )
+            self.record_usage(usage, response.usage)
+            return response.choices[0].message.content
+        except openai.OpenAIError as e:
+            raise openai_error(e) from e
+
+    def stream(self, prompt, system_prompt=None, params=None, usage=None):
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=self.messages(prompt, system_prompt),
+                stream=True,
+                stream_options={"include_usage": True},  # Verbrauch im letzten Event (ohne choices)
+                **(params or {})
+            )
+            with stream:  # Schließt die Verbindung auch bei vorzeitigem Abbruch
+                for event in stream:
+                    self.record_usage(usage, getattr(event, "usage", None))
+                    if event.choices and event.choices[0].delta.content:
+                        yield event.choices[0].delta.content
+        except openai.OpenAIError as e:
+            raise openai_error(e) from e
+
+
+@register_provider
+class GeminiProvider(Provider):
+    name = "gemini"
+    default_model = "gemini-2.0-flash"
+    sampling_params = {"temperature": 0.5, "top_p": 0.9, "max_output_tokens": MAX_OUTPUT_TOKENS}
+    json_params = {"response_mime_type": "application/json", "response_schema": CARDS_SCHEMA}
+
+    def create_client(self):
+        # Das SDK hält seinen httpx-Pool selbst (Keep-Alive); wiederverwendet wird daher der ganze Client,
+        # die Poolgröße geht über client_args an dessen httpx.Client, sofern das SDK sie annimmt
+        http_options = {"timeout": REQUEST_TIMEOUT * 1000}
+        if GEMINI_CLIENT_ARGS:
+            limits = httpx.Limits(max_connections=self.max_connections,
+                                  max_keepalive_connections=self.max_connections)
+            http_options["client_args"] = {"limits": limits}
+        else:
+            logging.debug("google-genai ohne client_args: Gemini nutzt die Standard-Poolgröße des SDK.")
+        if self.base_url:
+            http_options["base_url"] = self.base_url
+        return shared_client(
+            (self.name, self.api_key, self.base_url, self.max_connections),
+            lambda: genai.Client(api_key=self.api_key, http_options=http_options),
+        )
+
+    @staticmethod
+    def config(system_prompt=None, params=None):
+        """Konfiguration der Anfrage; die System Message wird als system_instruction übergeben."""
+        config = dict(params or {})
+        if system_prompt:
+            config["system_instruction"] = system_prompt
+        return config
+
+    @staticmethod
+    def record_usage(usage, reported):
+        if usage is not None and isinstance(getattr(reported, "prompt_token_count", None), int):
+            usage["prompt_tokens"] = reported.prompt_token_count
+            usage["completion_tokens"] = reported.candidates_token_count or 0
+
+    def complete(self, prompt, system_prompt=None, params=None, usage=None):
+        try:
+            response = self.client.models.generate_content(
+                model=self.model,
+                contents=[{"role": "user", "parts": [{"text": prompt}]}],
+                config=self.config(system_prompt, params)
+            )
+            self.record_usage(usage, response.usage_metadata)
+            return response.text
+        except (genai_errors.APIError, httpx.TransportError) as e:
+            raise gemini_error(e) from e
+
+    def stream(self, prompt, system_prompt=None, params=None, usage=None):
+        try:
+            for response in self.client.models.generate_content_stream(
+                model=self.model,
+                contents=[{"role": "user", "parts": [{"text": prompt}]}],
+                config=self.config(system_prompt, params)
+            ):
+                self.record_usage(usage, response.usage_metadata)  # Summe bis zum aktuellen Stück
+                if response.text:
+                    yield response.text
+        except (genai_errors.APIError, httpx.TransportError) as e:
+            raise gemini_error(e) from e
+
+
+@register_provider
+class FakeProvider(Provider):
+    name = "fake"
+    default_model = FAKE_MODEL
+    sampling_params = {"max_tokens": MAX_OUTPUT_TOKENS}
+    json_params = {"response_format": {"type": "json_object"}}
+
+    def create_client(self, behavior=None):
+        # Jeder Generator bekommt sein eigenes Verhalten (Latenz, Fehlerquoten), daher kein gemeinsamer Client
+        return FakeClient(behavior)
+
+    def complete(self, prompt, system_prompt=None, params=None, usage=None):
+        return self.client.complete(prompt, json_mode="response_format" in (params or {}), usage=usage)
+
+    def stream(self, prompt, system_prompt=None, params=None, usage=None):
+        return self.client.stream(prompt, json_mode="response_format" in (params or {}), usage=usage)
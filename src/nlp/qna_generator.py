@@ -1,90 +1,544 @@
-import openai
-from google import genai
 import os
 import logging
 import re
-import json
+import threading
+import time
 
+from nlp import hedging, prompt_registry, providers, rate_limiter, retry, tokenizer
+from nlp.providers import DEFAULT_MAX_CONNECTIONS, MAX_OUTPUT_TOKENS
+from nlp.rate_limiter import RateLimitExceeded
+from nlp.card_parser import JSON_INSTRUCTIONS, CardFormatError, parse_cards
+from nlp.generation_engine import GenerationCancelled
+from nlp.metrics import UsageMetrics
+from nlp.retry import ProviderError, RetryPolicy
+from nlp.stream_parser import IncrementalCardParser, IncrementalQnAParser
+
+RATE_LIMIT_RETRIES = 5  # Wie oft nach einer 429-Antwort erneut gewartet und gesendet wird
+TOKENS_PER_QUESTION = 150  # Eine Frage je 150 Chunk-Tokens ...
+MAX_QUESTIONS_PER_CHUNK = 5  # ... höchstens aber fünf
+
+# Bündelung kleiner Chunks (Packing-Modus)
+PACK_MAX_CHUNK_TOKENS = 300  # Größere Chunks werden immer einzeln gesendet
+PACK_TOKEN_BUDGET = 1500  # Maximale Summe der Chunk-Tokens je gebündelter Anfrage
+PACK_MAX_QUESTIONS = 8  # Mehr Karten passen nicht sicher in MAX_OUTPUT_TOKENS
+
+PACKED_INSTRUCTIONS = (
+    "\n\nDer Text besteht aus {count} Abschnitten, die jeweils mit '### Abschnitt <Nr>' beginnen. "
+    "Erstelle die Fragen getrennt je Abschnitt: {plan}. "
+    "Beginne die Antwort für jeden Abschnitt mit der Zeile '### Abschnitt <Nr>' "
+    "und schreibe darunter die Paare im Format 'Frage: ...' und 'Antwort: ...'."
+)
+PACKED_JSON_INSTRUCTIONS = " Gib bei jeder Karte zusätzlich das Feld \"section\" mit der Nummer des Abschnitts an."
+SECTION_PATTERN = re.compile(r"^[\s#*]*Abschnitt\s+(\d+)\s*\**\s*:?\s*$", re.MULTILINE | re.IGNORECASE)
+
+
+def questions_for(token_count):
+    """Anzahl der Fragen für einen Chunk mit token_count Tokens (mindestens 1)."""
+    return max(1, min(token_count // TOKENS_PER_QUESTION, MAX_QUESTIONS_PER_CHUNK))
+
+
+def iter_packs(items, count_tokens, token_budget=PACK_TOKEN_BUDGET, max_chunk_tokens=PACK_MAX_CHUNK_TOKENS,
+               max_questions=PACK_MAX_QUESTIONS):
+    """
+    Fasst aufeinanderfolgende kleine Chunks zu Paketen zusammen (Generator, Reihenfolge bleibt erhalten).
+    items: Iterable von (chunk, num_questions); liefert Listen solcher Paare.
+    Chunks über max_chunk_tokens bilden immer ein eigenes Paket.
+    """
+    pack, pack_tokens, pack_questions = [], 0, 0
+    for chunk, num_questions in items:
+        tokens = count_tokens(chunk)
+        if tokens > max_chunk_tokens:
+            if pack:
+                yield pack
+                pack, pack_tokens, pack_questions = [], 0, 0
+            yield [(chunk, num_questions)]
+            continue
+
+        if pack and (pack_tokens + tokens > token_budget or pack_questions + num_questions > max_questions):
+            yield pack
+            pack, pack_tokens, pack_questions = [], 0, 0
+        pack.append((chunk, num_questions))
+        pack_tokens += tokens
+        pack_questions += num_questions
+
+    if pack:
+        yield pack
 
 
 class QnAGenerator:
-    def __init__(self, api_type, api_key=None):
+    def __init__(self, api_type, api_key=None, response_cache=None, bypass_cache=False, output_format="text",
+                 prompt=None, system_prompt=None, fake_behavior=None, base_url=None, model=None,
+                 max_connections=DEFAULT_MAX_CONNECTIONS, hedging_policy=None, metrics=None,
+                 control=None):
         """
-        Initialisiert den QnAGenerator für OpenAI, Gemini oder Manuell.
+        Initialisiert den QnAGenerator für OpenAI, Gemini, Manuell oder den simulierten Provider ("fake").
+        prompt/system_prompt: in der GUI gesetzte Vorlagen; ohne prompt gilt die Vorlage aus data/prompts.
+        fake_behavior: Latenz und Fehlerquoten des simulierten Providers (nlp.fake_provider.FakeBehavior).
+        base_url/model: OpenAI-kompatibler Endpunkt (z. B. lokaler Inferenzserver) und Modellname.
+        max_connections: Größe des gemeinsamen Verbindungspools, passend zur Anzahl paralleler Anfragen.
+        hedging_policy: nlp.hedging.HedgingPolicy für Duplikate langsamer Anfragen und Failover (optional).
+        metrics: nlp.metrics.UsageMetrics, in das jede Anfrage eingetragen wird (mehrere Generatoren können
+                 eines teilen, z. B. mit dem Ausweich-Provider); ohne Angabe ein eigenes.
+        control: nlp.generation_engine.JobControl; nach einem Abbruch startet kein Versuch mehr
+                 und laufende Streams werden geschlossen (GenerationCancelled).
+        Mit einem ResponseCache werden unveränderte Anfragen ohne API-Aufruf beantwortet;
+        bypass_cache=True fragt trotzdem neu an und überschreibt die gespeicherten Antworten.
+        output_format="json" nutzt den JSON-Modus der Provider; die Regex-Auswertung bleibt der Rückfall.
         """
-        self.api_type = api_type.lower()  # "openai", "gemini", "manual"
+        if output_format not in ("text", "json"):
+            raise ValueError(f"Unbekanntes Ausgabeformat: {output_format}")
+        self.api_type = api_type.lower()  # "openai", "gemini", "manual", "fake"
         self.api_key = api_key  # API-Schlüssel für OpenAI & Gemini
-        self.client = None
+        self.response_cache = response_cache
+        self.bypass_cache = bypass_cache
+        self.output_format = output_format
+        self.prompt = prompt or None
+        self.system_prompt = system_prompt or None
+        self.hedging_policy = hedging_policy
+        self.control = control
+        # parse_failures: ungültiges JSON (Rückfall auf Regex); empty_responses: bezahlte Antwort ohne Karten
+        # hedged_requests/hedge_prompt_tokens: Zusatzkosten durch Duplikate; hedge_wins: Duplikat war schneller
+        self.stats = {"requests": 0, "prompt_tokens": 0, "packed_requests": 0, "pack_fallbacks": 0,
+                      "parse_failures": 0, "empty_responses": 0, "partial_streams": 0,
+                      "hedged_requests": 0, "hedge_prompt_tokens": 0, "hedge_wins": 0, "failovers": 0}
+        self._stats_lock = threading.Lock()
+        self.metrics = metrics if metrics is not None else UsageMetrics()
+        self._local = threading.local()  # Verbrauch des laufenden Versuchs (je Thread)
+        self.provider = None
+        self.model = None
+        self.rate_limiter = None
+        self.circuit_breaker = None
+        self.retry_policy = RetryPolicy()
 
-        if self.api_type == "openai":
-            openai.api_key = api_key
-            self.client = openai.OpenAI(api_key=api_key)
+        if self.api_type != "manual":
+            options = {"behavior": fake_behavior} if self.api_type == "fake" else {}
+            self.provider = providers.create_provider(
+                self.api_type, api_key=api_key, base_url=base_url, model=model, max_connections=max_connections,
+                **options
+            )
+            self.model = self.provider.model
+
+        if self.model:
+            # Geteilt mit allen anderen Generatoren für denselben Provider und dasselbe Modell
+            self.rate_limiter = rate_limiter.get_limiter(self.api_type, self.model)
+            self.circuit_breaker = retry.get_breaker(self.api_type)
+
+    @property
+    def client(self):
+        """SDK-Client des Providers (prozessweit geteilt; None im manuellen Modus)."""
+        return self.provider.client if self.provider else None
 
-        elif self.api_type == "gemini":
-            #genai.configure(api_key=api_key)
-            self.client = genai.Client(api_key=api_key)
-            self.model = "gemini-2.0-flash"
+    @client.setter
+    def client(self, client):
+        # Ersetzt den Client nur für diesen Generator, z. B. für einen Test-Endpunkt
+        self.provider.client = client
 
     def generate_qna_pairs(self, chunk, num_questions=3):
         """
         Generiert Fragen & Antworten basierend auf dem gewählten Modell.
+        Schlägt die Anfrage endgültig fehl, wird ein ProviderError geworfen.
         """
         logging.debug(f"Generiere QnA-Paare für {self.api_type}...")
 
         # Prompt vorbereiten
-        prompt_template = self.load_dynamic_prompt()
-        formatted_prompt = prompt_template.format(chunk=chunk, num_questions=num_questions)
+        formatted_prompt = self.render_prompt(chunk, num_questions)
+        if self.output_format == "json":
+            formatted_prompt += JSON_INSTRUCTIONS
 
         # API-Anfrage je nach Modell
-        response_text = ""
-        if self.api_type == "openai":
-            response_text = self.call_openai(formatted_prompt)
-        elif self.api_type == "gemini":
-            response_text = self.call_gemini(formatted_prompt)
-        elif self.api_type == "manual":
-            response_text = "⚠ Manuelle Verarbeitung – Bitte Antwort eingeben."
-        else:
-            raise ValueError(f"Unbekannter API-Typ: {self.api_type}")
+        response_text = self.request(formatted_prompt)
 
         # **🔍 Antwort analysieren & Fragen-Antworten extrahieren**
-        qna_pairs = self.extract_qna_pairs(response_text)
+        qna_pairs = self.parse_response(response_text)
 
         logging.debug(f"📊 {len(qna_pairs)} QnA-Paare extrahiert: {qna_pairs}")
 
         return qna_pairs
 
-    def call_openai(self, prompt):
-        """Sendet den Prompt an OpenAI GPT-3.5 Turbo."""
+    def generate_qna_pairs_streaming(self, chunk, num_questions=3, on_card=None):
+        """
+        Wie generate_qna_pairs, aber die Antwort wird gestreamt und jedes fertige Paar sofort an
+        on_card(pair) übergeben (im JSON-Modus jede geschlossene Karte). Sobald num_questions Paare
+        vorliegen, wird der Stream beendet. Bricht der Stream nach den ersten Karten ab, werden diese
+        zurückgegeben (Teilergebnis, stats["partial_streams"]) statt eines Fehlers.
+        """
+        stream = getattr(self, f"stream_{self.api_type}", self.stream_provider) if self.provider else None
+        if stream is None or self.hedging_policy is not None:
+            # Beim Hedging zählt nur die schnellere vollständige Antwort
+            # → ohne Streaming anfragen und danach alle Karten melden
+            qna_pairs = self.generate_qna_pairs(chunk, num_questions=num_questions)
+            for pair in qna_pairs:
+                if on_card:
+                    on_card(pair)
+            return qna_pairs
+
+        logging.debug(f"Generiere QnA-Paare für {self.api_type} (Streaming)...")
+        formatted_prompt = self.render_prompt(chunk, num_questions)
+        if self.output_format == "json":
+            formatted_prompt += JSON_INSTRUCTIONS
+        qna_pairs = []
+        stream_state = {"stopped_early": False}
+
+        def emit(pair):
+            if len(qna_pairs) < num_questions:
+                qna_pairs.append(pair)
+                if on_card:
+                    on_card(pair)
+
+        def call(prompt):
+            if self.output_format == "json":
+                parser = IncrementalCardParser()
+            else:
+                parser = IncrementalQnAParser(self.extract_qna_pairs)
+            parts = []
+            pieces = stream(prompt)
+            try:
+                for text in pieces:
+                    self.check_cancelled()
+                    parts.append(text)
+                    for pair in parser.feed(text):
+                        emit(pair)
+                    if len(qna_pairs) >= num_questions:
+                        logging.debug(f"⏹ {num_questions} Paare erhalten, Stream wird vorzeitig beendet.")
+                        stream_state["stopped_early"] = True
+                        break
+                else:
+                    for pair in parser.finish():
+                        emit(pair)
+            except ProviderError as e:
+                if qna_pairs:
+                    # Bereits ausgegebene Karten würden bei einer Wiederholung doppelt erscheinen
+                    raise ProviderError(f"Stream nach {len(qna_pairs)} Karten abgebrochen: {e}",
+                                        provider=self.api_type, status=e.status, retryable=False) from e
+                raise
+            finally:
+                close = getattr(pieces, "close", None)
+                if close:
+                    close()  # Beendet die HTTP-Antwort sofort (vorzeitiges Ende oder Abbruch)
+            return "".join(parts)
+
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",  # Kostengünstigere Alternative
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=1000,
-                temperature=0.7
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            logging.error(f"❌ OpenAI API-Fehler: {e}")
-            return "⚠ Fehler bei OpenAI API-Aufruf."
+            # Ein vorzeitig beendeter Stream ist abgeschnitten (im JSON-Modus kein gültiges JSON) → nicht speichern
+            response_text = self.send_cached(call, formatted_prompt,
+                                             cacheable=lambda text: not stream_state["stopped_early"])
+        except ProviderError as e:
+            if not qna_pairs:
+                raise
+            # Die Karten wurden schon über on_card angezeigt → sie sind das Ergebnis des Chunks,
+            # damit Anzeige, Rückgabe und Checkpoint übereinstimmen
+            logging.warning(f"⚠ {e} – {len(qna_pairs)} Karten werden als Teilergebnis übernommen.")
+            with self._stats_lock:
+                self.stats["partial_streams"] += 1
+            return qna_pairs
+        if not qna_pairs:
+            # Cache-Treffer (die gespeicherte Antwort wurde nicht gestreamt) oder im Stream keine gültige Karte:
+            # vollständige Auswertung, im JSON-Modus mit Rückfall auf die Textauswertung
+            for pair in self.parse_response(response_text):
+                emit(pair)
+
+        logging.debug(f"📊 {len(qna_pairs)} QnA-Paare extrahiert: {qna_pairs}")
+        return qna_pairs
+
+    def generate_packed(self, items):
+        """
+        Erzeugt Karten für mehrere kleine Chunks mit einer einzigen Anfrage.
+        items: Liste von (chunk, num_questions); Rückgabe: eine Liste von QnA-Paaren je Chunk.
+        Abschnitte, die in der Antwort fehlen oder keine Paare enthalten, werden einzeln nachgefragt.
+        """
+        if len(items) == 1:
+            chunk, num_questions = items[0]
+            return [self.generate_qna_pairs(chunk, num_questions=num_questions)]
 
+        logging.debug(f"Generiere QnA-Paare für {len(items)} gebündelte Chunks...")
+        packed_chunk = "\n\n".join(f"### Abschnitt {n}\n{chunk}" for n, (chunk, _) in enumerate(items, start=1))
+        plan = ", ".join(f"Abschnitt {n}: {num_questions}" for n, (_, num_questions) in enumerate(items, start=1))
+        total_questions = sum(num_questions for _, num_questions in items)
+
+        formatted_prompt = self.render_prompt(packed_chunk, total_questions)
+        formatted_prompt += PACKED_INSTRUCTIONS.format(count=len(items), plan=plan)
+        if self.output_format == "json":
+            formatted_prompt += JSON_INSTRUCTIONS + PACKED_JSON_INSTRUCTIONS
+
+        with self._stats_lock:
+            self.stats["packed_requests"] += 1
+        sections = self.packed_sections(self.request(formatted_prompt))
+
+        results = []
+        for n, (chunk, num_questions) in enumerate(items, start=1):
+            qna_pairs = sections.get(n, [])
+            if not qna_pairs:
+                # Antwort für diesen Abschnitt nicht auswertbar → Chunk einzeln anfragen
+                logging.warning(f"⚠ Abschnitt {n} der gebündelten Antwort fehlt, Chunk wird einzeln angefragt.")
+                with self._stats_lock:
+                    self.stats["pack_fallbacks"] += 1
+                qna_pairs = self.generate_qna_pairs(chunk, num_questions=num_questions)
+            results.append(qna_pairs)
+        return results
+
+    def packed_sections(self, response_text):
+        """Ordnet die Karten einer gebündelten Antwort ihren Abschnitten zu: {Nr: [Paare]}."""
+        if self.output_format == "json":
+            try:
+                sections = {}
+                for card in parse_cards(response_text):
+                    section = card.pop("section", None)
+                    sections.setdefault(section, []).append(card)
+                return sections
+            except CardFormatError as e:
+                self._count_parse_failure(e)
+
+        return {n: self.extract_qna_pairs(text) for n, text in self.split_packed_response(response_text).items()}
+
+    def parse_response(self, response_text):
+        """
+        Wertet eine Antwort aus: im JSON-Modus mit dem validierenden Parser, sonst bzw. als Rückfall per Regex.
+        Fehlschläge werden in stats gezählt.
+        """
+        qna_pairs = None
+        if self.output_format == "json":
+            try:
+                qna_pairs = [{"question": card["question"], "answer": card["answer"]}
+                             for card in parse_cards(response_text)]
+            except CardFormatError as e:
+                self._count_parse_failure(e)
 
-    def call_gemini(self, prompt):
-        """Sendet den Prompt an Gemini (Google AI)."""
+        if qna_pairs is None:
+            qna_pairs = self.extract_qna_pairs(response_text)
+        if not qna_pairs and self.api_type != "manual":
+            with self._stats_lock:
+                self.stats["empty_responses"] += 1
+        return qna_pairs
+
+    def _count_parse_failure(self, error):
+        logging.warning(f"⚠ JSON-Antwort ungültig ({error}), Rückfall auf Textauswertung.")
+        with self._stats_lock:
+            self.stats["parse_failures"] += 1
+
+    def request_params(self):
+        """Sampling-Parameter der Anfrage inklusive JSON-Optionen; gehen auch in den Cache-Schlüssel ein."""
+        params = dict(self.provider.sampling_params)
+        if self.output_format == "json":
+            params.update(self.provider.json_params)
+        return params
+
+    @staticmethod
+    def split_packed_response(response_text):
+        """Teilt eine gebündelte Antwort an den '### Abschnitt <Nr>'-Zeilen auf: {Nr: Text}."""
+        sections = {}
+        matches = list(SECTION_PATTERN.finditer(response_text))
+        for i, match in enumerate(matches):
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(response_text)
+            sections[int(match.group(1))] = response_text[match.end():end]
+        return sections
+
+    def request(self, prompt):
+        """Sendet einen fertigen Prompt an das gewählte Modell und gibt den Antworttext zurück."""
+        if self.api_type == "manual":
+            return "⚠ Manuelle Verarbeitung – Bitte Antwort eingeben."
+        return self.send_cached(self.provider_call(), prompt)
+
+    def provider_call(self):
+        """Einstiegspunkt für den Provider dieses Generators (call_openai, call_gemini, ... oder call_provider)."""
+        return getattr(self, f"call_{self.api_type}", self.call_provider)
+
+    def cancellable_call(self, call, cancelled):
+        """
+        Für das Hedging: `call` als gestreamte Anfrage, die zwischen zwei Stücken `cancelled` prüft.
+        Hat die Anfrage das Rennen verloren, wird der Stream geschlossen und damit die HTTP-Anfrage beendet,
+        statt die vollständige Antwort abzuwarten (und zu bezahlen). Ersetzte Einstiegspunkte (Tests,
+        Benchmarks) werden unverändert aufgerufen.
+        """
+        if getattr(call, "__func__", None) is not QnAGenerator.call_provider:
+            return call
+        stream = getattr(self, f"stream_{self.api_type}", self.stream_provider)
+
+        def call_until_cancelled(prompt):
+            pieces = stream(prompt)
+            parts = []
+            try:
+                for text in pieces:
+                    if cancelled.is_set():
+                        raise hedging.HedgeCancelled(provider=self.api_type)
+                    self.check_cancelled()  # Abbruch durch den Nutzer schließt den Stream ebenfalls
+                    parts.append(text)
+            finally:
+                close = getattr(pieces, "close", None)
+                if close:
+                    close()
+            return "".join(parts)
+
+        return call_until_cancelled
+
+    def estimate_tokens(self, prompt):
+        """Schätzt den TPM-Verbrauch einer Anfrage: Prompt-Tokens plus maximale Antwortlänge."""
+        try:
+            prompt_tokens = tokenizer.count_tokens(prompt)
+        except Exception:
+            prompt_tokens = len(prompt) // 4 + 1  # Faustregel, falls das Encoding nicht geladen werden kann
+        return prompt_tokens + MAX_OUTPUT_TOKENS
+
+    def send_cached(self, call, prompt, cacheable=None):
+        """
+        Beantwortet den Prompt aus dem Antwort-Cache oder sendet ihn und speichert die Antwort.
+        cacheable(text): optionale Prüfung; liefert sie False (z. B. abgeschnittener Stream), wird nicht gespeichert.
+        """
+        if self.response_cache is None:
+            return self.send(call, prompt)
+
+        key = self.response_cache.make_key(
+            self.api_type, self.model, prompt, system_prompt=self.system_prompt, params=self.request_params()
+        )
+        if not self.bypass_cache:
+            start = time.perf_counter()
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                logging.debug("💾 Antwort aus dem Cache.")
+                self.metrics.record_call(self.api_type, self.model, cache="hit", attempts=0,
+                                         latency=time.perf_counter() - start)
+                return cached
+
+        response_text = self.send(call, prompt)
+        if not self.has_cards(response_text):
+            # Leere oder unbrauchbare Antwort nicht speichern, sonst käme sie bei jedem Lauf kostenlos wieder
+            logging.debug("💾 Antwort ohne Karten wird nicht im Cache gespeichert.")
+        elif cacheable is None or cacheable(response_text):
+            self.response_cache.put(key, response_text)
+        return response_text
+
+    def has_cards(self, response_text):
+        """Ob die Antwort mindestens eine Karte enthält; anders als parse_response ohne Zählung in stats."""
+        if not response_text:
+            return False
+        if self.output_format == "json":
+            try:
+                return bool(parse_cards(response_text))
+            except CardFormatError:
+                pass
+        return bool(self.extract_qna_pairs(response_text))
+
+    def send(self, call, prompt):
+        """Sendet den Prompt, mit Hedging und Failover, sofern eine HedgingPolicy gesetzt ist."""
+        if self.hedging_policy is None:
+            return self.send_with_retry(call, prompt)
+        return self.hedging_policy.send(self, call, prompt)
+
+    def send_with_retry(self, call, prompt, cancelled=None, hedge=False):
+        """
+        Sendet den Prompt über `call`, sobald Rate-Limit und Circuit-Breaker es erlauben.
+        - 429: drosseln, bis Retry-After warten und erneut senden (bis RATE_LIMIT_RETRIES)
+        - wiederholbare Fehler (Timeout, Verbindung, 5xx): Backoff mit Jitter laut retry_policy
+        - endgültige Fehler und erschöpfte Wiederholungen: ProviderError an den Aufrufer
+        cancelled: threading.Event; ist es gesetzt (Hedging-Rennen verloren), wird kein weiterer Versuch gestartet.
+        Jeder Aufruf wird mit Verbrauch, Latenz und Versuchen in self.metrics eingetragen (hedge: Duplikat).
+        """
+        tokens = self.estimate_tokens(prompt)
+        attempt = {"attempts": 0, "latency": None, "usage": {}}
+        start = time.perf_counter()
+        status = "error"
+        response_text = None
         try:
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=[{"role": "user", "parts": [{"text": prompt}]}],
-                config={
-                    "temperature": 0.5,
-                    "top_p": 0.9,
-                    "max_output_tokens": 1000
-                }
+            response_text = self._send_attempts(call, prompt, tokens, cancelled, attempt)
+            status = "ok"
+            return response_text
+        except (hedging.HedgeCancelled, GenerationCancelled):
+            status = "cancelled"
+            raise
+        finally:
+            usage = attempt["usage"]
+            estimated = status == "ok" and "prompt_tokens" not in usage
+            if estimated:
+                # Provider hat keinen Verbrauch gemeldet (z. B. abgebrochener Stream) → Schätzung
+                usage = {"prompt_tokens": tokens - MAX_OUTPUT_TOKENS, "completion_tokens": len(response_text) // 4 + 1}
+            self.metrics.record_call(
+                self.api_type, self.model, status=status, cache=self.cache_status(), attempts=attempt["attempts"],
+                latency=attempt["latency"], total_seconds=time.perf_counter() - start,
+                prompt_tokens=usage.get("prompt_tokens", 0), completion_tokens=usage.get("completion_tokens", 0),
+                estimated=estimated, hedge=hedge,
             )
-            return response.text
-        except Exception as e:
-            logging.error(f"❌ Gemini API-Fehler: {e}")
-            return "⚠ Fehler bei Gemini API-Aufruf."
-        
+
+    def _send_attempts(self, call, prompt, tokens, cancelled, attempt):
+        """Versuchsschleife von send_with_retry; trägt Versuche, Latenz und Verbrauch in `attempt` ein."""
+        latency_tracker = hedging.get_tracker(self.api_type, self.model)
+        rate_limited = 0
+        failures = 0
+        while True:
+            if cancelled is not None and cancelled.is_set():
+                raise hedging.HedgeCancelled(provider=self.api_type)
+            self.check_cancelled()
+            probe = self.circuit_breaker.before_call()
+            try:
+                waited = self.rate_limiter.acquire(tokens)
+                if waited:
+                    logging.debug(f"⏳ {waited:.2f} s auf freie Kapazität gewartet ({tokens} Tokens geschätzt).")
+                    self.check_cancelled()  # Während der Wartezeit abgebrochen → nicht mehr senden
+                with self._stats_lock:
+                    self.stats["requests"] += 1
+                    self.stats["prompt_tokens"] += tokens - MAX_OUTPUT_TOKENS
+                attempt["attempts"] += 1
+                attempt["usage"] = self._local.usage = {}
+                start = time.perf_counter()
+                try:
+                    response_text = call(prompt)
+                except RateLimitExceeded as e:
+                    rate_limited += 1
+                    if rate_limited > RATE_LIMIT_RETRIES:
+                        raise ProviderError(str(e), provider=self.api_type, status=429, retryable=True) from e
+                    self.rate_limiter.throttle(e.retry_after)
+                    continue
+                except ProviderError as e:
+                    if not e.retryable:
+                        raise
+                    self.check_cancelled()  # Kein Fehler des Providers, sondern Folge des Abbruchs
+                    self.circuit_breaker.record_failure()
+                    probe = False  # Urteil gefällt; während des Backoffs darf ein anderer Aufruf proben
+                    failures += 1
+                    if failures >= self.retry_policy.max_attempts:
+                        logging.error(f"❌ {self.api_type}: {failures} Versuche fehlgeschlagen: {e}")
+                        raise
+                    delay = self.retry_policy.delay(failures)
+                    logging.warning(f"⚠ {self.api_type}: {e} – neuer Versuch in {delay:.1f} s.")
+                    self.retry_policy.sleep(delay)
+                    continue
+                finally:
+                    self._local.usage = None
+                if response_text is None:
+                    # z. B. Gemini bei einer vom Sicherheitsfilter blockierten Antwort (response.text ist None)
+                    raise ProviderError(f"{self.api_type}: Antwort ohne Text erhalten (z. B. blockiert).",
+                                        provider=self.api_type)
+                attempt["latency"] = time.perf_counter() - start
+                latency_tracker.record(attempt["latency"])
+                self.rate_limiter.record_success()
+                self.circuit_breaker.record_success()
+                return response_text
+            finally:
+                if probe:
+                    # Ohne Erfolg oder Fehler beendete Probe (429, endgültiger Fehler, Abbruch) freigeben
+                    self.circuit_breaker.release_probe()
+
+    def check_cancelled(self):
+        """Wirft GenerationCancelled, wenn der Lauf über self.control abgebrochen wurde."""
+        if self.control is not None:
+            self.control.check()
+
+    def cache_status(self):
+        """Cache-Status gesendeter Anfragen für die Nutzungsdaten: "miss", "bypass" oder "off" (kein Cache)."""
+        if self.response_cache is None:
+            return "off"
+        return "bypass" if self.bypass_cache else "miss"
+
+    def call_provider(self, prompt):
+        """Sendet den Prompt an den Provider und gibt den Antworttext zurück."""
+        return self.provider.complete(prompt, system_prompt=self.system_prompt, params=self.request_params(),
+                                      usage=getattr(self._local, "usage", None))
+
+    def stream_provider(self, prompt):
+        """Wie call_provider, liefert die Antwort aber stückweise, während sie erzeugt wird."""
+        return self.provider.stream(prompt, system_prompt=self.system_prompt, params=self.request_params(),
+                                    usage=getattr(self._local, "usage", None))
+
+    # Einstiegspunkte je Provider; Tests und Benchmarks ersetzen sie einzeln
+    call_openai = call_gemini = call_fake = call_provider
+    stream_openai = stream_gemini = stream_fake = stream_provider
 
     def extract_qna_pairs(self, response_text):
         """
@@ -124,12 +578,16 @@ class QnAGenerator:
 
 
     def load_dynamic_prompt(self):
-        """Lädt den dynamischen Prompt für das aktuelle Modell."""
-        prompt_path = f"data/prompts/dynamic_prompt_{self.api_type}.json"
-        try:
-            with open(prompt_path, "r", encoding="utf-8") as file:
-                data = json.load(file)
-                return data.get("template", "")  # Holt den Text aus dem JSON
-        except FileNotFoundError:
-            logging.error(f"⚠ Prompt-Datei nicht gefunden: {prompt_path}")
-            return "Hier ist ein Textabschnitt: \"{chunk}\". Erstelle Fragen und Antworten."
+        """
+        Gibt die Vorlage für das aktuelle Modell zurück: den Prompt aus der GUI, sonst die Datei
+        data/prompts/dynamic_prompt_<api>.json aus der Registry (ohne erneutes Lesen pro Chunk).
+        """
+        if self.prompt:
+            return self.prompt
+        return prompt_registry.get_registry().text(f"dynamic_prompt_{self.api_type}") or \
+            prompt_registry.DEFAULT_TEMPLATE
+
+    def render_prompt(self, chunk, num_questions):
+        """Setzt Chunk und Fragenanzahl in die (einmal vorkompilierte) Vorlage ein."""
+        template = prompt_registry.compile_template(self.load_dynamic_prompt())
+        return template.render(chunk=chunk, num_questions=num_questions)
@@ -0,0 +1,153 @@
+"""
+Prozessweiter Rate-Limiter für die API-Anfragen
+- Je Provider und Modell ein Token-Bucket für Anfragen pro Minute (RPM) und Tokens pro Minute (TPM)
+- acquire() wartet, bis beide Buckets genug Kapazität haben, statt die Anfrage scheitern zu lassen
+- Nach einer 429-Antwort wird bis zum Retry-After-Zeitpunkt pausiert und die Rate halbiert;
+  jede erfolgreiche Anfrage hebt sie schrittweise wieder bis zum konfigurierten Limit an
+- Wartezeiten und Drosselungen werden in `stats` mitgezählt
+"""
+
+import logging
+import threading
+import time
+
+# Limits je (Provider, Modell); "*" gilt für alle Modelle eines Providers ohne eigenen Eintrag
+RATE_LIMITS = {
+    ("openai", "gpt-3.5-turbo"): {"rpm": 3500, "tpm": 200000},
+    ("openai", "*"): {"rpm": 500, "tpm": 30000},
+    ("gemini", "gemini-2.0-flash"): {"rpm": 15, "tpm": 1000000},
+    ("gemini", "*"): {"rpm": 10, "tpm": 250000},
+    ("fake", "*"): {"rpm": 6000, "tpm": 10000000},  # Simulierter Provider; Lasttests setzen eigene Limits
+}
+DEFAULT_LIMITS = {"rpm": 60, "tpm": 60000}
+
+MIN_RATE_FACTOR = 0.1  # Untergrenze der Drosselung nach wiederholten 429-Antworten
+RECOVERY_STEP = 0.05  # Anstieg des Faktors je erfolgreicher Anfrage
+DEFAULT_RETRY_AFTER = 1.0  # Pause in Sekunden, wenn eine 429-Antwort keinen Retry-After-Header hat
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+class RateLimitExceeded(Exception):
+    """Der Provider hat mit 429 geantwortet; retry_after ist die empfohlene Pause in Sekunden (oder None)."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def retry_after_from_response(response):
+    """Liest Retry-After (Sekunden) bzw. retry-after-ms aus den Headern einer HTTP-Antwort."""
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass  # HTTP-Datum oder ungültiger Wert → Standardpause
+    return None
+
+
+class TokenBucket:
+    def __init__(self, per_minute, clock=time.monotonic):
+        """Bucket mit Kapazität `per_minute`, der sich gleichmäßig über eine Minute wieder auffüllt."""
+        self.capacity = float(per_minute)
+        self.clock = clock
+        self.level = self.capacity
+        self.updated = clock()
+
+    def _refill(self, rate_factor):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60 * rate_factor)
+        self.updated = now
+
+    def wait_time(self, amount, rate_factor=1.0):
+        """Sekunden, bis `amount` verfügbar ist (0, wenn sofort)."""
+        self._refill(rate_factor)
+        amount = min(amount, self.capacity)  # Anfragen über der Kapazität würden sonst ewig warten
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / (self.capacity / 60 * rate_factor)
+
+    def take(self, amount):
+        self.level -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    def __init__(self, rpm, tpm, clock=time.monotonic, sleep=time.sleep):
+        self.requests = TokenBucket(rpm, clock)
+        self.tokens = TokenBucket(tpm, clock)
+        self.clock = clock
+        self.sleep = sleep
+        self.rate_factor = 1.0
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "waits": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0, "throttled": 0}
+
+    def acquire(self, tokens):
+        """Blockiert, bis eine Anfrage mit geschätzt `tokens` Tokens gesendet werden darf. Gibt die Wartezeit zurück."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                delay = max(
+                    self.paused_until - self.clock(),
+                    self.requests.wait_time(1, self.rate_factor),
+                    self.tokens.wait_time(tokens, self.rate_factor),
+                )
+                if delay <= 0:
+                    self.requests.take(1)
+                    self.tokens.take(tokens)
+                    self._record_wait(waited)
+                    return waited
+            self.sleep(delay)
+            waited += delay
+
+    def _record_wait(self, waited):
+        self.stats["requests"] += 1
+        if waited > 0:
+            self.stats["waits"] += 1
+            self.stats["wait_seconds"] += waited
+            self.stats["max_wait_seconds"] = max(self.stats["max_wait_seconds"], waited)
+
+    def throttle(self, retry_after=None):
+        """Nach einer 429-Antwort: alle Anfragen bis Retry-After pausieren und die Rate halbieren."""
+        pause = DEFAULT_RETRY_AFTER if retry_after is None else max(0.0, retry_after)
+        with self.lock:
+            self.paused_until = max(self.paused_until, self.clock() + pause)
+            self.rate_factor = max(MIN_RATE_FACTOR, self.rate_factor / 2)
+            self.stats["throttled"] += 1
+        logging.warning(f"⚠ Rate-Limit erreicht – Pause {pause:.1f} s, Rate auf {self.rate_factor:.0%} gesenkt.")
+
+    def record_success(self):
+        """Nach einer erfolgreichen Anfrage die Drosselung schrittweise zurücknehmen."""
+        with self.lock:
+            self.rate_factor = min(1.0, self.rate_factor + RECOVERY_STEP)
+
+
+def limits_for(provider, model):
+    return RATE_LIMITS.get((provider, model)) or RATE_LIMITS.get((provider, "*")) or DEFAULT_LIMITS
+
+
+def get_limiter(provider, model):
+    """Gibt den gemeinsamen Limiter für Provider und Modell zurück (alle Generatoren teilen ihn)."""
+    key = (provider, model)
+    with _limiters_lock:
+        if key not in _limiters:
+            limits = limits_for(provider, model)
+            _limiters[key] = RateLimiter(limits["rpm"], limits["tpm"])
+            logging.debug(f"Rate-Limiter für {provider}/{model}: {limits}")
+        return _limiters[key]
+
+
+def all_stats():
+    """Wartezeit-Metriken aller Limiter, z. B. für das Logging nach einem Lauf."""
+    with _limiters_lock:
+        return {f"{provider}/{model}": dict(limiter.stats) for (provider, model), limiter in _limiters.items()}
+
+
+def reset():
+    """Verwirft alle Limiter (für Tests)."""
+    with _limiters_lock:
+        _limiters.clear()
@@ -0,0 +1,120 @@
+"""
+Persistenter Antwort-Cache für die LLM-Anfragen (SQLite)
+- Schlüssel: Hash aus Provider, Modell, vollständigem Prompt, System-Prompt und Sampling-Parametern
+- Wert: der rohe Antworttext des Modells (die Karten werden daraus wie gewohnt extrahiert)
+- Verdrängung nach Alter (max_age) und Größe (zuletzt benutzte Einträge bleiben)
+- Trefferquote über `stats` bzw. hit_rate()
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024  # 100 MB
+DEFAULT_MAX_AGE = 30 * 24 * 3600  # 30 Tage
+
+
+class ResponseCache:
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        """Öffnet (bzw. erstellt) den Cache unter cache_dir/response_cache.sqlite."""
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, "response_cache.sqlite")
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+        self._lock = threading.Lock()
+
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, response TEXT, size INTEGER, created REAL, last_access REAL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        """Öffnet eine Verbindung, bestätigt die Änderungen und schließt sie wieder."""
+        db = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    @staticmethod
+    def make_key(provider, model, prompt, system_prompt=None, params=None):
+        """Bildet den Cache-Schlüssel aus allem, was die Antwort des Modells beeinflusst."""
+        key_data = {
+            "provider": provider,
+            "model": model,
+            "prompt": prompt,
+            "system_prompt": system_prompt,
+            "params": params or {},
+        }
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Gibt die gespeicherte Antwort zurück oder None bei einem Fehlzugriff bzw. abgelaufenem Eintrag."""
+        now = time.time()
+        with self._lock, self._connect() as db:
+            row = db.execute("SELECT response, created FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.max_age:
+                db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.stats["expired"] += 1
+                row = None
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+            self.stats["hits"] += 1
+        return row[0]
+
+    def put(self, key, response):
+        """Speichert eine Antwort und verdrängt bei Bedarf alte bzw. lange nicht benutzte Einträge."""
+        if not response:
+            return  # Leere Antworten (oder None) werden nie gespeichert
+        size = len(response.encode("utf-8"))
+        now = time.time()
+
+        with self._lock, self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO entries (key, response, size, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now),
+            )
+            self._evict(db, now)
+
+    def _evict(self, db, now):
+        """Löscht abgelaufene Einträge und dann die am längsten nicht benutzten bis zur Größengrenze."""
+        expired = db.execute("DELETE FROM entries WHERE created < ?", (now - self.max_age,)).rowcount
+        self.stats["expired"] += expired
+
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for key, size in db.execute("SELECT key, size FROM entries ORDER BY last_access ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            self.stats["evictions"] += 1
+
+    def hit_rate(self):
+        """Anteil der Treffer an allen Zugriffen dieses Laufs (0.0, solange es keine gab)."""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def invalidate(self):
+        """Leert den gesamten Cache."""
+        with self._lock, self._connect() as db:
+            db.execute("DELETE FROM entries")
+        logging.info("Antwort-Cache wurde geleert.")
+
+    def size_bytes(self):
+        """Aktuelle Größe aller gespeicherten Einträge in Bytes."""
+        with self._connect() as db:
+            return db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
@@ -0,0 +1,136 @@
+"""
+Wiederholungslogik für Provider-Aufrufe
+- ProviderError: strukturierter Fehler mit Provider, HTTP-Status und Einstufung (wiederholbar oder endgültig)
+- RetryPolicy: exponentielles Backoff mit vollem Jitter
+- CircuitBreaker: nach mehreren Fehlern in Folge wird der Provider eine Zeit lang nicht mehr angefragt,
+  danach lässt ein einzelner Probeaufruf (halb offen) ihn wieder zu oder öffnet erneut
+"""
+
+import logging
+import random
+import threading
+import time
+
+MAX_ATTEMPTS = 4  # Erster Versuch plus drei Wiederholungen
+BASE_DELAY = 1.0  # Sekunden vor der ersten Wiederholung (vor Jitter)
+MAX_DELAY = 30.0
+FAILURE_THRESHOLD = 5  # Fehler in Folge, nach denen der Breaker öffnet
+RESET_TIMEOUT = 30.0  # Sekunden, bis ein offener Breaker einen Probeaufruf zulässt
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+class ProviderError(Exception):
+    """Fehlgeschlagener Provider-Aufruf; retryable gibt an, ob ein erneuter Versuch sinnvoll ist."""
+
+    def __init__(self, message, provider=None, status=None, retryable=False):
+        super().__init__(message)
+        self.provider = provider
+        self.status = status
+        self.retryable = retryable
+
+    def to_dict(self):
+        return {
+            "type": type(self).__name__,
+            "provider": self.provider,
+            "status": self.status,
+            "retryable": self.retryable,
+            "message": str(self),
+        }
+
+
+class CircuitOpenError(ProviderError):
+    """Der Circuit-Breaker des Providers ist offen; es wird gar nicht erst angefragt."""
+
+
+def is_retryable_status(status):
+    """Zeitüberschreitung, Konflikte und Serverfehler sind vorübergehend, andere 4xx endgültig."""
+    return status is not None and (status in (408, 409) or status >= 500)
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts=MAX_ATTEMPTS, base_delay=BASE_DELAY, max_delay=MAX_DELAY,
+                 sleep=time.sleep, rng=None):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+
+    def delay(self, attempt):
+        """Wartezeit vor der Wiederholung nach dem `attempt`-ten Fehlversuch (ab 1), mit vollem Jitter."""
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT,
+                 clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        """
+        Wirft CircuitOpenError, solange der Breaker offen ist; halb offen darf genau ein Aufruf durch.
+        Gibt True zurück, wenn dieser Aufruf der Probeaufruf ist (siehe release_probe).
+        """
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return False
+            if state == "half-open" and not self.probing:
+                self.probing = True
+                return True
+            raise CircuitOpenError(f"{self.name} ist vorübergehend nicht erreichbar (Circuit-Breaker offen).",
+                                   provider=self.name, retryable=False)
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def release_probe(self):
+        """
+        Beendet einen Probeaufruf ohne Urteil über den Provider (429, endgültiger Fehler, Abbruch):
+        der Breaker bleibt halb offen und der nächste Aufruf darf erneut proben.
+        """
+        with self.lock:
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self.probing:
+                    logging.error(f"❌ Circuit-Breaker für {self.name} geöffnet nach {self.failures} Fehlern.")
+                self.opened_at = self.clock()
+                self.probing = False
+
+
+def get_breaker(name):
+    """Gibt den gemeinsamen Circuit-Breaker für einen Provider zurück."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def reset():
+    """Verwirft alle Circuit-Breaker (für Tests)."""
+    with _breakers_lock:
+        _breakers.clear()
@@ -0,0 +1,98 @@
+"""
+Inkrementelle Extraktion von Frage-Antwort-Paaren aus einer gestreamten Antwort
+- feed() nimmt die Textstücke in der Reihenfolge entgegen, in der sie vom Modell kommen
+- Ein Paar gilt als fertig, sobald die nächste "Frage:" beginnt; das letzte Paar liefert finish()
+- Die eigentliche Auswertung eines fertigen Abschnitts übernimmt dieselbe Funktion wie ohne Streaming
+- JSON-Modus (IncrementalCardParser): eine Karte ist fertig, sobald ihr Objekt im Array geschlossen ist
+"""
+
+import json
+import logging
+import re
+
+from nlp.card_parser import CardFormatError, parse_card
+
+QUESTION_MARKER = re.compile(r"\bFrage(?:\s*\d*)?\s*\**\s*:", re.IGNORECASE)
+
+
+class IncrementalQnAParser:
+    def __init__(self, extract):
+        """extract: Funktion Text → Liste von {"question", "answer"} (z. B. QnAGenerator.extract_qna_pairs)."""
+        self.extract = extract
+        self.buffer = ""
+
+    def feed(self, text):
+        """Hängt ein Textstück an und gibt alle dadurch abgeschlossenen Paare zurück."""
+        self.buffer += text
+        markers = [match.start() for match in QUESTION_MARKER.finditer(self.buffer)]
+        if len(markers) < 2:
+            return []
+
+        # Alles vor dem letzten Marker ist abgeschlossen; ab dem letzten Marker kann noch Text folgen
+        complete, self.buffer = self.buffer[markers[0]:markers[-1]], self.buffer[markers[-1]:]
+        return self.extract(complete) if "antwort" in complete.lower() else []
+
+    def finish(self):
+        """Wertet den Rest nach dem Ende des Streams aus."""
+        rest, self.buffer = self.buffer, ""
+        return self.extract(rest) if QUESTION_MARKER.search(rest) else []
+
+
+class IncrementalCardParser:
+    def __init__(self):
+        """Liest {"cards": [...]} bzw. [...] zeichenweise mit und merkt sich dabei nur den Klammer-Stapel."""
+        self.buffer = ""
+        self.stack = []  # Offene Klammern "{" und "["
+        self.in_string = False
+        self.escaped = False
+        self.card_start = None  # Position des "{" der aktuellen Karte im Puffer
+        self.card_depth = None
+
+    def feed(self, text):
+        """Hängt ein Textstück an und gibt alle dadurch geschlossenen Karten zurück."""
+        start = len(self.buffer)
+        self.buffer += text
+        cards = []
+        for index in range(start, len(self.buffer)):
+            char = self.buffer[index]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                if char == "{" and self.card_start is None and self.stack[-1:] == ["["]:
+                    self.card_start, self.card_depth = index, len(self.stack)
+                self.stack.append(char)
+            elif char in "}]" and self.stack:
+                self.stack.pop()
+                if self.card_start is not None and len(self.stack) == self.card_depth:
+                    card = self._card(self.buffer[self.card_start:index + 1])
+                    if card is not None:
+                        cards.append(card)
+                    self.card_start = None
+
+        # Nur den Text der noch offenen Karte behalten
+        keep = self.card_start if self.card_start is not None else len(self.buffer)
+        self.buffer = self.buffer[keep:]
+        if self.card_start is not None:
+            self.card_start = 0
+        return cards
+
+    def finish(self):
+        """Eine beim Ende des Streams noch offene Karte ist unvollständig und wird verworfen."""
+        self.buffer = ""
+        return []
+
+    @staticmethod
+    def _card(text):
+        try:
+            card = parse_card(json.loads(text))
+        except (json.JSONDecodeError, CardFormatError) as e:
+            logging.warning(f"⚠ Ungültige Karte im Stream übersprungen: {e}")
+            return None
+        return None if card is None else {"question": card["question"], "answer": card["answer"]}
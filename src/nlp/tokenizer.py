@@ -0,0 +1,124 @@
+"""
+Prozessweiter Token-Zähler
+- Der Encoder wird genau einmal geladen (auf Wunsch schon beim Programmstart im Hintergrund)
+- Token-Anzahlen werden in einem LRU-Cache über den Inhalts-Hash gemerkt
+- count_many() zählt viele Texte auf einmal mit der Batch-Kodierung von tiktoken
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import tiktoken  # OpenAI Tokenizer
+
+ENCODING_NAME = "cl100k_base"
+CACHE_SIZE = 8192  # Anzahl gemerkter Token-Zählungen
+BATCH_THREADS = 4  # Threads für tiktoken.encode_batch
+
+_encoding = None
+_encoding_lock = threading.Lock()
+_preload_thread = None
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def get_encoding():
+    """Gibt den gemeinsamen Encoder zurück und lädt ihn beim ersten Aufruf."""
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                _encoding = tiktoken.get_encoding(ENCODING_NAME)
+                logging.debug(f"Tokenizer '{ENCODING_NAME}' geladen.")
+    return _encoding
+
+
+def preload():
+    """Lädt den Encoder in einem Hintergrund-Thread, damit der erste Aufruf nicht warten muss."""
+    global _preload_thread
+    if _encoding is None and _preload_thread is None:
+        _preload_thread = threading.Thread(target=_preload, name="tokenizer-preload", daemon=True)
+        _preload_thread.start()
+    return _preload_thread
+
+
+def _preload():
+    try:
+        get_encoding()
+    except Exception as e:
+        # Nicht fatal: der nächste Aufruf versucht es erneut und meldet den Fehler dort
+        logging.warning(f"⚠ Tokenizer konnte nicht vorgeladen werden: {e}")
+
+
+def _cache_key(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def _lookup(key):
+    """Liest eine Token-Anzahl aus dem Cache (None, falls unbekannt)."""
+    with _cache_lock:
+        count = _cache.get(key)
+        if count is None:
+            _stats["misses"] += 1
+            return None
+        _cache.move_to_end(key)
+        _stats["hits"] += 1
+        return count
+
+
+def _store(key, count):
+    with _cache_lock:
+        _cache[key] = count
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def count_tokens(text):
+    """Zählt die Tokens eines Textes (mit Cache)."""
+    key = _cache_key(text)
+    count = _lookup(key)
+    if count is None:
+        count = len(get_encoding().encode_ordinary(text))
+        _store(key, count)
+    return count
+
+
+def count_many(texts):
+    """
+    Zählt die Tokens vieler Texte auf einmal
+    - Bereits bekannte Texte kommen aus dem Cache
+    - Fehlende (doppelte nur einmal) werden per encode_batch über mehrere Threads kodiert
+    """
+    keys = [_cache_key(text) for text in texts]
+    counts = [_lookup(key) for key in keys]
+
+    missing = {}
+    for key, text, count in zip(keys, texts, counts):
+        if count is None and key not in missing:
+            missing[key] = text
+
+    if missing:
+        encoded = get_encoding().encode_ordinary_batch(list(missing.values()), num_threads=BATCH_THREADS)
+        for key, tokens in zip(missing.keys(), encoded):
+            _store(key, len(tokens))
+            missing[key] = len(tokens)
+
+    return [count if count is not None else missing[key] for key, count in zip(keys, counts)]
+
+
+def cache_info():
+    """Gibt Treffer, Fehlzugriffe und aktuelle Größe des Caches zurück."""
+    with _cache_lock:
+        return {"hits": _stats["hits"], "misses": _stats["misses"], "size": len(_cache)}
+
+
+def clear_cache():
+    """Leert den Cache und setzt die Zähler zurück."""
+    with _cache_lock:
+        _cache.clear()
+        _stats["hits"] = 0
+        _stats["misses"] = 0
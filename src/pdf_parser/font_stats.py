@@ -0,0 +1,88 @@
+"""
+Schriftgrößen-Histogramm für die Überschriftenerkennung
+- Feste Speichergröße: ein numpy-Array mit Bins zu je BIN_WIDTH Punkt
+- Jeder Span zählt mit der Anzahl seiner Zeichen, einzelne große Titel verzerren daher nichts
+- Fließtextgröße = häufigste Größe (Modus), Überschriftsebenen = Cluster oberhalb davon
+"""
+
+import numpy as np
+
+BIN_WIDTH = 0.5  # Punkt
+MAX_FONT_SIZE = 200  # Größere Schriften landen im letzten Bin
+
+
+class FontSizeHistogram:
+    def __init__(self, heading_tolerance=1):
+        self.heading_tolerance = heading_tolerance
+        self.weights = np.zeros(int(MAX_FONT_SIZE / BIN_WIDTH) + 1)
+
+    def add(self, font_size, weight=1):
+        """Zählt eine Schriftgröße mit dem angegebenen Gewicht."""
+        self.weights[self._bin(font_size)] += weight
+
+    def add_spans(self, spans):
+        """Zählt die Spans (Schriftgröße, fett, Text) gewichtet nach Zeichenanzahl."""
+        if not spans:
+            return
+        sizes = np.fromiter((font_size for font_size, _, _ in spans), dtype=float, count=len(spans))
+        chars = np.fromiter((len(text) for _, _, text in spans), dtype=float, count=len(spans))
+        np.add.at(self.weights, self._bin(sizes), chars)
+
+    def _bin(self, font_size):
+        return np.clip(np.rint(np.asarray(font_size) / BIN_WIDTH), 0, len(self.weights) - 1).astype(int)
+
+    @property
+    def total_weight(self):
+        return float(self.weights.sum())
+
+    @property
+    def body_size(self):
+        """Fließtextgröße: häufigste Schriftgröße, gewichtet nach Zeichen (0 ohne Daten)."""
+        if not self.weights.any():
+            return 0
+        return float(np.argmax(self.weights)) * BIN_WIDTH
+
+    def heading_tiers(self):
+        """
+        Überschriftsebenen als Liste von Schriftgrößen, größte zuerst.
+        Benachbarte belegte Bins oberhalb der Fließtextgröße + Toleranz bilden einen Cluster,
+        dessen gewichteter Mittelwert die Größe der Ebene ist.
+        """
+        first_bin = int(np.floor((self.body_size + self.heading_tolerance) / BIN_WIDTH)) + 1
+        tiers = []
+        cluster = []
+        for index in range(first_bin, len(self.weights)):
+            if self.weights[index] > 0:
+                cluster.append(index)
+            elif cluster:
+                tiers.append(self._cluster_size(cluster))
+                cluster = []
+        if cluster:
+            tiers.append(self._cluster_size(cluster))
+        return sorted(tiers, reverse=True)
+
+    def _cluster_size(self, cluster):
+        weights = self.weights[cluster]
+        return float(np.average(np.array(cluster) * BIN_WIDTH, weights=weights))
+
+    def classifier(self):
+        """
+        Erstellt eine Funktion heading_level(font_size, is_bold) mit dem aktuellen Stand:
+        1 = größte Überschriftsebene, None = Fließtext.
+        Fette Schrift in Fließtextgröße gilt als unterste Ebene.
+        """
+        body_size = self.body_size
+        body_bin = int(self._bin(body_size))
+        tiers = self.heading_tiers()
+        threshold = body_size + self.heading_tolerance
+
+        def heading_level(font_size, is_bold):
+            if font_size > threshold and tiers:
+                distances = [abs(font_size - tier) for tier in tiers]
+                return distances.index(min(distances)) + 1
+            # body_size ist die Bin-Mitte (10pt für LaTeX-Fließtext mit 9.9626pt), daher Vergleich über den Bin
+            if font_size > threshold or (is_bold and self._bin(font_size) >= body_bin):
+                return len(tiers) + 1
+            return None
+
+        return heading_level
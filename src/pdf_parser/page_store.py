@@ -0,0 +1,90 @@
+"""
+Seiten-Cache für ein geöffnetes PDF
+- Hält die extrahierten Spans pro Seite, damit bei einem geänderten Seitenbereich
+  nur neue Seiten gelesen werden müssen
+- Optional werden ältere Seiten als JSON auf die Platte ausgelagert (spill_dir),
+  sobald mehr als max_pages_in_memory Seiten im Speicher liegen; ohne spill_dir in ein temporäres
+  Verzeichnis, das mit dem Cache gelöscht wird
+- Ändert sich die Datei (Größe oder Änderungszeit), wird der Cache verworfen
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+
+
+class PageStore:
+    def __init__(self, spill_dir=None, max_pages_in_memory=None):
+        self._temp_dir = None
+        if max_pages_in_memory is not None and not spill_dir:
+            # Ohne Auslagerungsort gingen verdrängte Seiten verloren
+            self._temp_dir = tempfile.TemporaryDirectory(prefix="karteikarten_pages_")
+            spill_dir = self._temp_dir.name
+        self.spill_dir = spill_dir
+        self.max_pages_in_memory = max_pages_in_memory
+        self._pages = OrderedDict()  # Seitennummer (1-basiert) → Spans, zuletzt benutzte am Ende
+        self._spilled = set()
+        self._identity = None
+        self._spill_prefix = ""
+
+    def bind(self, file_path):
+        """Ordnet den Cache einer Datei zu; bei geänderter Datei werden alle Seiten verworfen."""
+        stat = os.stat(file_path)
+        identity = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+        if identity != self._identity:
+            if self._identity is not None:
+                logging.info("PDF wurde geändert, Seiten-Cache wird verworfen.")
+            self.clear()
+            self._identity = identity
+            self._spill_prefix = hashlib.sha1(repr(identity).encode("utf-8")).hexdigest()[:16]
+
+    def __contains__(self, page_num):
+        return page_num in self._pages or page_num in self._spilled
+
+    def __len__(self):
+        return len(self._pages) + len(self._spilled)
+
+    def get(self, page_num):
+        """
+        Gibt die Spans einer Seite zurück (ausgelagerte Seiten werden von der Platte gelesen).
+        None steht für eine Seite ohne Textebene.
+        """
+        if page_num in self._pages:
+            self._pages.move_to_end(page_num)
+            return self._pages[page_num]
+
+        with open(self._spill_path(page_num), "r", encoding="utf-8") as file:
+            spans = json.load(file)
+        return None if spans is None else [tuple(span) for span in spans]
+
+    def put(self, page_num, spans):
+        """Speichert die Spans einer Seite und lagert bei Bedarf die ältesten Seiten aus."""
+        self._pages[page_num] = spans
+        self._pages.move_to_end(page_num)
+        self._spilled.discard(page_num)
+
+        if self.max_pages_in_memory is None:
+            return
+
+        while len(self._pages) > self.max_pages_in_memory:
+            old_page, old_spans = self._pages.popitem(last=False)
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with open(self._spill_path(old_page), "w", encoding="utf-8") as file:
+                json.dump(old_spans, file, ensure_ascii=False)
+            self._spilled.add(old_page)
+
+    def clear(self):
+        """Verwirft alle Seiten, inklusive der ausgelagerten Dateien."""
+        for page_num in self._spilled:
+            try:
+                os.remove(self._spill_path(page_num))
+            except FileNotFoundError:
+                pass
+        self._pages.clear()
+        self._spilled.clear()
+
+    def _spill_path(self, page_num):
+        return os.path.join(self.spill_dir, f"{self._spill_prefix}_{page_num}.json")
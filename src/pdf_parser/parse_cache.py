@@ -0,0 +1,134 @@
+"""
+Persistenter Parse-Cache für PDFs (SQLite)
+- Schlüssel: Inhalts-Hash des PDFs + Seitenbereich + Parser-Parameter
+- Wert: extrahierte Absätze und fertige Chunks
+- Größenbasierte Verdrängung (zuletzt benutzte Einträge bleiben)
+- Ändert sich die Parser-Version, wird der Cache beim Öffnen geleert
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024  # 200 MB
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_hash(file_path):
+    """Berechnet den SHA-256-Hash des Dateiinhalts blockweise."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    def __init__(self, cache_dir, parser_version, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Öffnet (bzw. erstellt) den Cache unter cache_dir/parse_cache.sqlite.
+        Einträge einer anderen Parser-Version werden dabei verworfen.
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, "parse_cache.sqlite")
+        self.parser_version = parser_version
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._file_hashes = {}  # (Pfad, Größe, mtime) → Hash, damit große PDFs nicht mehrfach gehasht werden
+
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, paragraphs TEXT, chunks TEXT, "
+                "size INTEGER, created REAL, last_access REAL)"
+            )
+            db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+            row = db.execute("SELECT value FROM meta WHERE name = 'parser_version'").fetchone()
+            if row is None or row[0] != str(parser_version):
+                if row is not None:
+                    logging.info(f"Parser-Version geändert ({row[0]} → {parser_version}), Parse-Cache wird geleert.")
+                db.execute("DELETE FROM entries")
+                db.execute(
+                    "INSERT OR REPLACE INTO meta (name, value) VALUES ('parser_version', ?)", (str(parser_version),)
+                )
+
+    @contextmanager
+    def _connect(self):
+        """Öffnet eine Verbindung, bestätigt die Änderungen und schließt sie wieder."""
+        db = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def make_key(self, file_path, start_page, end_page, params):
+        """Bildet den Cache-Schlüssel aus Dateiinhalt, Seitenbereich und Parser-Parametern."""
+        stat = os.stat(file_path)
+        identity = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+        if identity not in self._file_hashes:
+            self._file_hashes[identity] = file_hash(file_path)
+
+        key_data = {
+            "file": self._file_hashes[identity],
+            "pages": [start_page, end_page],
+            "params": params,
+            "version": self.parser_version,
+        }
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Gibt (Absätze, Chunks) zurück oder None bei einem Fehlzugriff."""
+        with self._lock, self._connect() as db:
+            row = db.execute("SELECT paragraphs, chunks FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            self.stats["hits"] += 1
+        return json.loads(row[0]), json.loads(row[1])
+
+    def put(self, key, paragraphs, chunks):
+        """Speichert Absätze und Chunks und verdrängt bei Bedarf die ältesten Einträge."""
+        paragraphs_json = json.dumps(paragraphs, ensure_ascii=False)
+        chunks_json = json.dumps(chunks, ensure_ascii=False)
+        size = len(paragraphs_json.encode("utf-8")) + len(chunks_json.encode("utf-8"))
+        now = time.time()
+
+        with self._lock, self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO entries (key, paragraphs, chunks, size, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, paragraphs_json, chunks_json, size, now, now),
+            )
+            self._evict(db)
+
+    def _evict(self, db):
+        """Löscht die am längsten nicht benutzten Einträge, bis die Größengrenze eingehalten wird."""
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for key, size in db.execute("SELECT key, size FROM entries ORDER BY last_access ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            self.stats["evictions"] += 1
+
+    def invalidate(self):
+        """Leert den gesamten Cache."""
+        with self._lock, self._connect() as db:
+            db.execute("DELETE FROM entries")
+        logging.info("Parse-Cache wurde geleert.")
+
+    def size_bytes(self):
+        """Aktuelle Größe aller gespeicherten Einträge in Bytes."""
+        with self._connect() as db:
+            return db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
@@ -2,49 +2,286 @@ import fitz  # PyMuPDF
 import re
 import os
 import logging
-from statistics import mean
-import tiktoken  # OpenAI Tokenizer
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from nlp.tokenizer import count_many
+from pdf_parser.font_stats import FontSizeHistogram
+from pdf_parser.page_store import PageStore
+
+# Version der Extraktions- und Chunking-Logik – bei Änderungen erhöhen, damit der Parse-Cache verworfen wird
+PARSER_VERSION = 2
+
+# Eine Überschrift ist mindestens so viel Punkt größer als der Fließtext
+HEADING_SIZE_TOLERANCE = 1
+
+# Tiefste Gliederungsebene des Inhaltsverzeichnisses, die einen eigenen Chunk beginnt
+OUTLINE_MAX_LEVEL = 2
+
+# Mindestanzahl an Seiten pro Shard – darunter lohnt sich der Start eines Prozesses nicht
+MIN_PAGES_PER_SHARD = 25
+
+# Einzelne Chunks unter dieser Token-Anzahl werden verworfen
+MIN_CHUNK_TOKENS = 50
+
+# Hier legen parse(), extract_text() und chunk_text() die Chunks zur Kontrolle ab
+CHUNKS_FILE = "data/output/chunks.txt"
+
+
+# Extraktionsmodi und ihre PyMuPDF-Flags – Bilder werden nie mit extrahiert
+EXTRACTION_FLAGS = {
+    "dict": fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES,
+    "rawdict": fitz.TEXTFLAGS_RAWDICT & ~fitz.TEXT_PRESERVE_IMAGES,
+    "blocks": fitz.TEXTFLAGS_BLOCKS & ~fitz.TEXT_PRESERVE_IMAGES,
+}
+
+
+def _has_text_layer(page):
+    """
+    Günstige Prüfung, ob eine Seite überhaupt Text enthalten kann:
+    Seiten ohne eingebundene Schriften (z. B. gescannte Bilder) haben keine Textebene.
+    """
+    return bool(page.get_fonts())
+
+
+def _page_spans(page, mode="dict"):
+    """
+    Liest die Text-Spans einer Seite als (Schriftgröße, fett, Text)
+    - "dict": Spans mit Schriftgröße und Schriftname (Standard)
+    - "rawdict": wie "dict", der Text wird aus den Einzelzeichen zusammengesetzt
+    - "blocks": nur Textblöcke ohne Schriftinformationen (Größe 0, keine Überschriftenerkennung)
+    Gibt None für Seiten ohne Textebene zurück.
+    """
+    if not _has_text_layer(page):
+        return None
+
+    flags = EXTRACTION_FLAGS[mode]
+    spans = []
+
+    if mode == "blocks":
+        for block in page.get_text("blocks", flags=flags):
+            if block[6] == 0:  # Textblock
+                spans.append((0.0, False, " ".join(block[4].split())))
+        return spans
+
+    for block in page.get_text(mode, flags=flags)["blocks"]:
+        if "lines" in block:
+            for line in block["lines"]:
+                for span in line["spans"]:
+                    if mode == "rawdict":
+                        text = "".join(char["c"] for char in span["chars"])
+                    else:
+                        text = span["text"]
+                    spans.append((span["size"], "Bold" in span["font"], text.strip()))
+    return spans
+
+
+def _extract_page_range(file_path, start_page, end_page, mode="dict"):
+    """
+    Worker-Funktion für den Prozess-Pool:
+    Öffnet das PDF im eigenen Prozess und liest die Spans der Seiten start_page..end_page
+    (eine Span-Liste pro Seite, None für Seiten ohne Textebene)
+    """
+    with fitz.open(file_path) as document:
+        return [_page_spans(document.load_page(page_num), mode) for page_num in range(start_page - 1, end_page)]
+
+
+def _contiguous_ranges(page_numbers):
+    """Fasst sortierte Seitennummern zu zusammenhängenden Bereichen (erste, letzte) zusammen."""
+    ranges = []
+    for page_num in page_numbers:
+        if ranges and ranges[-1][1] == page_num - 1:
+            ranges[-1] = (ranges[-1][0], page_num)
+        else:
+            ranges.append((page_num, page_num))
+    return ranges
+
+
+def _split_page_range(start_page, end_page, shards):
+    """Teilt den Seitenbereich in `shards` zusammenhängende, etwa gleich große Teilbereiche."""
+    num_pages = end_page - start_page + 1
+    shards = max(1, min(shards, num_pages))
+    size, rest = divmod(num_pages, shards)
+
+    ranges = []
+    first = start_page
+    for i in range(shards):
+        last = first + size - 1 + (1 if i < rest else 0)
+        ranges.append((first, last))
+        first = last + 1
+    return ranges
+
+
+def pack_paragraphs(paragraphs, token_counts, min_tokens=200, max_tokens=1000):
+    """
+    Packt Absätze in einem Durchlauf zu Chunks (linear in der Anzahl der Absätze)
+    - Die Token-Anzahl jedes Absatzes wird übergeben, die Chunkgröße als laufende Summe geführt
+    - Ein Chunk wird abgeschlossen, wenn er min_tokens erreicht hat und der nächste Absatz
+      max_tokens überschreiten würde
+    - Zu kleine Chunks wachsen mit dem nächsten Absatz weiter, ein zu kleiner Rest am Ende
+      wird an den vorherigen Chunk angehängt, sofern dieser dadurch max_tokens nicht überschreitet
+    - Absätze werden nie getrennt, ein einzelner Absatz über max_tokens bleibt ein eigener Chunk:
+      der offene Chunk davor wird abgeschlossen, auch unter min_tokens; nur ein winziger Rest
+      (unter MIN_CHUNK_TOKENS, z. B. die Überschrift) bleibt beim Absatz
+    - max_tokens=0: keine Obergrenze, jeder Chunk wird abgeschlossen, sobald er min_tokens erreicht
+      (Zusammenführen zu kleiner Chunks)
+    - Die Chunkgröße ist die Summe der Absatz-Tokens (Näherung, das Verbinden mit " " wird nicht gezählt)
+    """
+    return list(iter_packed(zip(paragraphs, token_counts), min_tokens=min_tokens, max_tokens=max_tokens))
+
+
+def iter_packed(paragraphs, min_tokens=200, max_tokens=1000):
+    """
+    Wie pack_paragraphs, aber als Generator über (Absatz, Tokens)-Paare, z. B. während das PDF noch gelesen wird.
+    Ein abgeschlossener Chunk wird erst geliefert, wenn der nächste feststeht, da ein zu kleiner Rest am Ende
+    noch an ihn angehängt werden kann.
+    """
+    previous = None  # (Text, Tokens) des zuletzt abgeschlossenen, noch nicht gelieferten Chunks
+    current_chunk = []
+    current_tokens = 0
+    tiny = min(min_tokens, MIN_CHUNK_TOKENS)
+
+    for para, tokens in paragraphs:
+        if not para:
+            continue
+
+        oversized = 0 < max_tokens < tokens
+        if current_chunk and (
+            (oversized and current_tokens >= tiny)
+            or (current_tokens >= min_tokens and current_tokens + tokens > max_tokens)
+        ):
+            if previous is not None:
+                yield previous[0]
+            previous = (" ".join(current_chunk), current_tokens)
+            current_chunk = []
+            current_tokens = 0
+
+        current_chunk.append(para)
+        current_tokens += tokens
+
+    # Restliche Absätze: zu kleinen Rest an den vorherigen Chunk anhängen, sofern er dort noch passt
+    if current_chunk:
+        rest = " ".join(current_chunk)
+        fits = previous is None or max_tokens <= 0 or previous[1] + current_tokens <= max_tokens
+        if current_tokens >= min_tokens or (not fits and current_tokens >= tiny):
+            if previous is not None:
+                yield previous[0]
+            previous = (rest, current_tokens)
+        elif previous is not None:
+            previous = (previous[0] + " " + rest, previous[1] + current_tokens)
+        elif current_tokens >= tiny:
+            previous = (rest, current_tokens)
+        else:
+            # Ein einzelner Mini-Chunk enthält zu wenig Inhalt für sinnvolle Fragen
+            logging.warning(f"⚠ Einzelner Chunk mit nur {current_tokens} Tokens wird verworfen.")
+
+    if previous is not None:
+        yield previous[0]
+
 
 class PDFParser:
-    def __init__(self, file_path):
+    def __init__(self, file_path, workers=1, spill_dir=None, max_pages_in_memory=None, strategy="auto",
+                 extraction_mode="dict", output_file=CHUNKS_FILE):
+        if extraction_mode not in EXTRACTION_FLAGS:
+            raise ValueError(f"Unbekannter Extraktionsmodus: {extraction_mode}")
+
         self.file_path = file_path
+        self.workers = workers  # Anzahl Prozesse für die Seitenextraktion (1 = seriell)
+        self.strategy = strategy  # "auto" (Inhaltsverzeichnis, sonst Schriftgrößen), "outline" oder "font"
+        self.extraction_mode = extraction_mode  # "dict", "rawdict" oder "blocks"
+        self.output_file = output_file  # Kontrolldatei der Chunks; None = nichts schreiben (z. B. parallele Aufträge)
+        self.skipped_pages = []  # Seiten ohne Textebene im letzten Durchlauf
         self.raw_text = ""
         self.chunks = []
+        self.stats = {}  # Strategie und Laufzeiten der Phasen des letzten extract_text()-Aufrufs
+        # Bereits extrahierte Seiten – bei geändertem Seitenbereich werden nur neue Seiten gelesen
+        self.page_store = PageStore(spill_dir=spill_dir, max_pages_in_memory=max_pages_in_memory)
 
-    def analyze_average_font_size(self):
+    def analyze_font_sizes(self, start_page=1, end_page=None):
         """
-        Berechnet die durchschnittliche Schriftgröße im PDF, um Überschriften zu erkennen
+        Erstellt das Schriftgrößen-Histogramm des gewählten Seitenbereichs, um Überschriften zu erkennen
         """
-        document = fitz.open(self.file_path)
-        font_sizes = []
+        with fitz.open(self.file_path) as document:
+            if end_page is None or end_page > len(document):
+                end_page = len(document)
+            _, font_sizes = self._collect_spans(document, start_page, end_page)
+        return font_sizes
 
-        # Alle Seiten durchgehen, um die durchschnittliche Schriftgröße zu berechnen
-        for page_num in range(len(document)):
-            page = document.load_page(page_num)
-            blocks = page.get_text("dict")["blocks"]
-
-            for block in blocks:
-                if "lines" in block:
-                    for line in block["lines"]:
-                        for span in line["spans"]:
-                            font_sizes.append(span["size"])
+    def analyze_average_font_size(self, start_page=1, end_page=None):
+        """
+        Gibt die Fließtextgröße im gewählten Seitenbereich zurück
+        (häufigste Schriftgröße, gewichtet nach Zeichen – große Einzeltitel verzerren sie nicht)
+        """
+        return self.analyze_font_sizes(start_page, end_page).body_size
 
-        # Durchschnittliche Schriftgröße berechnen
-        avg_font_size = mean(font_sizes) if font_sizes else 0
-        return avg_font_size
+    def _collect_spans(self, document, start_page, end_page, workers=1):
+        """
+        Liest alle Text-Spans des Seitenbereichs in einem einzigen Durchlauf
+        und sammelt dabei gleichzeitig die Schriftgrößen-Statistik.
+        Gibt die Spans als (Schriftgröße, fett, Text) und das Schriftgrößen-Histogramm zurück.
 
-    def extract_text(self, start_page=1, end_page=None):
+        Seiten, die schon im Seiten-Cache liegen, werden nicht erneut extrahiert.
+        Seiten ohne Textebene werden übersprungen und in self.skipped_pages vermerkt.
         """
-        Extrahiert den Text aus dem PDF und rekonstruiert Absätze
-        - Mehrzeilige Überschriften werden flexibler erkannt
-        - Fließtext direkt nach Überschrift wird immer als zugehöriger Absatz erkannt
-        - Seitenumbrüche werden ignoriert, um Sätze zusammenzuhalten
+        self._load_pages(document, start_page, end_page, workers)
+
+        spans = []
+        self.skipped_pages = []
+        font_sizes = FontSizeHistogram(heading_tolerance=HEADING_SIZE_TOLERANCE)
+        for page_num in range(start_page, end_page + 1):
+            page_spans = self.page_store.get(page_num)
+            if page_spans is None:
+                self.skipped_pages.append(page_num)
+                continue
+            font_sizes.add_spans(page_spans)
+            spans.extend(page_spans)
+        return spans, font_sizes
+
+    def _load_pages(self, document, start_page, end_page, workers=1):
+        """Extrahiert alle Seiten des Bereichs, die noch nicht im Seiten-Cache liegen."""
+        self.page_store.bind(self.file_path)
+        missing = [page_num for page_num in range(start_page, end_page + 1) if page_num not in self.page_store]
+
+        if len(missing) < end_page - start_page + 1:
+            logging.info(f"{end_page - start_page + 1 - len(missing)} Seiten aus dem Seiten-Cache, {len(missing)} neu extrahiert.")
+
+        for first, last in _contiguous_ranges(missing):
+            for page_num, page_spans in zip(range(first, last + 1), self._extract_pages(document, first, last, workers)):
+                self.page_store.put(page_num, page_spans)
+
+    def _extract_pages(self, document, start_page, end_page, workers=1):
         """
-        if not os.path.exists(self.file_path):
-            logging.error(f"Die Datei '{self.file_path}' wurde nicht gefunden.")
-            raise FileNotFoundError(f"Die Datei '{self.file_path}' wurde nicht gefunden.")
+        Extrahiert die Seiten start_page..end_page und gibt eine Span-Liste pro Seite zurück
+        (None für Seiten ohne Textebene).
 
-        pdf = fitz.open(self.file_path)
+        Bei workers > 1 werden die Seiten in Shards aufgeteilt und in einem Prozess-Pool gelesen.
+        Die Shards werden in Seitenreihenfolge zusammengefügt, erst danach folgt die
+        Chunk-Bildung – Überschriften über Shard-Grenzen hinweg verhalten sich daher wie seriell.
+        """
+        num_pages = end_page - start_page + 1
+        shards = min(workers, num_pages // MIN_PAGES_PER_SHARD)
+
+        if shards > 1:
+            page_ranges = _split_page_range(start_page, end_page, shards)
+            logging.info(f"Extrahiere {num_pages} Seiten in {len(page_ranges)} Shards mit {workers} Prozessen.")
+
+            with ProcessPoolExecutor(max_workers=len(page_ranges)) as executor:
+                results = executor.map(
+                    _extract_page_range,
+                    [self.file_path] * len(page_ranges),
+                    [first for first, _ in page_ranges],
+                    [last for _, last in page_ranges],
+                    [self.extraction_mode] * len(page_ranges),
+                )
+                return [page_spans for shard_pages in results for page_spans in shard_pages]
+
+        return [
+            _page_spans(document.load_page(page_num), self.extraction_mode)
+            for page_num in range(start_page - 1, end_page)
+        ]
+
+    def _resolve_page_range(self, pdf, start_page, end_page):
+        """Prüft den Seitenbereich und begrenzt end_page auf die Seitenzahl des PDFs."""
         num_pages = len(pdf)
 
         if start_page < 1 or start_page > num_pages:
@@ -54,60 +291,217 @@ class PDFParser:
             end_page = num_pages
 
         logging.info(f"Starte Parsing ab Seite {start_page} bis Seite {end_page} von insgesamt {num_pages} Seiten.")
+        return start_page, end_page
 
-        # Durchschnittliche Schriftgröße berechnen
-        avg_font_size = self.analyze_average_font_size()
+    def _assemble_chunks(self, spans, heading_level):
+        """
+        Setzt aus den Spans die Chunks zusammen (Generator):
+        Jede Überschrift beendet den vorherigen Chunk und beginnt einen neuen,
+        der abgeschlossene Chunk wird sofort geliefert.
+        `heading_level(font_size, is_bold)` liefert die Überschriftsebene oder None (siehe FontSizeHistogram).
+        """
         current_chunk = []
-        text = ""
         potential_heading = []
 
-        for page_num in range(start_page - 1, end_page):
-            page = pdf.load_page(page_num)
-            blocks = page.get_text("dict")["blocks"]
-
-            # Textblöcke durchgehen
-            for i, block in enumerate(blocks):
-                if "lines" in block:
-                    for line in block["lines"]:
-                        for span in line["spans"]:
-                            font_size = span["size"]
-                            is_bold = "Bold" in span["font"]
-                            text_content = span["text"].strip()
-
-                            # Überschriftskriterien:
-                            # 1. Schriftgröße größer als Durchschnitt + Toleranz
-                            # 2. Oder: Fett und gleiche Größe wie Durchschnitt
-                            if (font_size > avg_font_size + 1) or (is_bold and font_size >= avg_font_size):
-                                # Prüfen, ob es sich um eine mehrzeilige Überschrift handelt
-                                if potential_heading:
-                                    # Zusammenfassen, wenn gleiche Schriftgröße und kein Punkt am Ende
-                                    potential_heading.append(text_content)
-                                    continue
-                                else:
-                                    # Speichern des vorherigen Chunks (falls vorhanden)
-                                    if current_chunk:
-                                        self.chunks.append(" ".join(current_chunk))
-                                        current_chunk = []
-
-                                    # Start einer neuen potenziellen Überschrift
-                                    potential_heading = [text_content]
-                                    continue
-
-                            # Wenn potenzielle Überschrift vorhanden, prüfen ob danach Fließtext folgt
-                            if potential_heading:
-                                # Mehrzeilige Überschrift zusammenfassen
-                                combined_heading = " ".join(potential_heading)
-                                # Immer als Überschrift speichern, unabhängig vom Fließtext
-                                current_chunk.append(combined_heading)
-                                current_chunk.append(text_content)
-                                potential_heading = []
-                            else:
-                                # Normaler Fließtext
-                                current_chunk.append(text_content)
-
-        # Restliche Absätze als letzten Chunk speichern
+        for font_size, is_bold, text_content in spans:
+            # Überschriftskriterien (Überschriftsebenen aus dem Histogramm):
+            # 1. Schriftgröße größer als Fließtext + Toleranz
+            # 2. Oder: Fett und mindestens Fließtextgröße
+            if heading_level(font_size, is_bold) is not None:
+                # Prüfen, ob es sich um eine mehrzeilige Überschrift handelt
+                if potential_heading:
+                    # Zusammenfassen, wenn gleiche Schriftgröße und kein Punkt am Ende
+                    potential_heading.append(text_content)
+                    continue
+                else:
+                    # Speichern des vorherigen Chunks (falls vorhanden)
+                    if current_chunk:
+                        yield " ".join(current_chunk)
+                        current_chunk = []
+
+                    # Start einer neuen potenziellen Überschrift
+                    potential_heading = [text_content]
+                    continue
+
+            # Wenn potenzielle Überschrift vorhanden, prüfen ob danach Fließtext folgt
+            if potential_heading:
+                # Mehrzeilige Überschrift zusammenfassen
+                combined_heading = " ".join(potential_heading)
+                # Immer als Überschrift speichern, unabhängig vom Fließtext
+                current_chunk.append(combined_heading)
+                current_chunk.append(text_content)
+                potential_heading = []
+            else:
+                # Normaler Fließtext
+                current_chunk.append(text_content)
+
+        # Restliche Absätze als letzten Chunk liefern
         if current_chunk:
-            self.chunks.append(" ".join(current_chunk))
+            yield " ".join(current_chunk)
+
+    def iter_chunks(self, start_page=1, end_page=None, min_tokens=200, max_tokens=1000, strategy=None):
+        """
+        Liefert die fertigen Chunks als Generator, mit denselben Token-Grenzen wie parse().
+        Mit Inhaltsverzeichnis (Strategie "outline") werden die Abschnitte wie in extract_text() in einem
+        schnellen Klartext-Durchlauf bestimmt. Sonst wird das PDF Seite für Seite gelesen, damit die
+        Weiterverarbeitung (z. B. die QnA-Generierung) schon nach den ersten Seiten beginnen kann.
+        Das Schriftgrößen-Histogramm wird dabei laufend über die bisher gelesenen Seiten fortgeschrieben;
+        bei Dokumenten mit stark wechselnden Schriftgrößen kann das Ergebnis daher
+        leicht von parse() abweichen.
+        """
+        sections = (section.strip() for section in self._iter_sections(start_page, end_page, strategy))
+        yield from iter_packed(
+            ((section, count_many([section])[0]) for section in sections),
+            min_tokens=min_tokens, max_tokens=max_tokens,
+        )
+
+    def _iter_sections(self, start_page, end_page, strategy=None):
+        """Abschnitte für iter_chunks: über das Inhaltsverzeichnis oder seitenweise über die Schriftgrößen."""
+        if strategy is None:
+            strategy = self.strategy
+
+        if not os.path.exists(self.file_path):
+            logging.error(f"Die Datei '{self.file_path}' wurde nicht gefunden.")
+            raise FileNotFoundError(f"Die Datei '{self.file_path}' wurde nicht gefunden.")
+
+        with fitz.open(self.file_path) as pdf:
+            start_page, end_page = self._resolve_page_range(pdf, start_page, end_page)
+
+            if strategy in ("auto", "outline"):
+                outline_chunks = self._outline_chunks(pdf, start_page, end_page)
+                if outline_chunks is not None:
+                    logging.info("Pipeline: Abschnitte aus dem Inhaltsverzeichnis.")
+                    yield from outline_chunks
+                    return
+
+            font_sizes = FontSizeHistogram(heading_tolerance=HEADING_SIZE_TOLERANCE)
+            classifier = {"heading_level": font_sizes.classifier()}
+            self.page_store.bind(self.file_path)
+
+            self.skipped_pages = []
+
+            def page_spans():
+                for page_num in range(start_page, end_page + 1):
+                    if page_num not in self.page_store:
+                        self.page_store.put(page_num, _page_spans(pdf.load_page(page_num - 1), self.extraction_mode))
+                    spans = self.page_store.get(page_num)
+                    if spans is None:
+                        self.skipped_pages.append(page_num)
+                        continue
+                    # Statistik erst um die ganze Seite ergänzen, dann deren Spans klassifizieren
+                    font_sizes.add_spans(spans)
+                    classifier["heading_level"] = font_sizes.classifier()
+                    yield from spans
+
+            def heading_level(font_size, is_bold):
+                return classifier["heading_level"](font_size, is_bold)
+
+            yield from self._assemble_chunks(page_spans(), heading_level)
+
+    def _outline_chunks(self, pdf, start_page, end_page):
+        """
+        Schneller Weg über das Inhaltsverzeichnis (Lesezeichen) des PDFs
+        - Einträge bis OUTLINE_MAX_LEVEL im Seitenbereich beginnen jeweils einen Abschnitt
+        - Der Text wird nur als Klartext gelesen (ohne teure `dict`-Extraktion)
+        - Die Position eines Eintrags ist die Fundstelle seines Titels auf der Zielseite,
+          sonst der Seitenanfang
+        Gibt None zurück, wenn das PDF im Bereich keine Gliederung hat.
+        """
+        entries = [
+            (" ".join(title.split()), page)
+            for level, title, page in (entry[:3] for entry in pdf.get_toc(simple=True))
+            if level <= OUTLINE_MAX_LEVEL and start_page <= page <= end_page
+        ]
+        if not entries:
+            return None
+
+        # Seitentexte mit normalisierten Leerzeichen aneinanderhängen, Seitenanfänge merken
+        page_offsets = {}
+        parts = []
+        offset = 0
+        self.skipped_pages = []
+        for page_num in range(start_page, end_page + 1):
+            page = pdf.load_page(page_num - 1)
+            if _has_text_layer(page):
+                text = " ".join(page.get_text("text", flags=EXTRACTION_FLAGS["blocks"]).split())
+            else:
+                self.skipped_pages.append(page_num)
+                text = ""
+            page_offsets[page_num] = offset
+            parts.append(text)
+            offset += len(text) + 1
+        page_offsets[end_page + 1] = offset
+        full_text = " ".join(parts)
+        search_text = full_text.lower()
+
+        boundaries = []
+        for title, page in entries:
+            search_from = max(page_offsets[page], boundaries[-1] if boundaries else 0)
+            position = search_text.find(title.lower(), search_from, page_offsets[page + 1])
+            boundaries.append(position if position >= 0 else search_from)
+
+        # Text vor dem ersten Eintrag gehört zum Abschnitt vor dem Seitenbereich
+        sections = [full_text[:boundaries[0]]]
+        sections += [full_text[first:last] for first, last in zip(boundaries, boundaries[1:] + [len(full_text)])]
+        return [section.strip() for section in sections if section.strip()]
+
+    def extract_text(self, start_page=1, end_page=None, workers=None, strategy=None):
+        """
+        Extrahiert den Text aus dem PDF und rekonstruiert Absätze
+        - Hat das PDF ein Inhaltsverzeichnis, bilden dessen Einträge die Abschnitte (Strategie "outline")
+        - Sonst werden Überschriften über die Schriftgrößen erkannt (Strategie "font"):
+        - Mehrzeilige Überschriften werden flexibler erkannt
+        - Fließtext direkt nach Überschrift wird immer als zugehöriger Absatz erkannt
+        - Seitenumbrüche werden ignoriert, um Sätze zusammenzuhalten
+        - Das Dokument wird nur einmal geöffnet und nur im gewählten Seitenbereich gelesen
+        - Mit workers > 1 (Standard: self.workers) werden große Bereiche parallel extrahiert
+        - Verwendete Strategie und Laufzeiten der Phasen stehen danach in self.stats
+        """
+        if workers is None:
+            workers = self.workers
+        if strategy is None:
+            strategy = self.strategy
+
+        if not os.path.exists(self.file_path):
+            logging.error(f"Die Datei '{self.file_path}' wurde nicht gefunden.")
+            raise FileNotFoundError(f"Die Datei '{self.file_path}' wurde nicht gefunden.")
+
+        timings = {}
+        outline_chunks = None
+
+        with fitz.open(self.file_path) as pdf:
+            start_page, end_page = self._resolve_page_range(pdf, start_page, end_page)
+
+            if strategy in ("auto", "outline"):
+                started = time.perf_counter()
+                outline_chunks = self._outline_chunks(pdf, start_page, end_page)
+                timings["outline"] = time.perf_counter() - started
+                if outline_chunks is None:
+                    logging.info("Kein Inhaltsverzeichnis im Seitenbereich, Überschriften werden über Schriftgrößen erkannt.")
+
+            if outline_chunks is None:
+                # Spans und Schriftgrößen-Statistik in einem Durchlauf sammeln
+                started = time.perf_counter()
+                spans, font_sizes = self._collect_spans(pdf, start_page, end_page, workers=workers)
+                timings["extraction"] = time.perf_counter() - started
+
+        if outline_chunks is not None:
+            self.chunks = outline_chunks
+            used_strategy = "outline"
+        else:
+            started = time.perf_counter()
+            logging.debug(f"Fließtextgröße: {font_sizes.body_size} pt, Überschriftsebenen: {font_sizes.heading_tiers()}")
+            self.chunks = list(self._assemble_chunks(spans, font_sizes.classifier()))
+            timings["assembly"] = time.perf_counter() - started
+            used_strategy = "font"
+
+        self.stats = {"strategy": used_strategy, "timings": timings, "skipped_pages": len(self.skipped_pages)}
+        logging.info(
+            f"Strategie '{used_strategy}': "
+            + ", ".join(f"{stage} {duration * 1000:.1f} ms" for stage, duration in timings.items())
+        )
+        if self.skipped_pages:
+            logging.warning(f"⚠ {len(self.skipped_pages)} Seiten ohne Textebene übersprungen: {self.skipped_pages}")
 
         # Setze self.raw_text für Kompatibilität mit chunk_text()
         self.raw_text = "\n\n".join(self.chunks)
@@ -125,42 +519,57 @@ class PDFParser:
         return self.chunks
 
 
+    def parse(self, start_page=1, end_page=None, min_tokens=200, max_tokens=1000, cache=None):
+        """
+        Kompletter Ablauf aus extract_text() und chunk_text()
+        - Mit einem ParseCache wird das Ergebnis über den Inhalts-Hash des PDFs wiederverwendet
+        - Gibt die fertigen Chunks zurück (leere Liste, wenn das PDF keinen Text enthält)
+        """
+        key = None
+        if cache is not None:
+            params = {
+                "strategy": self.strategy,
+                "extraction_mode": self.extraction_mode,
+                "outline_max_level": OUTLINE_MAX_LEVEL,
+                "heading_size_tolerance": HEADING_SIZE_TOLERANCE,
+                "min_chunk_tokens": MIN_CHUNK_TOKENS,
+                "min_tokens": min_tokens,
+                "max_tokens": max_tokens,
+            }
+            key = cache.make_key(self.file_path, start_page, end_page, params)
+            cached = cache.get(key)
+            if cached is not None:
+                paragraphs, self.chunks = cached
+                self.stats = {"strategy": "cache", "timings": {}, "skipped_pages": 0}
+                self.raw_text = "\n\n".join(paragraphs)
+                logging.info(f"Parse-Cache-Treffer: {len(self.chunks)} Chunks ohne erneutes Parsing geladen.")
+                self.save_chunks_to_txt()
+                return self.chunks
+
+        self.extract_text(start_page=start_page, end_page=end_page)
+        paragraphs = list(self.chunks)
+        chunks = self.chunk_text(min_tokens=min_tokens, max_tokens=max_tokens) if self.raw_text else []
+
+        if cache is not None:
+            cache.put(key, paragraphs, chunks)
+        return chunks
+
     def chunk_text(self, min_tokens=200, max_tokens=1000):
         """
         Chunks basierend auf Überschriften erstellen
         - Startet einen neuen Chunk bei jeder Überschrift
         - Chunks gehen bis zur nächsten Überschrift
         - Token-Limits werden berücksichtigt, aber Absätze werden nie getrennt
+        - Jeder Absatz wird nur einmal tokenisiert (siehe pack_paragraphs, Zählung mit Cache)
         """
         if not self.raw_text:
             raise ValueError("Es wurde noch kein Text extrahiert. Bitte zuerst `extract_text()` ausführen.")
 
-        paragraphs = self.raw_text.split("\n\n")
-        current_chunk = []
-        enc = tiktoken.get_encoding("cl100k_base")
-
-        i = 0
-        while i < len(paragraphs):
-            para = paragraphs[i].strip()
-
-            # Token-Zählung für den aktuellen Chunk
-            current_text = " ".join(current_chunk)
-            token_count = len(enc.encode(current_text))
-
-            # Chunk nur am Ende eines vollständigen Absatzes speichern
-            # Nie mitten im Absatz oder Satz
-            if token_count > max_tokens:
-                self.chunks.append(current_text)
-                current_chunk = []
+        paragraphs = [para.strip() for para in self.raw_text.split("\n\n")]
+        token_counts = count_many(paragraphs)
 
-            i += 1
-
-        # Restliche Absätze als letzten Chunk speichern
-        if current_chunk:
-            self.chunks.append(" ".join(current_chunk))
-
-        logging.info(f"{len(self.chunks)} Chunks vor der Optimierung.")
-        self.merge_small_chunks() 
+        logging.info(f"{len(paragraphs)} Absätze vor der Optimierung.")
+        self.chunks = pack_paragraphs(paragraphs, token_counts, min_tokens=min_tokens, max_tokens=max_tokens)
         logging.info(f"{len(self.chunks)} Chunks nach der Optimierung.")
 
         print(f"{len(self.chunks)} Chunks wurden erstellt.")
@@ -171,33 +580,20 @@ class PDFParser:
         """
         Geht alle Chunks durch und fügt zu kleine Chunks zum nächsten oder vorherigen hinzu
         """
-        enc = tiktoken.get_encoding("cl100k_base")
-        merged_chunks = []
-
-        i = 0
-        while i < len(self.chunks):
-            current_chunk = self.chunks[i]
-            token_count = len(enc.encode(current_chunk))
-
-            if token_count < min_tokens:
-                # Wenn es nicht der letzte Chunk ist, an den nächsten anhängen
-                if i + 1 < len(self.chunks):
-                    self.chunks[i + 1] = current_chunk + " " + self.chunks[i + 1]
-                # Falls es der letzte Chunk ist, an den vorherigen anhängen
-                elif i > 0:
-                    merged_chunks[-1] += " " + current_chunk
-            else:
-                merged_chunks.append(current_chunk)
-
-            i += 1
+        token_counts = count_many(self.chunks)
 
-        self.chunks = merged_chunks
+        # max_tokens=0: Jeder ausreichend große Chunk bleibt für sich
+        self.chunks = pack_paragraphs(self.chunks, token_counts, min_tokens=min_tokens, max_tokens=0)
 
-    def save_chunks_to_txt(self, output_file="data/output/chunks.txt"):
+    def save_chunks_to_txt(self, output_file=None):
         """
-        Speichert alle Chunks in einer TXT-Datei
-        Überschreibt die Datei bei jedem Durchlauf
+        Speichert alle Chunks in einer TXT-Datei (Standard: self.output_file)
+        Überschreibt die Datei bei jedem Durchlauf; ohne Zieldatei wird nichts geschrieben
         """
+        output_file = output_file or self.output_file
+        if output_file is None:
+            return
+
         # Verzeichnis erstellen, falls es noch nicht existiert
         os.makedirs(os.path.dirname(output_file), exist_ok=True)
 
@@ -0,0 +1,42 @@
+import pytest
+
+import pdf_parser.pdf_parser as pdf_parser_module
+from nlp import hedging, rate_limiter, retry
+
+
+class FakeClock:
+    """Virtuelle Zeit: sleep() rückt die Uhr vor, statt zu blockieren."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture(autouse=True)
+def fresh_state():
+    """Setzt Circuit Breaker, Rate Limiter und Hedging-Latenzen vor und nach jedem Test zurück."""
+    retry.reset()
+    rate_limiter.reset()
+    hedging.reset()
+    yield
+    retry.reset()
+    rate_limiter.reset()
+    hedging.reset()
+
+
+@pytest.fixture
+def word_count_tokens(monkeypatch):
+    """Zählt Wörter statt Tokens, damit das Chunking ohne tiktoken-Download testbar ist."""
+    monkeypatch.setattr(pdf_parser_module, "count_many", lambda texts: [len(text.split()) for text in texts])
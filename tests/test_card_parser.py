@@ -0,0 +1,65 @@
+from unittest.mock import patch
+
+import pytest
+
+from nlp.card_parser import CardFormatError, parse_cards
+from nlp.qna_generator import QnAGenerator
+
+
+def json_generator():
+    generator = QnAGenerator(api_type="openai", api_key="test-key", output_format="json")
+    generator.load_dynamic_prompt = lambda: "{chunk} ({num_questions} Fragen)"
+    return generator
+
+
+def test_parse_cards_accepts_array_and_object():
+    expected = [{"question": "Was ist X?", "answer": "X ist..."}]
+
+    assert parse_cards('[{"question": "Was ist X?", "answer": "X ist..."}]') == expected
+    assert parse_cards('{"cards": [{"question": " Was ist X? ", "answer": "X ist..."}]}') == expected
+    assert parse_cards('```json\n{"cards": [{"question": "Was ist X?", "answer": "X ist..."}]}\n```') == expected
+
+
+def test_parse_cards_skips_empty_and_rejects_invalid():
+    assert parse_cards('[{"question": "", "answer": "leer"}]') == []
+
+    for invalid in ("Frage: A?\nAntwort: B.", '{"karten": []}', '[{"question": 1, "answer": "B"}]', '["A"]'):
+        with pytest.raises(CardFormatError):
+            parse_cards(invalid)
+
+
+def test_json_mode_sends_response_format_and_parses():
+    generator = json_generator()
+    response = '{"cards": [{"question": "Was ist JSON?", "answer": "Ein Datenformat."}]}'
+
+    with patch.object(generator.client.chat.completions, "create") as create:
+        create.return_value.choices[0].message.content = response
+        qna_pairs = generator.generate_qna_pairs("JSON ist ein Datenformat.", num_questions=1)
+
+    assert qna_pairs == [{"question": "Was ist JSON?", "answer": "Ein Datenformat."}]
+    assert create.call_args.kwargs["response_format"] == {"type": "json_object"}
+    assert "JSON" in create.call_args.kwargs["messages"][-1]["content"]
+    assert generator.stats["parse_failures"] == 0
+
+
+def test_invalid_json_falls_back_to_regex_and_is_counted():
+    generator = json_generator()
+
+    with patch.object(generator, "call_openai", return_value="Frage: A?\nAntwort: B."):
+        assert generator.generate_qna_pairs("Text", num_questions=1) == [{"question": "A?", "answer": "B."}]
+    with patch.object(generator, "call_openai", return_value="Dazu fällt mir nichts ein."):
+        assert generator.generate_qna_pairs("Text", num_questions=1) == []
+
+    assert generator.stats["parse_failures"] == 2
+    assert generator.stats["empty_responses"] == 1
+
+
+def test_packed_json_response_is_split_by_section():
+    generator = json_generator()
+    response = ('{"cards": [{"section": 2, "question": "Zwei?", "answer": "2"},'
+                ' {"section": 1, "question": "Eins?", "answer": "1"}]}')
+
+    with patch.object(generator, "call_openai", return_value=response):
+        results = generator.generate_packed([("Erster Chunk", 1), ("Zweiter Chunk", 1)])
+
+    assert results == [[{"question": "Eins?", "answer": "1"}], [{"question": "Zwei?", "answer": "2"}]]
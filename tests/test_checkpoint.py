@@ -0,0 +1,77 @@
+import os
+import time
+
+from nlp import checkpoint
+from nlp.checkpoint import CheckpointJournal, job_key
+
+CARDS = [{"question": "A?", "answer": "B."}]
+
+
+def test_completed_chunks_survive_reopen(tmp_path):
+    journal = CheckpointJournal.for_job(str(tmp_path), {"file": "abc", "pages": [1, 10]}, {"prompt": "P"})
+    journal.record(1, "Erster Chunk", CARDS)
+    journal.record(3, "Dritter Chunk", [])
+    journal.close()
+
+    reopened = CheckpointJournal.for_job(str(tmp_path), {"file": "abc", "pages": [1, 10]}, {"prompt": "P"})
+    assert reopened.completed(1, "Erster Chunk") == CARDS
+    assert reopened.completed(3, "Dritter Chunk") == []
+    assert reopened.completed(2, "Zweiter Chunk") is None
+
+
+def test_edited_chunk_is_not_resumed(tmp_path):
+    journal = CheckpointJournal(str(tmp_path / "job.jsonl"))
+    journal.record(1, "Originaltext", CARDS)
+
+    assert journal.completed(1, "Bearbeiteter Text") is None
+
+
+def test_key_depends_on_document_and_settings():
+    base = job_key({"file": "abc"}, {"prompt": "P"})
+    assert base == job_key({"file": "abc"}, {"prompt": "P"})
+    assert base != job_key({"file": "abd"}, {"prompt": "P"})
+    assert base != job_key({"file": "abc"}, {"prompt": "Q"})
+
+
+def test_torn_last_line_is_discarded(tmp_path):
+    path = str(tmp_path / "job.jsonl")
+    journal = CheckpointJournal(path)
+    journal.record(1, "Erster Chunk", CARDS)
+    journal.close()
+    with open(path, "a", encoding="utf-8") as file:
+        file.write('{"chunk": 2, "hash": "ab')  # Absturz mitten im Schreiben
+
+    reopened = CheckpointJournal(path)
+    assert reopened.completed(1, "Erster Chunk") == CARDS
+    reopened.record(2, "Zweiter Chunk", CARDS)
+    reopened.close()
+
+    assert CheckpointJournal(path).completed(2, "Zweiter Chunk") == CARDS
+
+
+def test_reset_and_remove(tmp_path):
+    path = str(tmp_path / "job.jsonl")
+    journal = CheckpointJournal(path)
+    journal.record(1, "Erster Chunk", CARDS)
+    journal.reset()
+    assert journal.completed(1, "Erster Chunk") is None
+    journal.close()
+    assert CheckpointJournal(path).entries == {}
+
+    journal = CheckpointJournal(path)
+    journal.remove()
+    assert not os.path.exists(path)
+
+
+def test_prune_removes_stale_journals(tmp_path):
+    stale = CheckpointJournal(str(tmp_path / "alt.jsonl"))
+    stale.close()
+    fresh = CheckpointJournal(str(tmp_path / "neu.jsonl"))
+    fresh.close()
+    old = time.time() - checkpoint.DEFAULT_MAX_AGE - 60
+    os.utime(stale.path, (old, old))
+
+    checkpoint.prune(str(tmp_path))
+
+    assert not os.path.exists(stale.path)
+    assert os.path.exists(fresh.path)
@@ -0,0 +1,81 @@
+import openai
+import pytest
+
+from nlp import rate_limiter
+from nlp.card_parser import parse_cards
+from nlp.fake_provider import FakeBehavior, FakeClient, FakeLLMServer, fake_answer
+from nlp.qna_generator import QnAGenerator
+from nlp.rate_limiter import RateLimitExceeded
+from nlp.retry import ProviderError, RetryPolicy
+
+
+def fake_generator(behavior=None, **kwargs):
+    generator = QnAGenerator(api_type="fake", fake_behavior=behavior, **kwargs)
+    generator.load_dynamic_prompt = lambda: "{chunk} ({num_questions} Fragen)"
+    generator.retry_policy = RetryPolicy(sleep=lambda seconds: None)
+    generator.rate_limiter.sleep = lambda seconds: None
+    return generator
+
+
+def test_fake_answer_is_deterministic_and_parseable():
+    prompt = "Photosynthese wandelt Lichtenergie in chemische Energie um."
+    generator = QnAGenerator(api_type="manual")
+
+    assert fake_answer(prompt) == fake_answer(prompt)
+    assert len(generator.extract_qna_pairs(fake_answer(prompt))) == 3
+    assert len(parse_cards(fake_answer(prompt, json_mode=True))) == 3
+
+
+def test_fake_answer_follows_packed_plan():
+    prompt = ("### Abschnitt 1\nErster Inhalt\n\n### Abschnitt 2\nZweiter Inhalt\n\n"
+              "Erstelle die Fragen getrennt je Abschnitt: Abschnitt 1: 1, Abschnitt 2: 2.")
+    sections = QnAGenerator.split_packed_response(fake_answer(prompt))
+
+    assert sorted(sections) == [1, 2]
+    assert [card["section"] for card in parse_cards(fake_answer(prompt, json_mode=True))] == [1, 2, 2]
+
+
+def test_fake_client_injects_errors():
+    with pytest.raises(RateLimitExceeded):
+        FakeClient(FakeBehavior(rate_429=1.0)).complete("x")
+    with pytest.raises(ProviderError) as excinfo:
+        FakeClient(FakeBehavior(rate_500=1.0)).complete("x")
+    assert excinfo.value.status == 500 and excinfo.value.retryable
+
+
+def test_fake_api_type_retries_through_injected_errors():
+    generator = fake_generator(FakeBehavior(rate_429=0.2, rate_500=0.2, seed=1))
+
+    for i in range(20):
+        assert len(generator.generate_qna_pairs(f"Inhalt Nummer {i}", num_questions=3)) == 3
+    assert generator.client.stats["rate_limited"] > 0
+    assert generator.client.stats["server_errors"] > 0
+    assert generator.stats["requests"] == generator.client.stats["requests"]
+
+
+def test_fake_api_type_streams_and_supports_json():
+    cards = []
+    assert len(fake_generator(FakeBehavior(chunk_size=4)).generate_qna_pairs_streaming(
+        "Streaming Inhalt", num_questions=2, on_card=cards.append)) == 2
+    assert len(cards) == 2
+    assert fake_generator(output_format="json").generate_qna_pairs("JSON Inhalt")[0]["question"]
+
+
+def test_fake_server_speaks_openai_protocol():
+    with FakeLLMServer(FakeBehavior(chunk_size=8)) as server:
+        generator = QnAGenerator(api_type="openai", api_key="test-key", base_url=server.base_url)
+        generator.load_dynamic_prompt = lambda: "{chunk} ({num_questions} Fragen)"
+
+        assert len(generator.generate_qna_pairs("Serverinhalt", num_questions=3)) == 3
+        assert len(generator.generate_qna_pairs_streaming("Serverinhalt", num_questions=3)) == 3
+        assert server.stats["requests"] == 2
+        assert server.stats["streams"] == 1
+
+
+def test_fake_server_returns_429_with_retry_after():
+    with FakeLLMServer(FakeBehavior(rate_429=1.0, retry_after=0.25)) as server:
+        client = openai.OpenAI(api_key="test-key", base_url=server.base_url, max_retries=0)
+        with pytest.raises(openai.RateLimitError) as excinfo:
+            client.chat.completions.create(model="fake-model", messages=[{"role": "user", "content": "x"}])
+
+    assert rate_limiter.retry_after_from_response(excinfo.value.response) == 0.25
@@ -0,0 +1,49 @@
+import pytest
+from pdf_parser.font_stats import FontSizeHistogram
+
+
+def test_body_size_is_character_weighted_mode():
+    """Viele kurze Titel-Spans dürfen die Fließtextgröße nicht verschieben."""
+    histogram = FontSizeHistogram()
+    histogram.add_spans([(11, False, "x" * 500)] + [(24, True, "Titel")] * 50)
+
+    assert histogram.body_size == pytest.approx(11)
+
+
+def test_heading_tiers_and_levels():
+    """Größen oberhalb des Fließtexts bilden Ebenen, die größte ist Ebene 1."""
+    histogram = FontSizeHistogram(heading_tolerance=1)
+    histogram.add_spans([
+        (11, False, "x" * 1000),
+        (11, True, "fett"),
+        (14, True, "Abschnitt"),
+        (14.2, True, "Abschnitt"),
+        (20, True, "Kapitel"),
+    ])
+    heading_level = histogram.classifier()
+
+    assert histogram.heading_tiers() == [pytest.approx(20), pytest.approx(14, abs=0.3)]
+    assert heading_level(20, True) == 1
+    assert heading_level(14.2, False) == 2
+    assert heading_level(11, True) == 3
+    assert heading_level(11, False) is None
+    assert heading_level(11.5, False) is None
+
+
+def test_bold_body_text_between_bins_is_heading():
+    """Fette Schrift in Fließtextgröße zählt auch, wenn die Größe unter der Bin-Mitte liegt (LaTeX 10pt)."""
+    histogram = FontSizeHistogram()
+    histogram.add_spans([(9.9626, False, "x" * 1000), (14.3462, True, "Abschnitt")])
+    heading_level = histogram.classifier()
+
+    assert heading_level(9.9626, True) == 2
+    assert heading_level(9.9626, False) is None
+    assert heading_level(9.0, True) is None
+
+
+def test_empty_histogram():
+    """Ohne Daten gibt es weder Fließtextgröße noch Überschriftsebenen."""
+    histogram = FontSizeHistogram()
+
+    assert histogram.body_size == 0
+    assert histogram.heading_tiers() == []
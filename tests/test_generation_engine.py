@@ -0,0 +1,152 @@
+import random
+import threading
+import time
+
+import pytest
+
+from nlp.generation_engine import GenerationCancelled, GenerationEngine, JobControl
+from nlp.qna_generator import QnAGenerator
+
+
+def test_results_in_chunk_order_with_random_latency():
+    """Trotz unterschiedlicher Laufzeiten kommen die Ergebnisse in Chunk-Reihenfolge."""
+    rng = random.Random(42)
+    delays = [rng.uniform(0, 0.02) for _ in range(20)]
+
+    def generate(i):
+        time.sleep(delays[i])
+        return i * 10
+
+    engine = GenerationEngine(generate, max_in_flight=5)
+    results = list(engine.run(range(20)))
+
+    assert [index for index, _, _, _ in results] == list(range(20))
+    assert [result for _, _, result, _ in results] == [i * 10 for i in range(20)]
+
+
+def test_error_in_one_chunk_does_not_affect_others():
+    """Ein Fehler wird nur für den betroffenen Chunk gemeldet."""
+    def generate(chunk):
+        if chunk == "kaputt":
+            raise RuntimeError("API-Fehler")
+        return chunk.upper()
+
+    results = list(GenerationEngine(generate, max_in_flight=2).run(["a", "kaputt", "c"]))
+
+    assert [(item, result) for _, item, result, _ in results] == [("a", "A"), ("kaputt", None), ("c", "C")]
+    assert isinstance(results[1][3], RuntimeError)
+    assert results[0][3] is None and results[2][3] is None
+
+
+def test_failing_input_delivers_finished_chunks():
+    """Pipeline-Modus: Bricht das Parsen mittendrin ab, kommen die bis dahin gelesenen Chunks trotzdem an."""
+    def chunks():
+        yield "a"
+        yield "b"
+        raise ValueError("Seite 3 beschädigt")
+
+    engine = GenerationEngine(str.upper, max_in_flight=2)
+    results = list(engine.run(chunks()))
+
+    assert [result for _, _, result, _ in results] == ["A", "B"]
+    assert isinstance(engine.input_error, ValueError)
+
+
+def test_in_flight_limit_and_progress():
+    """Es laufen nie mehr als max_in_flight Anfragen gleichzeitig; Fortschritt zählt bis zum Ende."""
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def generate(chunk):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.01)
+        with lock:
+            state["running"] -= 1
+        return chunk
+
+    progress = []
+    engine = GenerationEngine(generate, max_in_flight=3)
+    list(engine.run((str(i) for i in range(12)), on_progress=progress.append))
+
+    assert state["peak"] == 3
+    assert progress == list(range(1, 13))
+
+
+def test_concurrency_reduces_wall_time():
+    """Mit vier parallelen Anfragen dauern acht Chunks etwa zwei statt acht Latenzen."""
+    def generate(chunk):
+        time.sleep(0.05)
+        return chunk
+
+    start = time.perf_counter()
+    list(GenerationEngine(generate, max_in_flight=4).run(range(8)))
+    duration = time.perf_counter() - start
+
+    assert duration < 0.05 * 8 / 2
+
+
+def test_cancel_returns_finished_results_without_waiting():
+    """Nach dem Abbruch starten keine neuen Chunks; laufende werden nicht abgewartet, fertige bleiben erhalten."""
+    control = JobControl()
+    started = []
+
+    def generate(chunk):
+        started.append(chunk)
+        if chunk == 0:
+            return "fertig"
+        time.sleep(1.0)
+        return "zu spät"
+
+    engine = GenerationEngine(generate, max_in_flight=2, control=control)
+    start = time.perf_counter()
+    results = []
+    for result in engine.run(range(10)):
+        results.append(result)
+        control.cancel()
+
+    assert time.perf_counter() - start < 0.8
+    assert results[0][2] == "fertig"
+    assert [type(error) for _, _, _, error in results[1:]] == [GenerationCancelled]
+    assert len(started) <= 3
+
+
+def test_pause_stops_dispatching_until_resumed():
+    """Während einer Pause werden keine neuen Chunks gestartet."""
+    control = JobControl()
+    started = []
+
+    def generate(chunk):
+        started.append(chunk)
+        if chunk == 0:
+            control.pause()
+        return chunk
+
+    started_during_pause = []
+
+    def resume_later():
+        time.sleep(0.3)
+        started_during_pause.extend(started)
+        control.resume()
+
+    resumer = threading.Thread(target=resume_later)
+    resumer.start()
+    results = list(GenerationEngine(generate, max_in_flight=1, control=control).run(range(3)))
+    resumer.join()
+
+    assert started_during_pause == [0]
+    assert [result for _, _, result, _ in results] == [0, 1, 2]
+
+
+def test_cancelled_generator_sends_nothing_more():
+    """Ein abgebrochener Lauf startet keine Anfrage und keine Wiederholung mehr."""
+    control = JobControl()
+    generator = QnAGenerator(api_type="fake", control=control)
+    generator.load_dynamic_prompt = lambda: "{chunk}"
+    control.cancel()
+
+    with pytest.raises(GenerationCancelled):
+        generator.generate_qna_pairs("Text", num_questions=1)
+    assert generator.stats["requests"] == 0
+    assert generator.metrics.summary()["cancelled"] == 1
@@ -0,0 +1,173 @@
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from nlp import hedging, retry
+from nlp.generation_engine import GenerationCancelled, JobControl
+from nlp.hedging import HedgeCancelled, HedgingPolicy, LatencyTracker
+from nlp.qna_generator import QnAGenerator
+from nlp.retry import ProviderError, RetryPolicy
+
+ANSWER = "Frage: A?\nAntwort: B."
+
+
+def fake_generator(**kwargs):
+    generator = QnAGenerator(api_type="fake", **kwargs)
+    generator.load_dynamic_prompt = lambda: "{chunk}"
+    generator.retry_policy = RetryPolicy(sleep=lambda seconds: None)
+    return generator
+
+
+def fast_policy(**kwargs):
+    return HedgingPolicy(min_delay=0.05, default_delay=0.05, budget=1.0, **kwargs)
+
+
+def test_tracker_reports_quantile_after_enough_samples():
+    tracker = LatencyTracker(min_samples=10)
+    for i in range(9):
+        tracker.record(i / 10)
+    assert tracker.quantile(0.95) is None
+
+    for i in range(9, 100):
+        tracker.record(i / 10)
+    assert tracker.quantile(0.95) == pytest.approx(9.5)
+
+
+def test_slow_request_is_hedged_and_duplicate_wins():
+    generator = fake_generator(hedging_policy=fast_policy())
+    calls = []
+
+    def slow_then_fast(prompt):
+        calls.append(prompt)
+        time.sleep(1.0 if len(calls) == 1 else 0)
+        return ANSWER
+
+    with patch.object(generator, "call_fake", side_effect=slow_then_fast):
+        start = time.perf_counter()
+        assert generator.generate_qna_pairs("Text", num_questions=1) == [{"question": "A?", "answer": "B."}]
+        elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.8
+    assert len(calls) == 2
+    assert generator.stats["hedged_requests"] == 1
+    assert generator.stats["hedge_wins"] == 1
+    assert generator.stats["hedge_prompt_tokens"] > 0
+
+
+def test_fast_request_and_exhausted_budget_are_not_hedged():
+    generator = fake_generator(hedging_policy=HedgingPolicy(min_delay=0.05, default_delay=0.05, budget=0.0))
+
+    with patch.object(generator, "call_fake", side_effect=lambda prompt: time.sleep(0.2) or ANSWER) as call:
+        generator.generate_qna_pairs("Text", num_questions=1)
+
+    assert call.call_count == 1
+    assert generator.stats["hedged_requests"] == 0
+
+
+def test_duplicate_goes_to_fallback_provider():
+    fallback = fake_generator()
+    generator = QnAGenerator(api_type="openai", api_key="test-key", hedging_policy=fast_policy(fallback=fallback))
+    generator.load_dynamic_prompt = lambda: "{chunk}"
+
+    with patch.object(generator, "call_openai", side_effect=lambda prompt: time.sleep(1.0) or ANSWER), \
+            patch.object(fallback, "call_fake", return_value="Frage: C?\nAntwort: D.") as call_fallback:
+        assert generator.generate_qna_pairs("Text", num_questions=1) == [{"question": "C?", "answer": "D."}]
+
+    assert call_fallback.call_count == 1
+    assert generator.stats["hedge_wins"] == 1
+
+
+def test_failed_provider_fails_over_and_open_breaker_routes_directly():
+    fallback = fake_generator()
+    generator = QnAGenerator(api_type="openai", api_key="test-key",
+                             hedging_policy=HedgingPolicy(fallback=fallback, hedge=False))
+    generator.load_dynamic_prompt = lambda: "{chunk}"
+    generator.retry_policy = RetryPolicy(sleep=lambda seconds: None)
+
+    with patch.object(generator, "call_openai", side_effect=ProviderError("503", status=503, retryable=True)):
+        assert generator.generate_qna_pairs("Text", num_questions=3)
+    assert generator.stats["failovers"] == 1
+
+    for _ in range(retry.FAILURE_THRESHOLD):
+        generator.circuit_breaker.record_failure()
+    with patch.object(generator, "call_openai") as call_primary:
+        assert generator.generate_qna_pairs("Text", num_questions=3)
+    assert call_primary.call_count == 0
+    assert generator.stats["failovers"] == 2
+
+
+def test_losing_stream_is_closed_without_waiting_for_the_answer():
+    fallback = fake_generator()
+    generator = fake_generator(hedging_policy=fast_policy(fallback=fallback))
+    closed = threading.Event()
+    pieces_read = []
+
+    def slow_stream(prompt):
+        try:
+            for piece in ANSWER:
+                time.sleep(0.1)
+                pieces_read.append(piece)
+                yield piece
+        finally:
+            closed.set()
+
+    with patch.object(generator, "stream_fake", side_effect=slow_stream):
+        assert generator.generate_qna_pairs("Text", num_questions=1)
+        assert closed.wait(timeout=0.5)
+
+    assert generator.stats["hedge_wins"] == 1
+    assert len(pieces_read) < len(ANSWER)
+    assert generator.metrics.summary()["cancelled"] == 1
+
+
+def test_user_cancel_closes_both_hedged_streams():
+    control = JobControl()
+    fallback = fake_generator(control=control)
+    generator = fake_generator(hedging_policy=fast_policy(fallback=fallback), control=control)
+    closed = []
+
+    def slow_stream(prompt):
+        try:
+            for piece in ANSWER:
+                time.sleep(0.1)
+                yield piece
+        finally:
+            closed.append(prompt)
+
+    threading.Timer(0.3, control.cancel).start()  # Beide Anfragen laufen bereits
+    with patch.object(generator, "stream_fake", side_effect=slow_stream), \
+            patch.object(fallback, "stream_fake", side_effect=slow_stream):
+        start = time.perf_counter()
+        with pytest.raises(GenerationCancelled):
+            generator.generate_qna_pairs("Text", num_questions=1)
+        assert time.perf_counter() - start < 1.0
+        deadline = time.perf_counter() + 1.0
+        while len(closed) < 2 and time.perf_counter() < deadline:
+            time.sleep(0.01)
+
+    assert len(closed) == 2
+    assert generator.stats["hedged_requests"] == 1
+
+
+def test_policies_share_one_thread_pool():
+    """Eine neue Policy je Lauf erzeugt keine neuen Threads."""
+    hedging.shutdown()
+    executor = hedging.get_executor()
+    for _ in range(5):
+        fake_generator(hedging_policy=fast_policy()).generate_qna_pairs("Text", num_questions=1)
+
+    assert hedging.get_executor() is executor
+    assert len(executor._threads) <= 2
+
+
+def test_cancelled_request_starts_no_further_attempt():
+    generator = fake_generator()
+    cancelled = threading.Event()
+    cancelled.set()
+
+    with patch.object(generator, "call_fake") as call:
+        with pytest.raises(HedgeCancelled):
+            generator.send_with_retry(generator.call_fake, "Text", cancelled)
+    assert call.call_count == 0
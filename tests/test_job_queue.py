@@ -0,0 +1,154 @@
+import os
+import threading
+
+import pytest
+from fpdf import FPDF
+
+from job_queue import CANCELLED, DONE, FAILED, Job, JobQueue
+from nlp.checkpoint import CheckpointJournal
+from nlp.qna_generator import QnAGenerator
+from pdf_parser.parse_cache import file_hash
+
+TREES = ["Ahorn", "Birke", "Buche", "Eiche", "Esche", "Linde"]
+DOCUMENTS = {
+    "lang.pdf": [f"{tree} Photosynthese" for tree in TREES],
+    "kurz.pdf": ["Mitochondrien Ribosomen"],
+}
+
+
+@pytest.fixture(autouse=True)
+def static_prompt(monkeypatch):
+    monkeypatch.setattr(QnAGenerator, "load_dynamic_prompt", lambda self: "{chunk}")
+
+
+def make_queue(order, gate=None, **kwargs):
+    def parse(job):
+        if job.name == "gate":
+            gate.wait()  # Hält den einzigen Worker fest, bis alle Aufträge eingereiht sind
+            return []
+        return DOCUMENTS[job.name]
+
+    queue = JobQueue(parse=parse, count_tokens=lambda text: len(text) // 4, **kwargs)
+    original = queue.create_generator
+
+    def create_generator(job):
+        generator = original(job)
+        call = generator.call_fake
+
+        def recording_call(prompt):
+            order.append(("chunk", job.name))
+            return call(prompt)
+
+        generator.call_fake = recording_call
+        return generator
+
+    queue.create_generator = create_generator
+    return queue
+
+
+def fake_job(name, **kwargs):
+    return Job(name, settings={"api_type": "fake", "output_format": "text"}, **kwargs)
+
+
+def test_all_jobs_complete_with_cards_in_chunk_order():
+    queue = make_queue([], max_workers=3)
+    jobs = [queue.submit(fake_job("lang.pdf")), queue.submit(fake_job("kurz.pdf"))]
+
+    assert queue.wait(timeout=10)
+    assert [job.state for job in jobs] == [DONE, DONE]
+    assert jobs[0].progress()["chunks_done"] == 6
+    questions = [card["question"] for card in jobs[0].cards()]
+    assert list(dict.fromkeys(tree for question in questions for tree in TREES if tree in question)) == TREES
+    assert queue.depth() == 0
+    assert set(queue.metrics.by_document()) == {"lang.pdf", "kurz.pdf"}
+    queue.close()
+
+
+def test_shortest_job_goes_first_and_pinned_job_overtakes():
+    order = []
+    gate = threading.Event()
+    queue = make_queue(order, gate=gate, max_workers=1)
+    queue.submit(Job("gate", settings={"api_type": "fake"}))
+
+    long_job = queue.submit(fake_job("lang.pdf", end_page=6))
+    short_job = queue.submit(fake_job("kurz.pdf", end_page=1))
+    gate.set()
+    assert queue.wait(timeout=10)
+    assert order.index(("chunk", "kurz.pdf")) < order.index(("chunk", "lang.pdf"))
+    assert long_job.state == short_job.state == DONE
+
+    order.clear()
+    gate.clear()
+    queue.submit(Job("gate", settings={"api_type": "fake"}))
+    queue.submit(fake_job("kurz.pdf", end_page=1))
+    queue.submit(fake_job("lang.pdf", end_page=6, pinned=True))
+    gate.set()
+    assert queue.wait(timeout=10)
+    assert order.index(("chunk", "lang.pdf")) < order.index(("chunk", "kurz.pdf"))
+    queue.close()
+
+
+def test_failed_parse_and_cancel_are_reported_per_job():
+    queue = make_queue([], max_workers=2)
+    broken = queue.submit(fake_job("fehlt.pdf"))
+    paused = fake_job("lang.pdf")
+    paused.control.pause()
+    queue.submit(paused)
+
+    queue.cancel(paused)
+    assert queue.wait(timeout=10)
+
+    assert broken.state == FAILED and broken.progress()["error"]
+    assert paused.state == CANCELLED
+    queue.close()
+
+
+def test_checkpoint_skips_finished_chunks(tmp_path):
+    pdf = tmp_path / "lang.pdf"
+    pdf.write_bytes(b"%PDF-Test")
+    settings = {"api_type": "fake", "output_format": "text"}
+    order = []
+    queue = make_queue(order, checkpoint_dir=str(tmp_path / "checkpoints"))
+    queue.parse = lambda job: DOCUMENTS["lang.pdf"]
+
+    document = {"file": file_hash(str(pdf)), "pages": [1, None]}
+    journal = CheckpointJournal.for_job(str(tmp_path / "checkpoints"), document, settings)
+    journal.record(1, DOCUMENTS["lang.pdf"][0], [{"question": "Vorher?", "answer": "Ja."}])
+    journal.close()
+
+    job = queue.submit(Job(str(pdf), settings=settings))
+    assert queue.wait(timeout=10)
+
+    assert job.state == DONE and job.resumed == 1
+    assert job.cards()[0]["question"] == "Vorher?"
+    assert order.count(("chunk", "lang.pdf")) == 5
+    assert not os.path.exists(journal.path)
+    queue.close()
+
+
+def test_streaming_queue_streams_chunks():
+    queue = make_queue([], streaming=True)
+    job = queue.submit(fake_job("kurz.pdf"))
+
+    assert queue.wait(timeout=10)
+    assert job.state == DONE and job.cards()
+    assert job.generator.provider.client.stats["streams"] == 1
+    queue.close()
+
+
+def test_queue_parses_without_writing_chunks_file(tmp_path, monkeypatch, word_count_tokens):
+    """Parallel parsende Aufträge dürfen sich keine gemeinsame chunks.txt überschreiben."""
+    pdf_path = tmp_path / "skript.pdf"
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+    pdf.multi_cell(0, 10, txt="Ein Satz mit ausreichend Inhalt für einen Chunk. " * 40)
+    pdf.output(str(pdf_path))
+    monkeypatch.chdir(tmp_path)
+
+    queue = JobQueue()
+    chunks = queue.parse_pdf(Job(str(pdf_path)))
+    queue.close()
+
+    assert chunks
+    assert not os.path.exists(os.path.join("data", "output", "chunks.txt"))
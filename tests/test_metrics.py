@@ -0,0 +1,132 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from nlp import metrics
+from nlp.fake_provider import FakeBehavior, fake_usage
+from nlp.metrics import UsageMetrics
+from nlp.qna_generator import QnAGenerator
+from nlp.response_cache import ResponseCache
+from nlp.retry import ProviderError, RetryPolicy
+
+ANSWER = "Frage: A?\nAntwort: B."
+
+
+def fake_generator(**kwargs):
+    generator = QnAGenerator(api_type="fake", **kwargs)
+    generator.load_dynamic_prompt = lambda: "{chunk}"
+    generator.retry_policy = RetryPolicy(sleep=lambda seconds: None)
+    return generator
+
+
+def test_reported_usage_is_recorded_per_request():
+    generator = fake_generator()
+
+    with metrics.scope(chunks=(1,), document="skript.pdf"):
+        generator.generate_qna_pairs("Photosynthese und Zellatmung", num_questions=2)
+
+    [record] = generator.metrics.records
+    expected = fake_usage(generator.render_prompt("Photosynthese und Zellatmung", 2), "")
+    assert record["prompt_tokens"] == expected["prompt_tokens"]
+    assert record["completion_tokens"] > 1
+    assert not record["estimated"]
+    assert record["status"] == "ok" and record["attempts"] == 1 and record["cache"] == "off"
+    assert record["chunks"] == (1,) and record["document"] == "skript.pdf"
+    assert record["latency"] is not None
+
+
+def test_streamed_usage_is_recorded():
+    generator = fake_generator()
+    generator.generate_qna_pairs_streaming("Photosynthese und Zellatmung", num_questions=1)
+
+    [record] = generator.metrics.records
+    assert record["completion_tokens"] > 1
+    assert not record["estimated"]
+
+
+def test_missing_usage_falls_back_to_estimate():
+    generator = fake_generator()
+    with patch.object(generator, "call_fake", return_value=ANSWER):
+        generator.generate_qna_pairs("Text", num_questions=1)
+
+    [record] = generator.metrics.records
+    assert record["estimated"]
+    assert record["completion_tokens"] == len(ANSWER) // 4 + 1
+
+
+def test_retries_and_cache_hits_are_counted(tmp_path):
+    generator = fake_generator(response_cache=ResponseCache(str(tmp_path)))
+    outcomes = [ProviderError("503", status=503, retryable=True), ANSWER]
+
+    def flaky(prompt):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    with patch.object(generator, "call_fake", side_effect=flaky):
+        generator.generate_qna_pairs("Text", num_questions=1)
+        generator.generate_qna_pairs("Text", num_questions=1)
+
+    summary = generator.metrics.summary()
+    assert summary["requests"] == 1
+    assert summary["attempts"] == 2 and summary["retries"] == 1
+    assert summary["cache_hits"] == 1
+    assert summary["cache_hit_rate"] == 0.5
+    assert [record["cache"] for record in generator.metrics.records] == ["miss", "hit"]
+
+
+def test_failed_request_is_recorded_as_error():
+    generator = fake_generator(fake_behavior=FakeBehavior(rate_500=1.0))
+    generator.retry_policy = RetryPolicy(max_attempts=2, sleep=lambda seconds: None)
+
+    with pytest.raises(ProviderError):
+        generator.generate_qna_pairs("Text", num_questions=1)
+
+    [record] = generator.metrics.records
+    assert record["status"] == "error" and record["attempts"] == 2
+    assert record["prompt_tokens"] == 0
+
+
+def test_packed_request_is_split_across_chunks():
+    usage = UsageMetrics(price_per_1000=1.0)
+    with metrics.scope(chunks=(1, 2), document="a.pdf"):
+        usage.record_call("fake", "fake-model", prompt_tokens=300, completion_tokens=100)
+    with metrics.scope(chunks=(3,), document="b.pdf"):
+        usage.record_call("fake", "fake-model", prompt_tokens=50, completion_tokens=50)
+
+    chunks = usage.by_chunk()
+    assert chunks[1]["prompt_tokens"] == 150 and chunks[2]["completion_tokens"] == 50
+    assert chunks[1]["cost_usd"] == pytest.approx(0.2)
+    assert usage.by_document()["b.pdf"]["cost_usd"] == pytest.approx(0.1)
+    assert usage.summary()["cost_usd"] == pytest.approx(0.5)
+
+
+def test_list_prices_apply_per_model_and_unknown_models_have_no_cost():
+    usage = UsageMetrics()
+    usage.record_call("openai", "gpt-3.5-turbo", prompt_tokens=1000, completion_tokens=1000)
+    assert usage.summary()["cost_usd"] == pytest.approx(0.002)
+
+    usage.record_call("openai", "unbekannt", prompt_tokens=10)
+    assert usage.summary()["cost_usd"] is None
+
+
+def test_export_writes_json_and_prometheus_text(tmp_path):
+    usage = UsageMetrics(run_id="test")
+    usage.record_call("fake", "fake-model", latency=0.3, prompt_tokens=10, completion_tokens=5)
+    usage.record_call("fake", "fake-model", status="error", attempts=3)
+
+    json_path, prom_path = usage.export(str(tmp_path))
+
+    with open(json_path, encoding="utf-8") as file:
+        data = json.load(file)
+    assert data["summary"]["requests"] == 2 and len(data["calls"]) == 2
+
+    with open(prom_path, encoding="utf-8") as file:
+        text = file.read()
+    assert 'karteikarten_api_requests_total{provider="fake",model="fake-model",status="error",cache="off"} 1' in text
+    assert 'karteikarten_api_tokens_total{provider="fake",model="fake-model",type="prompt"} 10' in text
+    assert 'karteikarten_api_retries_total{provider="fake",model="fake-model"} 2' in text
+    assert 'karteikarten_api_latency_seconds_bucket{provider="fake",model="fake-model",le="0.5"} 1' in text
+    assert 'karteikarten_api_latency_seconds_count{provider="fake",model="fake-model"} 1' in text
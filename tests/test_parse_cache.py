@@ -0,0 +1,78 @@
+import pytest
+from fpdf import FPDF
+
+from pdf_parser.parse_cache import ParseCache
+from pdf_parser.pdf_parser import PDFParser
+
+
+@pytest.fixture
+def sample_pdf(tmp_path):
+    """Erstellt eine PDF mit zwei Abschnitten."""
+    pdf_path = tmp_path / "cache.pdf"
+    pdf = FPDF()
+    pdf.add_page()
+    for title in ("Einleitung", "Hauptteil"):
+        pdf.set_font("Arial", "B", 16)
+        pdf.multi_cell(0, 10, txt=title)
+        pdf.set_font("Arial", size=12)
+        pdf.multi_cell(0, 10, txt="Ein Satz mit ausreichend Inhalt für einen Chunk. " * 20)
+    pdf.output(str(pdf_path))
+    return str(pdf_path)
+
+
+def test_cache_put_get_and_counters(tmp_path):
+    """Gespeicherte Einträge werden gefunden, Treffer und Fehlzugriffe werden gezählt."""
+    cache = ParseCache(str(tmp_path), parser_version=1)
+
+    assert cache.get("schluessel") is None
+    cache.put("schluessel", ["Absatz"], ["Chunk"])
+
+    assert cache.get("schluessel") == (["Absatz"], ["Chunk"])
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 1
+
+
+def test_cache_invalidated_on_parser_version_change(tmp_path):
+    """Eine neue Parser-Version verwirft alle alten Einträge."""
+    ParseCache(str(tmp_path), parser_version=1).put("schluessel", ["Absatz"], ["Chunk"])
+
+    assert ParseCache(str(tmp_path), parser_version=1).get("schluessel") is not None
+    assert ParseCache(str(tmp_path), parser_version=2).get("schluessel") is None
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """Bei Überschreiten der Größengrenze werden die ältesten Einträge verdrängt."""
+    cache = ParseCache(str(tmp_path), parser_version=1, max_bytes=250)
+    cache.put("alt", ["x" * 100], [])
+    cache.put("neu", ["y" * 100], [])
+    cache.put("neuer", ["z" * 100], [])
+
+    assert cache.get("alt") is None
+    assert cache.get("neuer") is not None
+    assert cache.stats["evictions"] == 1
+
+
+def test_parse_uses_cache(sample_pdf, tmp_path, word_count_tokens, monkeypatch):
+    """Beim zweiten Aufruf kommen die Chunks aus dem Cache, ohne das PDF erneut zu lesen."""
+    cache = ParseCache(str(tmp_path / "cache"), parser_version=1)
+    chunks = PDFParser(sample_pdf).parse(min_tokens=50, max_tokens=300, cache=cache)
+    assert chunks
+
+    def fail(*args, **kwargs):
+        raise AssertionError("extract_text darf bei einem Cache-Treffer nicht aufgerufen werden")
+
+    monkeypatch.setattr(PDFParser, "extract_text", fail)
+    cached_chunks = PDFParser(sample_pdf).parse(min_tokens=50, max_tokens=300, cache=cache)
+
+    assert cached_chunks == chunks
+    assert cache.stats == {"hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_cache_key_depends_on_parameters(sample_pdf, tmp_path):
+    """Seitenbereich und Parser-Parameter gehen in den Schlüssel ein."""
+    cache = ParseCache(str(tmp_path), parser_version=1)
+    key = cache.make_key(sample_pdf, 1, None, {"min_tokens": 200})
+
+    assert key == cache.make_key(sample_pdf, 1, None, {"min_tokens": 200})
+    assert key != cache.make_key(sample_pdf, 1, 1, {"min_tokens": 200})
+    assert key != cache.make_key(sample_pdf, 1, None, {"min_tokens": 100})
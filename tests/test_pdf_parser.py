@@ -1,4 +1,4 @@
-from pdf_parser.pdf_parser import PDFParser
+from pdf_parser.pdf_parser import PDFParser, pack_paragraphs
 from fpdf import FPDF
 import pytest
 import os
@@ -94,3 +94,212 @@ def test_pdf_parser_short_text(short_pdf):
 
     chunks = parser.chunk_text(min_tokens=50, max_tokens=300)
     assert chunks in ["PDF zu kurz", []], f"Erwartet wurde 'PDF zu kurz' oder '[]', aber '{chunks}' wurde zurückgegeben."
+
+@pytest.fixture
+def mixed_font_pdf(tmp_path):
+    """Erstellt eine zweiseitige PDF: Seite 1 Fließtext, Seite 2 nur große Schrift."""
+    pdf_path = tmp_path / "mixed.pdf"
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+    pdf.multi_cell(0, 10, txt="Fließtext auf der ersten Seite. " * 5)
+    pdf.add_page()
+    pdf.set_font("Arial", size=30)
+    pdf.multi_cell(0, 20, txt="Riesige Titelseite")
+    pdf.output(str(pdf_path))
+    return str(pdf_path)
+
+def test_font_statistics_limited_to_page_range(mixed_font_pdf):
+    """Die Schriftgrößen-Statistik darf nur Seiten aus dem gewählten Bereich berücksichtigen."""
+    parser = PDFParser(mixed_font_pdf)
+
+    assert parser.analyze_average_font_size(start_page=1, end_page=1) == pytest.approx(12, abs=0.5)
+    assert parser.analyze_average_font_size(start_page=2, end_page=2) == pytest.approx(30, abs=0.5)
+
+def test_body_font_size_not_skewed_by_large_titles(mixed_font_pdf):
+    """Die Fließtextgröße ist der Modus: ein großer Titel verschiebt sie nicht, er bildet eine Überschriftsebene."""
+    font_sizes = PDFParser(mixed_font_pdf).analyze_font_sizes(start_page=1, end_page=2)
+
+    assert font_sizes.body_size == pytest.approx(12, abs=0.5)
+    assert font_sizes.heading_tiers() == [pytest.approx(30, abs=0.5)]
+
+@pytest.fixture
+def multi_page_pdf(tmp_path):
+    """Erstellt eine mehrseitige PDF, deren Überschriften teils am Seitenende stehen."""
+    pdf_path = tmp_path / "multi.pdf"
+    pdf = FPDF()
+    for page in range(8):
+        pdf.add_page()
+        pdf.set_font("Arial", "B", 16)
+        pdf.multi_cell(0, 10, txt=f"Kapitel {page + 1}")
+        pdf.set_font("Arial", size=12)
+        pdf.multi_cell(0, 10, txt="Fließtext mit mehreren Sätzen zum Kapitel. " * 4)
+        pdf.set_font("Arial", "B", 16)
+        pdf.multi_cell(0, 10, txt=f"Abschnitt {page + 1} am Seitenende")
+    pdf.output(str(pdf_path))
+    return str(pdf_path)
+
+def test_parallel_extraction_matches_serial(multi_page_pdf, monkeypatch):
+    """Die parallele Extraktion muss exakt dieselben Chunks liefern wie die serielle."""
+    import pdf_parser.pdf_parser as pdf_parser_module
+    monkeypatch.setattr(pdf_parser_module, "MIN_PAGES_PER_SHARD", 1)
+
+    serial = PDFParser(multi_page_pdf).extract_text(start_page=1, end_page=None)
+    parallel = PDFParser(multi_page_pdf, workers=3).extract_text(start_page=1, end_page=None)
+
+    assert isinstance(serial, list)
+    assert parallel == serial
+
+def test_iter_chunks_matches_parse(multi_page_pdf, word_count_tokens):
+    """Der Generator liefert bei einheitlichen Schriftgrößen dieselben gepackten Chunks wie parse()."""
+    expected = PDFParser(multi_page_pdf).parse(start_page=2, end_page=6, min_tokens=40, max_tokens=80)
+    streamed = list(PDFParser(multi_page_pdf).iter_chunks(start_page=2, end_page=6, min_tokens=40, max_tokens=80))
+
+    assert len(expected) > 1
+    assert streamed == expected
+
+def test_iter_chunks_yields_before_document_is_read(multi_page_pdf, word_count_tokens, monkeypatch):
+    """Der erste Chunk muss geliefert werden, bevor alle Seiten gelesen wurden."""
+    import pdf_parser.pdf_parser as pdf_parser_module
+    pages_read = []
+    original_page_spans = pdf_parser_module._page_spans
+
+    def counting_page_spans(page, mode="dict"):
+        pages_read.append(page.number)
+        return original_page_spans(page, mode)
+
+    monkeypatch.setattr(pdf_parser_module, "_page_spans", counting_page_spans)
+
+    first_chunk = next(PDFParser(multi_page_pdf).iter_chunks(min_tokens=20, max_tokens=40))
+
+    assert first_chunk.startswith("Kapitel 1")
+    assert len(pages_read) < 8
+
+def test_pack_paragraphs_respects_token_limits():
+    """Chunks werden bei max_tokens abgeschlossen, ein überlanger Absatz bleibt ein eigener Chunk."""
+    paragraphs = ["A", "B", "C", "D", "E"]
+    token_counts = [120, 120, 120, 500, 80]
+
+    chunks = pack_paragraphs(paragraphs, token_counts, min_tokens=200, max_tokens=300)
+
+    assert chunks == ["A B", "C", "D", "E"], "Weder C noch der Rest E dürfen an den überlangen Absatz D."
+
+def test_pack_paragraphs_keeps_heading_with_oversized_paragraph():
+    """Eine Überschrift bleibt beim überlangen Absatz; ein Rest, der nicht mehr passt, wird eigener Chunk."""
+    assert pack_paragraphs(["H", "D", "E"], [5, 500, 250], min_tokens=200, max_tokens=300) == ["H D", "E"]
+    assert pack_paragraphs(["A", "B", "C", "D"], [250, 100, 30, 30], min_tokens=200, max_tokens=300) == ["A", "B C D"]
+
+def test_pack_paragraphs_merges_small_chunks():
+    """Zu kleine Chunks wachsen mit dem nächsten Absatz, ein einzelner Mini-Chunk wird verworfen."""
+    assert pack_paragraphs(["A", "B", "C"], [10, 10, 60], min_tokens=50, max_tokens=0) == ["A B C"]
+    assert pack_paragraphs(["A", "B"], [60, 10], min_tokens=50, max_tokens=0) == ["A B"]
+    assert pack_paragraphs(["A"], [10], min_tokens=50, max_tokens=0) == []
+    assert pack_paragraphs(["A"], [120], min_tokens=200, max_tokens=1000) == ["A"]
+
+def test_widened_range_extracts_only_new_pages(multi_page_pdf, monkeypatch):
+    """Bei einem erweiterten Seitenbereich werden nur die neuen Seiten extrahiert."""
+    import pdf_parser.pdf_parser as pdf_parser_module
+    pages_read = []
+    original_page_spans = pdf_parser_module._page_spans
+
+    def counting_page_spans(page, mode="dict"):
+        pages_read.append(page.number + 1)
+        return original_page_spans(page, mode)
+
+    monkeypatch.setattr(pdf_parser_module, "_page_spans", counting_page_spans)
+
+    parser = PDFParser(multi_page_pdf)
+    parser.extract_text(start_page=1, end_page=3)
+    pages_read.clear()
+    widened = parser.extract_text(start_page=1, end_page=6)
+
+    assert pages_read == [4, 5, 6]
+    assert widened == PDFParser(multi_page_pdf).extract_text(start_page=1, end_page=6)
+
+def test_page_store_spills_to_disk(multi_page_pdf, tmp_path):
+    """Mit Speichergrenze werden Seiten ausgelagert, das Ergebnis bleibt gleich."""
+    parser = PDFParser(multi_page_pdf, spill_dir=str(tmp_path / "pages"), max_pages_in_memory=2)
+    chunks = parser.extract_text(start_page=1, end_page=None)
+
+    assert len(os.listdir(tmp_path / "pages")) == 6
+    assert len(parser.page_store) == 8
+    assert parser.extract_text(start_page=1, end_page=None) == chunks
+    assert chunks == PDFParser(multi_page_pdf).extract_text(start_page=1, end_page=None)
+
+def test_page_store_without_spill_dir_keeps_all_pages(multi_page_pdf):
+    """Speichergrenze ohne spill_dir: verdrängte Seiten landen in einem temporären Verzeichnis."""
+    parser = PDFParser(multi_page_pdf, max_pages_in_memory=2)
+    chunks = parser.extract_text(start_page=1, end_page=5)
+
+    assert len(parser.page_store) == 5
+    assert chunks == PDFParser(multi_page_pdf).extract_text(start_page=1, end_page=5)
+
+@pytest.fixture
+def outline_pdf(multi_page_pdf, tmp_path):
+    """Ergänzt die mehrseitige PDF um ein Inhaltsverzeichnis mit einem Eintrag pro Kapitel."""
+    import fitz
+    pdf_path = tmp_path / "outline.pdf"
+    with fitz.open(multi_page_pdf) as document:
+        document.set_toc([[1, f"Kapitel {page}", page] for page in range(1, 9)])
+        document.save(str(pdf_path))
+    return str(pdf_path)
+
+def test_outline_strategy_uses_table_of_contents(outline_pdf):
+    """Mit Inhaltsverzeichnis bilden dessen Einträge die Abschnitte."""
+    parser = PDFParser(outline_pdf)
+    chunks = parser.extract_text(start_page=2, end_page=4)
+
+    assert parser.stats["strategy"] == "outline"
+    assert "outline" in parser.stats["timings"]
+    assert [chunk.split(" Fließtext")[0] for chunk in chunks] == ["Kapitel 2", "Kapitel 3", "Kapitel 4"]
+    assert chunks[0].endswith("Abschnitt 2 am Seitenende")
+
+def test_font_strategy_without_outline(multi_page_pdf):
+    """Ohne Inhaltsverzeichnis wird auf die Schriftgrößen-Heuristik zurückgefallen."""
+    parser = PDFParser(multi_page_pdf)
+    parser.extract_text(start_page=1, end_page=None)
+
+    assert parser.stats["strategy"] == "font"
+    assert set(parser.stats["timings"]) == {"outline", "extraction", "assembly"}
+
+@pytest.fixture
+def scanned_page_pdf(multi_page_pdf, tmp_path):
+    """Fügt der mehrseitigen PDF nach Seite 2 eine reine Bildseite ohne Textebene ein."""
+    import fitz
+    pdf_path = tmp_path / "scanned.pdf"
+    with fitz.open(multi_page_pdf) as document:
+        page = document.new_page(pno=2)
+        pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 64, 64), False)
+        pixmap.clear_with(200)
+        page.insert_image(page.rect, pixmap=pixmap)
+        document.save(str(pdf_path))
+    return str(pdf_path)
+
+def test_pages_without_text_layer_are_skipped(scanned_page_pdf):
+    """Bildseiten werden übersprungen und gezählt, der Text der übrigen Seiten bleibt erhalten."""
+    parser = PDFParser(scanned_page_pdf, strategy="font")
+    chunks = parser.extract_text(start_page=1, end_page=4)
+
+    assert parser.skipped_pages == [3]
+    assert parser.stats["skipped_pages"] == 1
+    assert "Kapitel 3" in " ".join(chunks)
+
+@pytest.mark.parametrize("mode", ["rawdict", "blocks"])
+def test_extraction_modes(multi_page_pdf, mode):
+    """"rawdict" liefert dieselben Chunks wie "dict", "blocks" denselben Text ohne Überschriftenerkennung."""
+    expected = PDFParser(multi_page_pdf).extract_text(start_page=1, end_page=None)
+    chunks = PDFParser(multi_page_pdf, extraction_mode=mode).extract_text(start_page=1, end_page=None)
+
+    if mode == "rawdict":
+        assert chunks == expected
+    else:
+        assert len(chunks) == 1
+        assert set(" ".join(expected).split()) <= set(chunks[0].split())
+
+def test_iter_chunks_uses_outline(outline_pdf, word_count_tokens, monkeypatch):
+    """Auch der Generator nutzt das Inhaltsverzeichnis und liest dafür keine Spans."""
+    import pdf_parser.pdf_parser as pdf_parser_module
+    expected = PDFParser(outline_pdf).parse(start_page=2, end_page=4, min_tokens=20, max_tokens=80)
+    monkeypatch.setattr(pdf_parser_module, "_page_spans", None)
+
+    assert list(PDFParser(outline_pdf).iter_chunks(start_page=2, end_page=4, min_tokens=20, max_tokens=80)) == expected
@@ -0,0 +1,92 @@
+import json
+import os
+from unittest.mock import patch
+
+from nlp import prompt_registry
+from nlp.prompt_registry import PromptRegistry, compile_template
+from nlp.qna_generator import QnAGenerator
+from nlp.response_cache import ResponseCache
+
+
+def write_prompt(prompt_dir, name, key, text, mtime):
+    path = os.path.join(prompt_dir, f"{name}.json")
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({key: text}, file)
+    os.utime(path, (mtime, mtime))
+
+
+def test_registry_reads_once_and_reloads_on_mtime_change(tmp_path, clock):
+    registry = PromptRegistry(str(tmp_path), clock=clock)
+    write_prompt(tmp_path, "dynamic_prompt_openai", "template", "Erste {chunk}", 1000)
+
+    with patch("builtins.open", wraps=open) as opened:
+        for _ in range(50):
+            assert registry.text("dynamic_prompt_openai") == "Erste {chunk}"
+    assert opened.call_count == 1
+
+    write_prompt(tmp_path, "dynamic_prompt_openai", "template", "Zweite {chunk}", 2000)
+    assert registry.text("dynamic_prompt_openai") == "Erste {chunk}"  # Noch innerhalb des Prüfintervalls
+    clock.now += prompt_registry.RELOAD_CHECK_INTERVAL
+    assert registry.text("dynamic_prompt_openai") == "Zweite {chunk}"
+    assert registry.stats == {"loads": 1, "reloads": 1}
+
+
+def test_registry_missing_file_falls_back_to_default(tmp_path, monkeypatch):
+    registry = PromptRegistry(str(tmp_path))
+    monkeypatch.setattr(prompt_registry, "_registry", registry)
+
+    assert registry.text("system_message") is None
+    assert registry.text("dynamic_prompt_gemini") is None
+    assert QnAGenerator(api_type="fake").load_dynamic_prompt() == prompt_registry.DEFAULT_TEMPLATE
+
+
+def test_template_renders_fields_and_tolerates_literal_braces():
+    assert compile_template("{chunk} ({num_questions} Fragen)").render(chunk="Text", num_questions=3) == \
+        "Text (3 Fragen)"
+    # JSON-Beispiele im Prompt sind kein gültiges Format → nur die bekannten Platzhalter werden ersetzt
+    template = compile_template('Format: {"question": "..."}\n{chunk}, {num_questions} Fragen')
+    assert template.render(chunk="Text", num_questions=2) == 'Format: {"question": "..."}\nText, 2 Fragen'
+    # Ohne {chunk} wird der Textabschnitt angehängt statt stillschweigend zu fehlen
+    assert compile_template("Erstelle Karten.").render(chunk="Text") == "Erstelle Karten.\n\nText"
+
+
+def test_gui_prompt_and_system_message_are_sent():
+    generator = QnAGenerator(api_type="openai", api_key="test-key",
+                             prompt="GUI: {chunk} / {num_questions}", system_prompt="Du bist Tutor.")
+
+    with patch.object(generator.client.chat.completions, "create") as create:
+        create.return_value.choices[0].message.content = "Frage: A?\nAntwort: B."
+        generator.generate_qna_pairs("Text", num_questions=2)
+
+    assert create.call_args.kwargs["messages"] == [
+        {"role": "system", "content": "Du bist Tutor."},
+        {"role": "user", "content": "GUI: Text / 2"},
+    ]
+
+
+def test_gemini_system_message_is_system_instruction():
+    generator = QnAGenerator(api_type="gemini", api_key="test-key", system_prompt="Du bist Tutor.")
+    generator.load_dynamic_prompt = lambda: "{chunk}"
+
+    with patch.object(generator.client.models, "generate_content") as generate:
+        generate.return_value.text = "Frage: A?\nAntwort: B."
+        generator.generate_qna_pairs("Text", num_questions=1)
+
+    assert generate.call_args.kwargs["config"]["system_instruction"] == "Du bist Tutor."
+    assert generate.call_args.kwargs["contents"] == [{"role": "user", "parts": [{"text": "Text"}]}]
+
+
+def test_system_prompt_is_part_of_cache_key(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    first = QnAGenerator(api_type="openai", api_key="test-key", response_cache=cache, prompt="{chunk}",
+                         system_prompt="Eins")
+    second = QnAGenerator(api_type="openai", api_key="test-key", response_cache=cache, prompt="{chunk}",
+                          system_prompt="Zwei")
+
+    with patch.object(first, "call_openai", return_value="Frage: A?\nAntwort: B.") as call_first, \
+            patch.object(second, "call_openai", return_value="Frage: C?\nAntwort: D.") as call_second:
+        first.generate_qna_pairs("Text", num_questions=1)
+        second.generate_qna_pairs("Text", num_questions=1)
+
+    assert call_first.call_count == 1
+    assert call_second.call_count == 1
@@ -0,0 +1,97 @@
+import pytest
+
+from nlp import providers
+from nlp.fake_provider import FakeBehavior, FakeLLMServer
+from nlp.providers import Provider, create_provider, register_provider
+from nlp.qna_generator import QnAGenerator
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients():
+    providers.close_clients()
+    yield
+    providers.close_clients()
+
+
+def test_clients_are_shared_per_key_and_endpoint():
+    first = QnAGenerator(api_type="openai", api_key="test-key", max_connections=4)
+    second = QnAGenerator(api_type="openai", api_key="test-key", max_connections=4)
+    other = QnAGenerator(api_type="openai", api_key="test-key", base_url="http://127.0.0.1:1/v1",
+                         max_connections=4)
+
+    assert first.client is second.client
+    assert other.client is not first.client
+    assert str(other.client.base_url).startswith("http://127.0.0.1:1/v1")
+
+
+def test_connection_pool_is_sized_to_concurrency():
+    client = QnAGenerator(api_type="openai", api_key="test-key", max_connections=12).client
+    pool = client._client._transport._pool
+
+    assert pool._max_connections == 12
+    assert pool._max_keepalive_connections == 12
+
+
+def test_gemini_connection_pool_is_sized_to_concurrency():
+    client = QnAGenerator(api_type="gemini", api_key="test-key", max_connections=6).client
+    pool = client._api_client._httpx_client._transport._pool
+
+    assert pool._max_connections == 6
+    assert pool._max_keepalive_connections == 6
+
+
+def test_gemini_client_without_client_args_support(monkeypatch):
+    """Ältere google-genai-Versionen (z. B. die fixierte 1.3.0) kennen client_args nicht."""
+    monkeypatch.setattr(providers, "GEMINI_CLIENT_ARGS", False)
+    client = QnAGenerator(api_type="gemini", api_key="test-key", max_connections=6).client
+
+    assert client._api_client._http_options.client_args is None
+
+
+def test_replacing_client_does_not_touch_shared_pool():
+    first = QnAGenerator(api_type="openai", api_key="test-key")
+    second = QnAGenerator(api_type="openai", api_key="test-key")
+    shared = second.client
+    first.client = object()
+
+    assert second.client is shared
+
+
+def test_base_url_and_model_reach_compatible_server():
+    with FakeLLMServer(FakeBehavior()) as server:
+        generator = QnAGenerator(api_type="openai", api_key="test-key", base_url=server.base_url, model="lokal")
+        generator.load_dynamic_prompt = lambda: "{chunk}"
+
+        assert len(generator.generate_qna_pairs("Lokaler Inferenzserver", num_questions=3)) == 3
+        assert generator.model == "lokal"
+        assert server.stats["requests"] == 1
+
+
+def test_registry_accepts_new_providers():
+    @register_provider
+    class EchoProvider(Provider):
+        name = "echo"
+        default_model = "echo-1"
+
+        def create_client(self):
+            return None
+
+        def complete(self, prompt, system_prompt=None, params=None, usage=None):
+            return f"Frage: {prompt}?\nAntwort: Echo."
+
+    try:
+        generator = QnAGenerator(api_type="echo")
+        generator.load_dynamic_prompt = lambda: "{chunk}"
+
+        assert generator.generate_qna_pairs("Hallo", num_questions=1) == [{"question": "Hallo?", "answer": "Echo."}]
+        assert generator.generate_qna_pairs_streaming("Hallo", num_questions=1) == \
+            [{"question": "Hallo?", "answer": "Echo."}]
+    finally:
+        del providers.PROVIDERS["echo"]
+
+
+def test_unknown_provider_is_rejected():
+    with pytest.raises(ValueError):
+        create_provider("unbekannt")
+    with pytest.raises(ValueError):
+        QnAGenerator(api_type="unbekannt")
@@ -0,0 +1,72 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from nlp import rate_limiter
+from nlp.qna_generator import QnAGenerator
+from nlp.rate_limiter import RateLimiter, RateLimitExceeded
+
+
+def test_requests_per_minute_are_spread(clock):
+    """Bei 60 RPM geht der volle Bucket sofort durch, danach eine Anfrage pro Sekunde."""
+    limiter = RateLimiter(rpm=60, tpm=10**6, clock=clock, sleep=clock.sleep)
+
+    for _ in range(60):
+        assert limiter.acquire(10) == 0
+    assert limiter.acquire(10) == pytest.approx(1.0)
+    assert limiter.stats["waits"] == 1
+    assert limiter.stats["wait_seconds"] == pytest.approx(1.0)
+
+
+def test_tokens_per_minute_limit_waits_for_capacity(clock):
+    """Große Anfragen warten, bis genug Tokens nachgeflossen sind."""
+    limiter = RateLimiter(rpm=1000, tpm=6000, clock=clock, sleep=clock.sleep)
+
+    limiter.acquire(6000)
+    assert limiter.acquire(3000) == pytest.approx(30.0)  # 100 Tokens pro Sekunde
+
+
+def test_throttle_pauses_and_halves_rate(clock):
+    """Nach einer 429-Antwort wird bis Retry-After pausiert und die Rate halbiert."""
+    limiter = RateLimiter(rpm=60, tpm=10**6, clock=clock, sleep=clock.sleep)
+
+    limiter.throttle(retry_after=5)
+    assert limiter.acquire(1) == pytest.approx(5.0)
+    assert limiter.rate_factor == 0.5
+    assert limiter.stats["throttled"] == 1
+
+    limiter.record_success()
+    assert limiter.rate_factor == pytest.approx(0.55)
+
+
+def test_retry_after_header_parsing():
+    assert rate_limiter.retry_after_from_response(MagicMock(headers={"retry-after": "7"})) == 7.0
+    assert rate_limiter.retry_after_from_response(MagicMock(headers={"retry-after-ms": "250"})) == 0.25
+    assert rate_limiter.retry_after_from_response(MagicMock(headers={})) is None
+
+
+def test_limiter_is_shared_per_provider_and_model():
+    first = QnAGenerator(api_type="openai", api_key="test-key")
+    second = QnAGenerator(api_type="openai", api_key="test-key")
+
+    assert first.rate_limiter is second.rate_limiter
+    assert QnAGenerator(api_type="manual").rate_limiter is None
+
+
+def test_generator_retries_after_rate_limit(monkeypatch):
+    """Eine 429-Antwort führt zu Drosselung und erneutem Senden statt zu leeren Karten."""
+    generator = QnAGenerator(api_type="openai", api_key="test-key")
+    monkeypatch.setattr(generator.rate_limiter, "sleep", lambda seconds: None)
+    responses = [RateLimitExceeded("429", retry_after=0), "Frage: Was ist RPM?\nAntwort: Anfragen pro Minute."]
+
+    def fake_call(prompt):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    with patch.object(generator, "call_openai", side_effect=fake_call):
+        qna_pairs = generator.generate_qna_pairs("RPM steht für Anfragen pro Minute.", num_questions=1)
+
+    assert qna_pairs == [{"question": "Was ist RPM?", "answer": "Anfragen pro Minute."}]
+    assert generator.rate_limiter.stats["throttled"] == 1
@@ -0,0 +1,84 @@
+import re
+from unittest.mock import patch
+
+import pytest
+
+from nlp.qna_generator import QnAGenerator, iter_packs
+
+
+def word_count(text):
+    return len(text.split())
+
+
+@pytest.fixture
+def generator():
+    generator = QnAGenerator(api_type="openai", api_key="test-key")
+    generator.load_dynamic_prompt = lambda: "Text: {chunk}\nErstelle {num_questions} Fragen."
+    return generator
+
+
+def answer_per_section(prompt):
+    """Ersatz-Modell: beantwortet jeden '### Abschnitt <Nr>' mit einer Karte über dessen ersten Satz."""
+    sections = re.findall(r"### Abschnitt (\d+)\n(.*?)\.", prompt)
+    return "\n".join(f"### Abschnitt {n}\nFrage: Worum geht es in {text}?\nAntwort: {n}" for n, text in sections)
+
+
+def test_iter_packs_respects_budget_and_large_chunks():
+    """Kleine Chunks werden bis zum Budget gebündelt, große Chunks bleiben allein, die Reihenfolge bleibt."""
+    items = [("a " * 40, 1), ("b " * 40, 1), ("c " * 40, 1), ("d " * 500, 3), ("e " * 40, 1)]
+    packs = list(iter_packs(items, word_count, token_budget=100, max_chunk_tokens=300))
+
+    assert [[chunk[0] for chunk, _ in pack] for pack in packs] == [["a", "b"], ["c"], ["d"], ["e"]]
+
+
+def test_iter_packs_limits_questions():
+    items = [("x", 3), ("y", 3), ("z", 3)]
+    packs = list(iter_packs(items, word_count, max_questions=6))
+
+    assert [len(pack) for pack in packs] == [2, 1]
+
+
+def test_packed_response_is_split_to_source_chunks(generator):
+    """Eine gebündelte Anfrage liefert die Karten getrennt nach Chunk zurück."""
+    items = [("Photosynthese. Mehr Text", 1), ("Zellatmung. Mehr Text", 1), ("Mitose. Mehr Text", 1)]
+
+    with patch.object(generator, "call_openai", side_effect=answer_per_section) as call:
+        results = generator.generate_packed(items)
+
+    assert call.call_count == 1
+    assert [pairs[0]["question"] for pairs in results] == [
+        "Worum geht es in Photosynthese?", "Worum geht es in Zellatmung?", "Worum geht es in Mitose?"]
+    assert generator.stats["requests"] == 1
+
+
+def test_unparseable_sections_fall_back_to_single_requests(generator):
+    """Fehlt ein Abschnitt in der Antwort, wird nur dieser Chunk einzeln angefragt."""
+    def answer(prompt):
+        if "### Abschnitt" in prompt:
+            return "### Abschnitt 1\nFrage: Eins?\nAntwort: 1"
+        return "Frage: Einzeln?\nAntwort: 2"
+
+    with patch.object(generator, "call_openai", side_effect=answer) as call:
+        results = generator.generate_packed([("Erster Chunk", 1), ("Zweiter Chunk", 1)])
+
+    assert [pairs[0]["question"] for pairs in results] == ["Eins?", "Einzeln?"]
+    assert call.call_count == 2
+    assert generator.stats["pack_fallbacks"] == 1
+
+
+def test_packing_reduces_requests_and_prompt_tokens(generator):
+    """Zehn kleine Chunks brauchen gebündelt weniger Anfragen und weniger Prompt-Tokens."""
+    generator.load_dynamic_prompt = lambda: "Lange Anweisung mit vielen Regeln. " * 30 + "{chunk} ({num_questions})"
+    items = [(f"Thema{i}. " + "Inhalt " * 60, 1) for i in range(10)]
+
+    with patch.object(generator, "call_openai", side_effect=answer_per_section):
+        for item in items:
+            generator.generate_packed([item])
+        single = dict(generator.stats)
+
+        generator.stats.update(requests=0, prompt_tokens=0)
+        for pack in iter_packs(items, word_count):
+            generator.generate_packed(pack)
+
+    assert generator.stats["requests"] < single["requests"]
+    assert generator.stats["prompt_tokens"] < single["prompt_tokens"]
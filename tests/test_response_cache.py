@@ -0,0 +1,109 @@
+import time
+from unittest.mock import patch
+
+import pytest
+
+from nlp.qna_generator import QnAGenerator
+from nlp.response_cache import ResponseCache
+from nlp.retry import ProviderError
+
+ANSWER = "Frage: Was ist ein Cache?\nAntwort: Ein Zwischenspeicher."
+
+
+def make_generator(cache, bypass_cache=False):
+    generator = QnAGenerator(api_type="openai", api_key="test-key", response_cache=cache, bypass_cache=bypass_cache)
+    generator.load_dynamic_prompt = lambda: "{chunk} ({num_questions} Fragen)"
+    return generator
+
+
+def test_cache_put_get_and_hit_rate(tmp_path):
+    """Gespeicherte Antworten werden gefunden, die Trefferquote wird mitgezählt."""
+    cache = ResponseCache(str(tmp_path))
+
+    assert cache.get("schluessel") is None
+    cache.put("schluessel", ANSWER)
+
+    assert cache.get("schluessel") == ANSWER
+    assert cache.stats["hits"] == 1
+    assert cache.hit_rate() == 0.5
+
+
+def test_cache_key_depends_on_request(tmp_path):
+    """Provider, Modell, Prompt, System-Prompt und Parameter gehen in den Schlüssel ein."""
+    key = ResponseCache.make_key("openai", "gpt-3.5-turbo", "Prompt", None, {"temperature": 0.7})
+
+    assert key == ResponseCache.make_key("openai", "gpt-3.5-turbo", "Prompt", None, {"temperature": 0.7})
+    assert key != ResponseCache.make_key("gemini", "gpt-3.5-turbo", "Prompt", None, {"temperature": 0.7})
+    assert key != ResponseCache.make_key("openai", "gpt-4", "Prompt", None, {"temperature": 0.7})
+    assert key != ResponseCache.make_key("openai", "gpt-3.5-turbo", "Prompt!", None, {"temperature": 0.7})
+    assert key != ResponseCache.make_key("openai", "gpt-3.5-turbo", "Prompt", "System", {"temperature": 0.7})
+    assert key != ResponseCache.make_key("openai", "gpt-3.5-turbo", "Prompt", None, {"temperature": 0.2})
+
+
+def test_cache_evicts_by_size_and_age(tmp_path, monkeypatch):
+    """Zu alte Einträge verfallen, bei zu großem Cache werden die ältesten verdrängt."""
+    cache = ResponseCache(str(tmp_path), max_bytes=250, max_age=60)
+    cache.put("alt", "x" * 100)
+    cache.put("neu", "y" * 100)
+    cache.put("neuer", "z" * 100)
+    assert cache.get("alt") is None
+    assert cache.stats["evictions"] == 1
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    assert cache.get("neuer") is None
+    assert cache.stats["expired"] == 1
+
+
+def test_unchanged_rerun_is_served_from_cache(tmp_path):
+    """Der zweite Lauf mit denselben Chunks ruft die API nicht mehr auf."""
+    cache = ResponseCache(str(tmp_path))
+
+    with patch.object(QnAGenerator, "call_openai", return_value=ANSWER) as call:
+        first = make_generator(cache).generate_qna_pairs("Ein Cache speichert Antworten.", num_questions=1)
+        second = make_generator(cache).generate_qna_pairs("Ein Cache speichert Antworten.", num_questions=1)
+        make_generator(cache).generate_qna_pairs("Ein geänderter Chunk.", num_questions=1)
+
+    assert first == second
+    assert call.call_count == 2
+    assert cache.stats["hits"] == 1
+
+
+def test_bypass_flag_skips_lookup_but_refreshes(tmp_path):
+    """Mit bypass_cache wird neu angefragt und die gespeicherte Antwort ersetzt."""
+    cache = ResponseCache(str(tmp_path))
+    with patch.object(QnAGenerator, "call_openai", return_value=ANSWER):
+        make_generator(cache).generate_qna_pairs("Chunk", num_questions=1)
+
+    fresh = "Frage: Neu?\nAntwort: Ja."
+    with patch.object(QnAGenerator, "call_openai", return_value=fresh) as call:
+        assert make_generator(cache, bypass_cache=True).generate_qna_pairs("Chunk", num_questions=1)[0]["question"] == "Neu?"
+        assert make_generator(cache).generate_qna_pairs("Chunk", num_questions=1)[0]["question"] == "Neu?"
+
+    assert call.call_count == 1
+
+
+def test_empty_and_unusable_answers_are_not_cached(tmp_path):
+    """Eine leere oder nicht auswertbare Antwort wird beim nächsten Lauf erneut angefragt."""
+    cache = ResponseCache(str(tmp_path))
+
+    for answer in ("", "Dazu kann ich leider nichts sagen."):
+        with patch.object(QnAGenerator, "call_openai", return_value=answer) as call:
+            assert make_generator(cache).generate_qna_pairs(answer or "Leer", num_questions=1) == []
+            assert make_generator(cache).generate_qna_pairs(answer or "Leer", num_questions=1) == []
+        assert call.call_count == 2
+
+    assert cache.stats["hits"] == 0
+
+
+def test_answer_without_text_is_a_provider_error(tmp_path):
+    """Ein Provider ohne Antworttext (z. B. Gemini bei Sicherheitsfilter) zählt als Fehler, nichts wird gespeichert."""
+    cache = ResponseCache(str(tmp_path))
+
+    with patch.object(QnAGenerator, "call_openai", return_value=None):
+        with pytest.raises(ProviderError):
+            make_generator(cache).generate_qna_pairs("Chunk", num_questions=1)
+
+    with patch.object(QnAGenerator, "call_openai", return_value=ANSWER) as call:
+        assert make_generator(cache).generate_qna_pairs("Chunk", num_questions=1)
+    assert call.call_count == 1
@@ -0,0 +1,141 @@
+import random
+from unittest.mock import patch
+
+import pytest
+
+from nlp import retry
+from nlp.generation_engine import GenerationCancelled, JobControl
+from nlp.qna_generator import QnAGenerator
+from nlp.rate_limiter import RateLimitExceeded
+from nlp.retry import CircuitBreaker, CircuitOpenError, ProviderError, RetryPolicy
+
+
+@pytest.fixture
+def generator():
+    """OpenAI-Generator ohne echte Wartezeiten zwischen den Versuchen."""
+    generator = QnAGenerator(api_type="openai", api_key="test-key")
+    generator.retry_policy = RetryPolicy(max_attempts=3, sleep=lambda seconds: None, rng=random.Random(0))
+    generator.load_dynamic_prompt = lambda: "{chunk} {num_questions}"
+    return generator
+
+
+def test_backoff_grows_exponentially_with_jitter():
+    policy = RetryPolicy(base_delay=1.0, max_delay=8.0, rng=random.Random(1))
+    for attempt, cap in ((1, 1.0), (2, 2.0), (3, 4.0), (4, 8.0), (6, 8.0)):
+        delays = [policy.delay(attempt) for _ in range(50)]
+        assert all(0 <= delay <= cap for delay in delays)
+        assert max(delays) > cap / 2  # Jitter nutzt den ganzen Bereich
+
+
+def test_circuit_breaker_opens_and_recovers(clock):
+    breaker = CircuitBreaker("openai", failure_threshold=2, reset_timeout=10, clock=clock)
+
+    breaker.record_failure()
+    breaker.before_call()  # noch geschlossen
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now = 10
+    breaker.before_call()  # halb offen: ein Probeaufruf
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_retryable_error_is_retried(generator):
+    responses = [ProviderError("500", status=500, retryable=True), "Frage: A?\nAntwort: B."]
+
+    def fake_call(prompt):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    with patch.object(generator, "call_openai", side_effect=fake_call):
+        assert generator.generate_qna_pairs("Text", num_questions=1) == [{"question": "A?", "answer": "B."}]
+
+
+def test_fatal_error_is_not_retried(generator):
+    with patch.object(generator, "call_openai", side_effect=ProviderError("401", status=401)) as call:
+        with pytest.raises(ProviderError) as excinfo:
+            generator.generate_qna_pairs("Text", num_questions=1)
+
+    assert call.call_count == 1
+    assert excinfo.value.to_dict()["status"] == 401
+
+
+def test_exhausted_retries_raise_structured_error(generator):
+    error = ProviderError("Zeitüberschreitung", provider="openai", retryable=True)
+    with patch.object(generator, "call_openai", side_effect=error) as call:
+        with pytest.raises(ProviderError):
+            generator.generate_qna_pairs("Text", num_questions=1)
+
+    assert call.call_count == 3
+
+
+def test_open_circuit_stops_calls(generator):
+    generator.circuit_breaker.failure_threshold = 3
+    with patch.object(generator, "call_openai", side_effect=ProviderError("503", status=503, retryable=True)):
+        with pytest.raises(ProviderError):
+            generator.generate_qna_pairs("Text", num_questions=1)
+
+    with patch.object(generator, "call_openai") as call:
+        with pytest.raises(CircuitOpenError):
+            generator.generate_qna_pairs("Text", num_questions=1)
+    call.assert_not_called()
+
+
+def half_open(generator, clock):
+    """Öffnet den Breaker des Generators und lässt die Wartezeit verstreichen."""
+    breaker = generator.circuit_breaker
+    breaker.clock = clock
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    clock.now = breaker.reset_timeout
+    assert breaker.state == "half-open"
+    return breaker
+
+
+def test_probe_answered_with_429_does_not_block_breaker(generator, clock):
+    breaker = half_open(generator, clock)
+    responses = [RateLimitExceeded("429", retry_after=0), "Frage: A?\nAntwort: B."]
+
+    def fake_call(prompt):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    with patch.object(generator, "call_openai", side_effect=fake_call):
+        assert generator.generate_qna_pairs("Text", num_questions=1) == [{"question": "A?", "answer": "B."}]
+    assert breaker.state == "closed"
+
+
+def test_cancelled_probe_releases_breaker(generator, clock):
+    breaker = half_open(generator, clock)
+    control = JobControl()
+    generator.control = control
+
+    def cancelling_call(prompt):
+        control.cancel()
+        raise ProviderError("503", status=503, retryable=True)
+
+    with patch.object(generator, "call_openai", side_effect=cancelling_call):
+        with pytest.raises(GenerationCancelled):
+            generator.generate_qna_pairs("Text", num_questions=1)
+    assert breaker.state == "half-open" and not breaker.probing
+
+    generator.control = None
+    with patch.object(generator, "call_openai", return_value="Frage: A?\nAntwort: B.") as call:
+        generator.generate_qna_pairs("Text", num_questions=1)
+    call.assert_called_once()
+    assert breaker.state == "closed"
+
+
+def test_status_classification():
+    assert retry.is_retryable_status(503)
+    assert retry.is_retryable_status(408)
+    assert not retry.is_retryable_status(400)
+    assert not retry.is_retryable_status(None)
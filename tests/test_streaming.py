@@ -0,0 +1,173 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import openai
+import pytest
+
+from nlp import rate_limiter, retry
+from nlp.fake_provider import FakeBehavior
+from nlp.qna_generator import QnAGenerator
+from nlp.response_cache import ResponseCache
+from nlp.retry import ProviderError
+from nlp.stream_parser import IncrementalCardParser, IncrementalQnAParser
+
+ANSWER = "Frage 1: Was ist A?\nAntwort 1: Eins.\nFrage 2: Was ist B?\nAntwort 2: Zwei.\nFrage 3: Was ist C?\nAntwort 3: Drei."
+
+
+class StreamingHandler(BaseHTTPRequestHandler):
+    """Lokaler OpenAI-kompatibler Endpunkt, der ANSWER in kleinen Stücken als Server-Sent Events sendet."""
+
+    delay = 0.02
+    sent_events = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        try:
+            for i in range(0, len(ANSWER), 8):
+                event = {
+                    "id": "test", "object": "chat.completion.chunk", "created": 0, "model": "gpt-3.5-turbo",
+                    "choices": [{"index": 0, "delta": {"content": ANSWER[i:i + 8]}, "finish_reason": None}],
+                }
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                type(self).sent_events += 1
+                time.sleep(self.delay)
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client hat den Stream vorzeitig beendet
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def streaming_server():
+    StreamingHandler.sent_events = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StreamingHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def generator(streaming_server):
+    retry.reset()
+    rate_limiter.reset()
+    generator = QnAGenerator(api_type="openai", api_key="test-key")
+    generator.client = openai.OpenAI(api_key="test-key", base_url=streaming_server, max_retries=0)
+    generator.load_dynamic_prompt = lambda: "{chunk} ({num_questions} Fragen)"
+    return generator
+
+
+def test_parser_emits_pairs_as_soon_as_next_question_starts():
+    parser = IncrementalQnAParser(QnAGenerator(api_type="manual").extract_qna_pairs)
+    pieces = [ANSWER[i:i + 5] for i in range(0, len(ANSWER), 5)]
+
+    emitted = []
+    for piece in pieces:
+        emitted.append(len(parser.feed(piece)))
+    rest = parser.finish()
+
+    assert sum(emitted) == 2  # A und B sind fertig, sobald die jeweils nächste Frage beginnt
+    assert rest == [{"question": "Was ist C?", "answer": "Drei."}]
+
+
+def test_streaming_emits_cards_before_stream_ends(generator):
+    arrivals = []
+    start = time.perf_counter()
+    pairs = generator.generate_qna_pairs_streaming(
+        "Text", num_questions=3, on_card=lambda pair: arrivals.append(time.perf_counter() - start))
+    total = time.perf_counter() - start
+
+    assert [pair["answer"] for pair in pairs] == ["Eins.", "Zwei.", "Drei."]
+    assert len(arrivals) == 3
+    # Nach der ersten Karte folgen noch mindestens acht Stücke à 20 ms
+    assert total - arrivals[0] > 0.1
+
+
+def test_streaming_stops_early_after_requested_pairs(generator):
+    pairs = generator.generate_qna_pairs_streaming("Text", num_questions=1)
+
+    assert pairs == [{"question": "Was ist A?", "answer": "Eins."}]
+    assert StreamingHandler.sent_events < len(ANSWER) // 8
+
+
+def test_card_parser_emits_each_closed_card():
+    answer = json.dumps({"cards": [
+        {"question": "Was ist {A}?", "answer": "Ein \"Zitat\" mit ]"},
+        {"question": "Was ist B?", "answer": "Zwei."},
+        {"question": "", "answer": "leer"},
+    ]}, ensure_ascii=False)
+    parser = IncrementalCardParser()
+
+    emitted = []
+    for i in range(0, len(answer), 7):
+        emitted.append(parser.feed(answer[i:i + 7]))
+
+    cards = [card for batch in emitted for card in batch]
+    assert cards == [{"question": "Was ist {A}?", "answer": 'Ein "Zitat" mit ]'},
+                     {"question": "Was ist B?", "answer": "Zwei."}]
+    assert emitted.index([cards[0]]) < len(emitted) // 2
+    assert parser.finish() == []
+
+
+def test_json_mode_streams_cards():
+    retry.reset()
+    rate_limiter.reset()
+    generator = QnAGenerator(api_type="fake", output_format="json",
+                             fake_behavior=FakeBehavior(chunk_size=8, chunk_delay=0.01))
+    generator.load_dynamic_prompt = lambda: "{chunk}"
+    arrivals = []
+    start = time.perf_counter()
+    pairs = generator.generate_qna_pairs_streaming(
+        "Mitochondrien Ribosomen Zellkern", num_questions=3,
+        on_card=lambda pair: arrivals.append(time.perf_counter() - start))
+    total = time.perf_counter() - start
+
+    assert [pair["question"] for pair in pairs] == ["Was bedeutet „Mitochondrien“?", "Was bedeutet „Ribosomen“?",
+                                                    "Was bedeutet „Zellkern“?"]
+    assert generator.provider.client.stats["streams"] == 1
+    assert total - arrivals[0] > 0.05
+
+
+def test_stream_stopped_early_is_not_cached(tmp_path):
+    """Ein vorzeitig beendeter JSON-Stream ist abgeschnitten; ein Cache-Treffer darf keine leere Karte liefern."""
+    cache = ResponseCache(str(tmp_path))
+    counts = []
+    for _ in range(2):
+        generator = QnAGenerator(api_type="fake", output_format="json", response_cache=cache,
+                                 fake_behavior=FakeBehavior(chunk_size=8))
+        generator.load_dynamic_prompt = lambda: "{chunk}"
+        pairs = generator.generate_qna_pairs_streaming("Mitochondrien Ribosomen Zellkern", num_questions=2)
+        counts.append(len(pairs))
+        assert generator.stats["parse_failures"] == 0
+
+    assert counts == [2, 2]
+    assert cache.stats["hits"] == 0
+
+
+def test_broken_stream_keeps_cards_already_shown():
+    """Bricht der Stream nach zwei Karten ab, sind genau die angezeigten Karten das Ergebnis des Chunks."""
+    generator = QnAGenerator(api_type="fake", output_format="text")
+    generator.load_dynamic_prompt = lambda: "{chunk}"
+
+    def broken_stream(prompt):
+        yield ANSWER[:ANSWER.index("Frage 3")]
+        yield "Frage 3: Was ist C?"
+        raise ProviderError("Verbindung abgebrochen", provider="fake", retryable=True)
+
+    shown = []
+    with patch.object(generator, "stream_fake", side_effect=broken_stream):
+        pairs = generator.generate_qna_pairs_streaming("Text", num_questions=3, on_card=shown.append)
+
+    assert [pair["answer"] for pair in pairs] == ["Eins.", "Zwei."]
+    assert shown == pairs
+    assert generator.stats["partial_streams"] == 1
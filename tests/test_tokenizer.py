@@ -0,0 +1,55 @@
+import pytest
+from nlp import tokenizer
+
+
+class FakeEncoding:
+    """Ersatz-Encoder: ein Token pro Wort, zählt die Kodier-Aufrufe."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode_ordinary(self, text):
+        self.encoded.append(text)
+        return text.split()
+
+    def encode_ordinary_batch(self, texts, num_threads=8):
+        self.encoded.extend(texts)
+        return [text.split() for text in texts]
+
+
+@pytest.fixture
+def fake_encoding(monkeypatch):
+    """Setzt einen Ersatz-Encoder ein und leert den Cache vor und nach dem Test."""
+    encoding = FakeEncoding()
+    monkeypatch.setattr(tokenizer, "_encoding", encoding)
+    tokenizer.clear_cache()
+    yield encoding
+    tokenizer.clear_cache()
+
+
+def test_count_tokens_is_cached(fake_encoding):
+    """Derselbe Text wird nur einmal kodiert."""
+    assert tokenizer.count_tokens("eins zwei drei") == 3
+    assert tokenizer.count_tokens("eins zwei drei") == 3
+
+    assert fake_encoding.encoded == ["eins zwei drei"]
+    assert tokenizer.cache_info()["hits"] == 1
+
+
+def test_count_many_batches_only_missing_texts(fake_encoding):
+    """count_many kodiert nur unbekannte Texte, Duplikate nur einmal, und behält die Reihenfolge."""
+    tokenizer.count_tokens("bekannt")
+
+    counts = tokenizer.count_many(["a b", "bekannt", "a b", "c d e"])
+
+    assert counts == [2, 1, 2, 3]
+    assert fake_encoding.encoded == ["bekannt", "a b", "c d e"]
+
+
+def test_cache_is_bounded(fake_encoding, monkeypatch):
+    """Der LRU-Cache verdrängt die ältesten Einträge."""
+    monkeypatch.setattr(tokenizer, "CACHE_SIZE", 2)
+
+    tokenizer.count_many(["a", "b", "c"])
+
+    assert tokenizer.cache_info()["size"] == 2